@@ -0,0 +1,481 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+性能基准测试
+生成合成的语言文件夹和配置表，测量导出、查找、比对、写回、替换、搜索和读取工作簿的耗时，结果保存为JSON便于对比
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import importlib.util
+import platform
+import statistics
+import subprocess
+import tempfile
+from contextlib import redirect_stdout
+from datetime import datetime
+from pathlib import Path
+
+import go
+import config
+from go import ExcelTextReplacer, LazyModule, get_language_index
+from config import ExcelToCSVConverter
+
+pd = LazyModule('pandas')
+openpyxl = LazyModule('openpyxl')
+xlwt = LazyModule('xlwt')
+
+
+# ==================== 配置区域 ====================
+# 默认测试规模（语言表行数），配置表行数为其 1/10，技能表行数为其 1/20
+DEFAULT_SIZES = [10000, 100000]
+
+# 默认测试格式
+DEFAULT_FORMATS = ['xls', 'xlsx']
+
+# 每项测试重复次数（第1次在清空缓存后运行，记为冷启动）
+DEFAULT_REPEAT = 3
+
+# 结果保存文件夹（在当前工作目录下创建）
+RESULT_FOLDER = "bench_results"
+
+# 随机种子，保证每次生成的数据相同
+SEED = 20240601
+
+# .xls 单个工作表最多65536行，超过时拆分为多个工作表
+XLS_SHEET_ROWS = 60000
+
+# 基准测试使用的预预处理配置（与工具默认配置的格式相同）
+BENCH_PRE_PROCESSING_CONFIG = {
+    "hero[hero], 技能-初始资质": "heroSkill[heroskill], 技能id, 名称",
+    "hero[hero], 潜能技能": "heroSkill[heroskill], 技能id, 名称",
+}
+
+# 基准测试使用的替换规则
+BENCH_REPLACEMENT_CONFIG = {
+    "人才": "能士",
+    "知己": "挚友",
+    "商贾": "智者",
+}
+
+# 中文文本素材
+WORDS = ["人才", "知己", "商贾", "武者", "五竹", "琴", "棋", "书", "画", "斩击", "灵宠", "门客", "技能", "描述"]
+# ================================================
+
+
+def write_workbook(path, sheets):
+    """写入工作簿
+
+    Args:
+        path: 文件路径，按扩展名选择 .xls / .xlsx
+        sheets: [(工作表名, 行列表)]，.xls 超过 XLS_SHEET_ROWS 行时自动拆分为多个工作表
+    """
+    path = Path(path)
+    if path.suffix == '.xlsx':
+        workbook = openpyxl.Workbook(write_only=True)
+        for sheet_name, rows in sheets:
+            sheet = workbook.create_sheet(sheet_name)
+            for row in rows:
+                sheet.append(row)
+        workbook.save(path)
+        return
+
+    workbook = xlwt.Workbook()
+    for sheet_name, rows in sheets:
+        header, data = rows[0], rows[1:]
+        parts = [data[i:i + XLS_SHEET_ROWS] for i in range(0, len(data), XLS_SHEET_ROWS)] or [[]]
+        for part_idx, part in enumerate(parts):
+            name = sheet_name if part_idx == 0 else f"{sheet_name}{part_idx + 1}"
+            sheet = workbook.add_sheet(name)
+            for row_idx, row in enumerate([header] + part):
+                for col_idx, value in enumerate(row):
+                    sheet.write(row_idx, col_idx, value)
+    workbook.save(str(path))
+
+
+def generate_fixture(root, size, fmt):
+    """生成一套测试数据
+
+    目录结构:
+        root/cfg/hero.{fmt}           配置表：人才ID、名字(t_*)、技能-初始资质([技能id, ...])、潜能技能、描述(t_*)
+                                      （.xls 最多 XLS_SHEET_ROWS 行，见结果中的 rows）
+        root/cfg/heroSkill.{fmt}      技能表：技能id、名称(t_*)
+        root/cfg/effect.{fmt}         效果表：表头为英文字段名（t_name），类型列为 effect_type 这类含 t_ 的单词，
+                                      引用完整性检查不应把它们算作t_*键
+        root/cfg/lang_client/*.{fmt}  语言表：ID / 英文 / 中文，共 size 行
+
+    Returns:
+        dict: 测试数据的描述（各表行数、可用于查找的ID）
+    """
+    rng = random.Random(SEED + size)
+    cfg_folder = Path(root) / "cfg"
+    lang_folder = cfg_folder / "lang_client"
+    lang_folder.mkdir(parents=True, exist_ok=True)
+
+    hero_rows = max(size // 10, 100)
+    skill_rows = max(size // 20, 50)
+    if fmt == 'xls':
+        # 导出和关联查找只读取一个工作表，.xls 的配置表、技能表不拆分，超过单个工作表的行数时截断
+        hero_rows = min(hero_rows, XLS_SHEET_ROWS)
+        skill_rows = min(skill_rows, XLS_SHEET_ROWS)
+    hero_ids = [500000 + i for i in range(hero_rows)]
+    skill_ids = [1000 + i for i in range(skill_rows)]
+
+    def text():
+        return ''.join(rng.choice(WORDS) for _ in range(rng.randint(1, 4)))
+
+    # 技能表
+    skill_sheet = [['技能id', '名称']] + [[skill_id, f"t_heroSkillnew_name{skill_id}"] for skill_id in skill_ids]
+    write_workbook(cfg_folder / f"heroSkill.{fmt}", [('heroskill', skill_sheet)])
+
+    # 配置表
+    hero_sheet = [['人才ID', '名字', '技能-初始资质', '潜能技能', '描述']]
+    for hero_id in hero_ids:
+        skills = rng.sample(skill_ids, rng.randint(1, 4))
+        hero_sheet.append([
+            hero_id,
+            f"t_heronew_name{hero_id}",
+            f"[{', '.join(str(s) for s in skills)}]",
+            str(rng.choice(skill_ids)),
+            f"t_herodesc_{hero_id}",
+        ])
+    write_workbook(cfg_folder / f"hero.{fmt}", [('hero', hero_sheet)])
+
+    # 效果表：名字引用人才名字的t_*键
+    effect_sheet = [['id', 't_name', 'type']] + [
+        [i + 1, f"t_heronew_name{hero_id}", rng.choice(['effect_type', 'buff_type'])]
+        for i, hero_id in enumerate(hero_ids[:100])]
+    write_workbook(cfg_folder / f"effect.{fmt}", [('effect', effect_sheet)])
+
+    # 语言表：先放配置表引用的ID，其余用填充条目补足 size 行，分成两个文件
+    lang_ids = ([f"t_heronew_name{i}" for i in hero_ids] + [f"t_herodesc_{i}" for i in hero_ids]
+                + [f"t_heroSkillnew_name{i}" for i in skill_ids])
+    lang_ids += [f"t_bench_{i}" for i in range(max(size - len(lang_ids), 0))]
+    rng.shuffle(lang_ids)
+    rows = [[lang_id, '', text()] for lang_id in lang_ids[:size]]
+    half = len(rows) // 2
+    write_workbook(lang_folder / f"tableLang.{fmt}", [('functionLang', [['ID', '英文', '中文']] + rows[:half])])
+    write_workbook(lang_folder / f"clientLang.{fmt}", [('clientLang', [['ID', '英文', '中文']] + rows[half:])])
+
+    return {
+        'cfg_folder': str(cfg_folder),
+        'lang_folder': str(lang_folder),
+        'hero_rows': hero_rows,
+        'skill_rows': skill_rows,
+        'lang_rows': min(size, len(lang_ids)),
+        'lookup_ids': rng.sample(lang_ids[:size], min(1000, size)) + [f"t_missing_{i}" for i in range(100)],
+        'skill_ids': [str(s) for s in skill_ids],
+    }
+
+
+def clear_caches():
+    """清空进程内缓存，用于测量冷启动"""
+    with go._lookup_tables_lock:
+        go._lookup_tables.clear()
+    with go._language_indexes_lock:
+        go._language_indexes.clear()
+    with go._workbook_catalogs_lock:
+        go._workbook_catalogs.clear()
+    go.WORKBOOK_POOL._books.clear()
+
+
+def measure(func, repeat, setup=None):
+    """重复运行 func，返回每次的耗时（毫秒）；第1次运行前清空缓存
+
+    Args:
+        func: 被测函数，返回值作为附加信息（取最后一次）
+        setup: 每次运行前调用（不计时）
+    """
+    runs = []
+    extra = None
+    with open(os.devnull, 'w', encoding='utf-8') as devnull:
+        for attempt in range(repeat):
+            if attempt == 0:
+                clear_caches()
+            if setup:
+                with redirect_stdout(devnull):
+                    setup()
+            start = time.perf_counter()
+            with redirect_stdout(devnull):
+                extra = func()
+            runs.append(round((time.perf_counter() - start) * 1000, 3))
+    return runs, extra
+
+
+def edit_csv(csv_path, ratio=0.01):
+    """修改导出CSV中约 ratio 比例的行（在技能数组末尾追加一个技能），模拟策划编辑"""
+    df = pd.read_csv(csv_path, encoding='utf-8-sig', dtype=str, keep_default_na=False)
+    step = max(int(1 / ratio), 1)
+    column = '技能-初始资质'
+    for idx in range(0, len(df), step):
+        value = df.at[idx, column]
+        if value.endswith(']'):
+            df.at[idx, column] = value[:-1] + ', 9999]'
+    df.to_csv(csv_path, index=False, encoding='utf-8-sig', quoting=1)
+    return len(range(0, len(df), step))
+
+
+def run_benchmarks(fixture, fmt, size, repeat, work_dir):
+    """在一套测试数据上运行所有测试项，返回结果列表"""
+    cfg_folder = Path(fixture['cfg_folder'])
+    lang_folder = Path(fixture['lang_folder'])
+    results = []
+
+    def record(name, runs, **extra):
+        results.append({
+            'benchmark': name,
+            'format': fmt,
+            'size': size,
+            'runs_ms': runs,
+            'cold_ms': runs[0],
+            'median_ms': round(statistics.median(runs), 3),
+            'min_ms': min(runs),
+            **extra,
+        })
+        print(f"  {name:<40} 冷启动 {runs[0]:>10.1f} ms  中位数 {statistics.median(runs):>10.1f} ms")
+
+    # 工具读取的是模块级配置，测试期间指向测试数据
+    go.TARGET_FOLDER = str(lang_folder)
+    config.TARGET_FOLDER = str(cfg_folder)
+    config.PRE_PROCESSING_CONFIG = BENCH_PRE_PROCESSING_CONFIG
+
+    converter = ExcelToCSVConverter(cfg_folder, config.OUTPUT_FOLDER, work_dir=work_dir)
+    replacer = ExcelTextReplacer({})
+
+    # 1. 导出
+    runs, success = measure(lambda: converter.convert('hero[hero]'), repeat)
+    record('convert', runs, rows=fixture['hero_rows'], success=success)
+
+    # 1b. 新进程中再次导出：进程内缓存都已清空，工作簿没有变化，读取保存的影子缓存、工作簿目录和语言索引
+    runs, success = measure(lambda: converter.convert('hero[hero]'), repeat, setup=clear_caches)
+    record('convert_new_process', runs, rows=fixture['hero_rows'], success=success)
+
+    # 2. 按ID查找中文（第1次查找包含建立语言索引）
+    lookup_ids = fixture['lookup_ids']
+    runs, found = measure(
+        lambda: sum(1 for t_id in lookup_ids if replacer.get_chinese_text_by_id(t_id, str(lang_folder))), repeat)
+    record('get_chinese_text_by_id', runs, lookups=len(lookup_ids), found=found)
+
+    # 3. 关联字段查找
+    skill_path = str(cfg_folder / f"heroSkill.{fmt}")
+    skill_ids = fixture['skill_ids']
+    runs, found = measure(
+        lambda: len(replacer.lookup_field_values(skill_path, 'heroskill', '技能id', '名称', skill_ids)), repeat)
+    record('lookup_field_values', runs, lookups=len(skill_ids), found=found)
+
+    # 4. 与基线比对
+    csv_path = converter.output_folder / 'hero[hero].csv'
+    edited = edit_csv(csv_path)
+    runs, changes = measure(lambda: len(converter.get_enhanced_changes_with_baseline(csv_path)), repeat)
+    record('get_enhanced_changes_with_baseline', runs, edited_rows=edited, changes=changes)
+
+    # 5. 单元格写回（在配置表副本上执行，.xls 每次需要重写整个文件）
+    write_path = cfg_folder / f"hero_write.{fmt}"
+    cells = 10
+    cell_changes = [{'old_item': '', 'new_item': '9999', 'arr_pos': 0, 'arr_type': '[]'}]
+    runs, updated = measure(
+        lambda: sum(1 for row in range(2, 2 + cells)
+                    if replacer.update_cell_with_multiple_changes(str(write_path), 'hero', row, '技能-初始资质',
+                                                                  cell_changes)),
+        repeat, setup=lambda: shutil.copyfile(cfg_folder / f"hero.{fmt}", write_path))
+    record('update_cell_with_multiple_changes', runs, cells=cells, updated=updated)
+
+    # 6. go.py 批量替换（在语言文件夹副本上执行）
+    replace_folder = cfg_folder / "lang_replace"
+
+    def reset_replace_folder():
+        shutil.rmtree(replace_folder, ignore_errors=True)
+        shutil.copytree(lang_folder, replace_folder)
+
+    def replace_all():
+        replace_replacer = ExcelTextReplacer(BENCH_REPLACEMENT_CONFIG)
+        for file_path in replace_replacer.find_excel_files(replace_folder):
+            replace_replacer.process_excel_file(file_path)
+        return replace_replacer.total_replacements
+
+    runs, replacements = measure(replace_all, repeat, setup=reset_replace_folder)
+    record('go_replace', runs, rows=fixture['lang_rows'], replacements=replacements)
+
+    # 7. go.py 搜索（精确和前缀）
+    for name, search_text in (('go_search_exact', lookup_ids[0]), ('go_search_prefix', 't_heronew_name5000*')):
+        def search():
+            search_replacer = ExcelTextReplacer({})
+            search_replacer.search_in_excel_files(search_text, str(lang_folder))
+            return search_replacer.search_count
+        runs, matches = measure(search, repeat)
+        record(name, runs, rows=fixture['lang_rows'], matches=matches)
+
+    # 8. 语言索引前缀搜索（常驻进程中的搜索方式，第1次包含建立有序键）
+    index = get_language_index(lang_folder)
+    runs, matches = measure(lambda: len(index.search('t_heronew_name5000*')), repeat)
+    record('language_index_prefix_search', runs, rows=fixture['lang_rows'], matches=matches)
+
+    # 9. 各只读引擎读取工作簿：逐行扫描语言文件和配置表，pandas读取配置表（python-calamine 未安装时只测默认引擎）
+    workbook_paths = replacer.find_excel_files(lang_folder) + [cfg_folder / f"hero.{fmt}", skill_path]
+    hero_path = cfg_folder / f"hero.{fmt}"
+    engines = ['default'] + (['calamine'] if importlib.util.find_spec('python_calamine') else [])
+    reader_engine = go.READER_ENGINE
+    try:
+        for engine in engines:
+            go.READER_ENGINE = engine
+
+            def scan():
+                rows = 0
+                for path in workbook_paths:
+                    with go.WorkbookReader(path) as reader:
+                        for sheet_name in reader.sheet_names:
+                            rows += sum(1 for _ in reader.rows(sheet_name))
+                return rows
+            runs, rows = measure(scan, repeat)
+            record(f'read_workbooks[{engine}]', runs, files=len(workbook_paths), rows=rows)
+
+            runs, rows = measure(lambda: len(config.read_excel_frame(
+                hero_path, 'hero', engine='xlrd' if fmt == 'xls' else 'openpyxl')), repeat)
+            record(f'read_excel_frame[{engine}]', runs, rows=rows)
+    finally:
+        go.READER_ENGINE = reader_engine
+
+    # 10. 各表格引擎导出和比对（导出的CSV应与 pandas 引擎逐字节相同）
+    pandas_csv = None
+    try:
+        for engine in config.FRAME_ENGINES:
+            converter.frame_engine = engine
+            runs, success = measure(lambda: converter.convert('hero[hero]'), repeat)
+            csv_bytes = csv_path.read_bytes()
+            pandas_csv = pandas_csv or csv_bytes
+            record(f'convert[{engine}]', runs, rows=fixture['hero_rows'], success=success,
+                   same_csv=csv_bytes == pandas_csv)
+
+            edited = edit_csv(csv_path)
+            runs, changes = measure(lambda: len(converter.get_enhanced_changes_with_baseline(csv_path)), repeat)
+            record(f'get_enhanced_changes_with_baseline[{engine}]', runs, edited_rows=edited, changes=changes)
+    finally:
+        converter.frame_engine = config.FRAME_ENGINE
+
+    # 11. 引用完整性检查（第1次包含建立引用索引）；测试数据的引用都完整，缺失或重复不为0说明检查有误报
+    runs, counts = measure(lambda: converter.validate_references(str(lang_folder)), repeat)
+    record('validate_references', runs, missing=counts['missing'], duplicates=counts['duplicates'],
+           errors=counts['errors'], clean=not (counts['missing'] or counts['duplicates'] or counts['errors']))
+    if counts['missing'] or counts['duplicates'] or counts['errors']:
+        print(f"  ⚠️ 测试数据的引用完整性检查不通过: 缺失 {counts['missing']}，重复 {counts['duplicates']}，"
+              f"配置错误 {counts['errors']}")
+
+    return results
+
+
+def git_commit():
+    """当前代码的git版本（不在git仓库中时返回None）"""
+    try:
+        output = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=Path(__file__).parent,
+                                capture_output=True, text=True, timeout=5)
+        return output.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run(sizes, formats, repeat, output=None, keep=None):
+    """生成测试数据、运行测试并保存结果"""
+    go.configure_progress(quiet=True)
+    report = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'git_commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'sizes': sizes,
+        'formats': formats,
+        'repeat': repeat,
+        'results': [],
+    }
+
+    base_dir = Path(keep) if keep else Path(tempfile.mkdtemp(prefix='qyn_bench_'))
+    # 索引和缓存文件也放在测试文件夹中，测试结束后一起删除
+    go.CACHE_FOLDER = str(base_dir / "cache")
+    try:
+        for size in sizes:
+            for fmt in formats:
+                root = base_dir / f"{fmt}_{size}"
+                shutil.rmtree(root, ignore_errors=True)
+                print(f"生成测试数据: {fmt} 语言表 {size} 行...")
+                start = time.perf_counter()
+                fixture = generate_fixture(root, size, fmt)
+                print(f"  完成 ({time.perf_counter() - start:.1f} 秒)")
+
+                work_dir = root / "work"
+                work_dir.mkdir()
+                report['results'].extend(run_benchmarks(fixture, fmt, size, repeat, work_dir))
+                print()
+    finally:
+        if not keep:
+            shutil.rmtree(base_dir, ignore_errors=True)
+
+    output_path = Path(output) if output else Path(RESULT_FOLDER) / f"bench_{datetime.now():%Y%m%d_%H%M%S}.json"
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"结果已保存: {output_path}")
+    return output_path
+
+
+def compare(base_path, new_path):
+    """对比两次测试结果（按中位数）"""
+    with open(base_path, 'r', encoding='utf-8') as f:
+        base = json.load(f)
+    with open(new_path, 'r', encoding='utf-8') as f:
+        new = json.load(f)
+
+    base_results = {(r['benchmark'], r['format'], r['size']): r for r in base['results']}
+    print(f"基准: {base_path} ({base.get('git_commit')})")
+    print(f"对比: {new_path} ({new.get('git_commit')})")
+    print("="*90)
+    print(f"{'测试项':<40}{'格式':<6}{'规模':>9}{'基准ms':>12}{'对比ms':>12}{'变化':>10}")
+    for result in new['results']:
+        key = (result['benchmark'], result['format'], result['size'])
+        old = base_results.get(key)
+        if old is None:
+            print(f"{key[0]:<40}{key[1]:<6}{key[2]:>9}{'-':>12}{result['median_ms']:>12.1f}{'新增':>10}")
+            continue
+        ratio = result['median_ms'] / old['median_ms'] if old['median_ms'] else float('inf')
+        print(f"{key[0]:<40}{key[1]:<6}{key[2]:>9}{old['median_ms']:>12.1f}{result['median_ms']:>12.1f}"
+              f"{(ratio - 1) * 100:>+9.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="QYN配置工具性能基准测试")
+    subparsers = parser.add_subparsers(dest='command')
+
+    run_parser = subparsers.add_parser('run', help="运行基准测试（默认）")
+    run_parser.add_argument('--sizes', default=','.join(str(s) for s in DEFAULT_SIZES),
+                            help="语言表行数，逗号分隔，如 10000,100000,1000000")
+    run_parser.add_argument('--formats', default=','.join(DEFAULT_FORMATS), help="xls,xlsx")
+    run_parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help="每项测试重复次数")
+    run_parser.add_argument('--output', help="结果文件路径")
+    run_parser.add_argument('--keep', help="保留生成的测试数据到该文件夹")
+
+    compare_parser = subparsers.add_parser('compare', help="对比两次测试结果")
+    compare_parser.add_argument('base')
+    compare_parser.add_argument('new')
+
+    args = parser.parse_args(sys.argv[1:] if len(sys.argv) > 1 and sys.argv[1] in ('run', 'compare', '-h', '--help')
+                             else ['run'] + sys.argv[1:])
+
+    if args.command == 'compare':
+        compare(args.base, args.new)
+        return
+
+    sizes = [int(s) for s in args.sizes.split(',') if s.strip()]
+    formats = [f.strip().lstrip('.') for f in args.formats.split(',') if f.strip()]
+    for fmt in formats:
+        if fmt not in ('xls', 'xlsx'):
+            print(f"不支持的格式: {fmt}")
+            return
+    run(sizes, formats, max(args.repeat, 1), args.output, args.keep)
+
+
+if __name__ == "__main__":
+    main()
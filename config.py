@@ -6,20 +6,45 @@ Excel工作表导出为CSV工具
 使用方法: py config.py hero[hero]
 """
 
+import time
+_STARTED_AT = time.perf_counter()
+
+import io
+import os
 import sys
+import socket
+import socketserver
+from contextlib import redirect_stdout
 from pathlib import Path
-import pandas as pd
-import openpyxl
-import xlrd
-import xlwt
 import re
+import json
 import multiprocessing
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import threading
 
 import shutil
-from wcwidth import wcswidth
-import difflib
+import filecmp
+from datetime import datetime
+
+import go
+from go import (
+    ExcelTextReplacer, LazyModule, workbook_lock, daemon_request, get_language_index, get_workbook_catalog,
+    DaemonRequestError, daemon_response_result, print_daemon_error,
+    ShadowCache, WorkbookReader, reader_engine, cache_folder, load_cache_file, save_cache_file,
+    file_signature, print_timing_report, DAEMON_ADDRESS,
+    start_report, finish_report, pipeline_stage, count_in_stage,
+    IO_STATS, open_xls, load_xlsx, save_workbook, io_delta, print_io_report,
+    ProgressReporter, configure_progress, current_memory, MB,
+)
+
+# 第三方依赖按需导入：帮助信息、常驻进程客户端等路径不加载它们
+pd = LazyModule('pandas')
+openpyxl = LazyModule('openpyxl')
+xlrd = LazyModule('xlrd')
+xlwt = LazyModule('xlwt')
+wcwidth = LazyModule('wcwidth')
+difflib = LazyModule('difflib')
+np = LazyModule('numpy')
 
 # ==================== 配置区域 ====================
 # 目标文件夹路径
@@ -31,9 +56,33 @@ OUTPUT_FOLDER = "xls"
 # 基线备份文件夹名称（在当前工作目录下创建）
 BASE_FOLDER = "xls_base"
 
+# 运行报告文件夹名称（在当前工作目录下创建）：导出和写回每次运行保存一份分阶段耗时统计，设为None则不保存
+REPORT_FOLDER = "xls_report"
+
+# 内存预算（MB）：导出和写回时进程内存超过该值后改为分块处理，设为None则不限制
+# 也可在命令行用 --memory-budget 指定
+MEMORY_BUDGET_MB = None
+CHUNK_ROWS = 20000  # 分块处理时每块的行数
+
+# 表格引擎：预预处理、预处理和与基线比对访问DataFrame的方式（见 FRAME_ENGINES），输出的CSV和变更记录相同
+# 'pandas' 逐个单元格读写；'columnar' 按列整体处理（向量化字符串操作、按掩码找出变更的单元格），大表明显更快
+# 也可在命令行用 --frame-engine 指定
+FRAME_ENGINE = 'pandas'
+
+# 批量修改ID（py config.py renumber）前备份被修改工作簿的文件夹（在当前工作目录下创建，每次运行一个子文件夹）
+RENUMBER_BACKUP_FOLDER = "xls_renumber_backup"
+
+# 引用索引保存文件（在目标文件夹对应的缓存文件夹下，见 go.py 的 CACHE_FOLDER）：
+# 记录每个ID和t_*键被哪些单元格引用（py config.py refs），各工作目录和常驻进程共用，设为None则不保存
+REFERENCE_INDEX_FILE = "reference_index.pickle"
+
 # 支持的文件扩展名
 SUPPORTED_EXTENSIONS = ['.xlsx', '.xls']
 
+# 监视模式（python config.py --watch）
+WATCH_INTERVAL = 0.2   # 轮询间隔（秒）
+WATCH_DEBOUNCE = 0.4   # 文件停止变化多久后才处理（秒），避免编辑器分多次写入时重复处理
+
 # ==================== 预预处理配置区域 ====================
 # 自定义字段关联配置
 # 格式: "源表[源工作表], 源列名": "目标表[目标工作表], 匹配列名, 返回列名"
@@ -50,19 +99,261 @@ PRE_PROCESSING_CONFIG = {
 }
 # ================================================
 
+
+def read_csv(csv_path, **kwargs):
+    """读取CSV为DataFrame（计入读写统计）"""
+    df = pd.read_csv(csv_path, **kwargs)
+    IO_STATS.record_open(csv_path)
+    IO_STATS.record_cells(csv_path, read=int(df.size))
+    return df
+
+
+def frame_as_text(df, in_place=False):
+    """DataFrame转为字符串表，用于与基线逐格比较
+
+    in_place 为真时逐列原地转换，不再复制整表（超出内存预算时使用），结果相同。
+    """
+    if not in_place:
+        return df.astype(str).fillna('')
+    for col in df.columns:
+        df[col] = df[col].astype(str).fillna('')
+    return df
+
+
+class PandasFrameEngine:
+    """逐个单元格读写DataFrame的表格引擎
+
+    预预处理、预处理和与基线比对只通过表格引擎访问DataFrame，各引擎的方法和结果相同：
+    - t_strings(df): 所有文本单元格中的t_*字符串
+    - ids(series): 一列文本单元格中的所有ID（与 parse_ids_from_value 的拆分方式相同）
+    - map_text(df, column, func): 把一列的每个文本单元格改为 func(值)，func 返回None的不修改，返回修改的单元格数
+    - changed_cells(df_old, df_new, columns, rows): 前 rows 行中值不同的单元格，按行、列的顺序
+    - row_cells(df, start, stop, columns): 第 start 到 stop 行的所有单元格，按行、列的顺序
+    行序号从0开始；文本单元格指值为字符串（不为空）的单元格。
+    """
+
+    def __init__(self, converter):
+        self.converter = converter
+
+    def t_strings(self, df):
+        t_strings = set()
+        for col in df.columns:
+            for cell_value in df[col]:
+                if pd.notna(cell_value) and isinstance(cell_value, str):
+                    t_strings.update(self.converter.find_t_strings(cell_value))
+        return t_strings
+
+    def ids(self, series):
+        ids = set()
+        for cell_value in series:
+            ids.update(self.converter.parse_ids_from_value(cell_value))
+        return ids
+
+    def map_text(self, df, column, func):
+        written = 0
+        for idx, cell_value in df[column].items():
+            if pd.notna(cell_value) and isinstance(cell_value, str):
+                new_value = func(cell_value)
+                if new_value is not None:
+                    df.loc[idx, column] = new_value
+                    written += 1
+        return written
+
+    def changed_cells(self, df_old, df_new, columns, rows):
+        changes = []
+        for i in range(rows):
+            for col in columns:
+                v_old = df_old.iat[i, df_old.columns.get_loc(col)]
+                v_new = df_new.iat[i, df_new.columns.get_loc(col)]
+                if v_old != v_new:
+                    changes.append((i, col, v_old, v_new))
+        return changes
+
+    def row_cells(self, df, start, stop, columns):
+        for i in range(start, stop):
+            for col in columns:
+                yield i, col, df.iat[i, df.columns.get_loc(col)]
+
+
+class ColumnarFrameEngine:
+    """按列整体处理DataFrame的表格引擎，方法和结果与 PandasFrameEngine 相同
+
+    t_*字符串和ID用向量化的字符串操作（.str）按列拆分；改写单元格时每列只对不同的文本各计算一次，
+    再按映射整列写回；与基线比对时按列比较得到变更掩码，只取出值不同的单元格。
+    """
+
+    # 文本单元格中的t_*字符串：find_t_strings 按逗号拆分、{}内和独立出现三种方式找到的正好是该正则的所有匹配
+    T_STRING_PATTERN = r't_[a-zA-Z0-9_]+'
+
+    def __init__(self, converter):
+        self.converter = converter
+
+    @staticmethod
+    def _text_positions(series):
+        """文本单元格的行序号"""
+        if isinstance(series.dtype, pd.StringDtype):
+            return np.flatnonzero(series.notna().to_numpy())
+        if series.dtype.kind in 'biufcmM':
+            # 数字、布尔、日期类型的列没有文本单元格
+            return np.array([], dtype=np.intp)
+        return np.flatnonzero([isinstance(value, str) for value in series.to_numpy(dtype=object)])
+
+    def _texts(self, series):
+        """一列中不重复的文本（object 类型，便于 .str 处理）"""
+        return pd.Series(series.iloc[self._text_positions(series)].unique(), dtype=object)
+
+    def t_strings(self, df):
+        t_strings = set()
+        for col in df.columns:
+            texts = self._texts(df[col])
+            if len(texts):
+                t_strings.update(texts.str.findall(self.T_STRING_PATTERN).explode().dropna())
+        return t_strings
+
+    def ids(self, series):
+        texts = self._texts(series)
+        if not len(texts):
+            return set()
+        texts = texts.str.strip()
+        # [1001, 1002] 去掉方括号后与 1001, 1002 一样按逗号拆分
+        is_array = texts.str.startswith('[') & texts.str.endswith(']')
+        texts = texts.where(~is_array, texts.str[1:-1])
+        parts = texts.str.split(',').explode().str.strip()
+        return set(parts[parts != ''].dropna())
+
+    def map_text(self, df, column, func):
+        series = df[column]
+        positions = self._text_positions(series)
+        if not len(positions):
+            return 0
+        texts = series.iloc[positions]
+        mapping = {}
+        for text in texts.unique():
+            new_value = func(text)
+            if new_value is not None:
+                mapping[text] = new_value
+        if not mapping:
+            return 0
+        # 不在映射中（func 返回None）的单元格映射结果为空，不修改
+        new_values = texts.map(mapping).to_numpy(dtype=object)
+        written = pd.notna(new_values)
+        result = series.copy()
+        result.iloc[positions[written]] = new_values[written]
+        df[column] = result
+        return int(written.sum())
+
+    def changed_cells(self, df_old, df_new, columns, rows):
+        found = []
+        for col_idx, col in enumerate(columns):
+            old_values = df_old[col].to_numpy(dtype=object)[:rows]
+            new_values = df_new[col].to_numpy(dtype=object)[:rows]
+            for i in np.flatnonzero(old_values != new_values):
+                found.append((int(i), col_idx, old_values[i], new_values[i]))
+        found.sort(key=lambda change: (change[0], change[1]))
+        return [(i, columns[col_idx], v_old, v_new) for i, col_idx, v_old, v_new in found]
+
+    def row_cells(self, df, start, stop, columns):
+        arrays = [df[col].to_numpy(dtype=object)[start:stop] for col in columns]
+        for offset in range(max(stop - start, 0)):
+            for col, values in zip(columns, arrays):
+                yield start + offset, col, values[offset]
+
+
+# 可选的表格引擎（FRAME_ENGINE / --frame-engine）
+FRAME_ENGINES = {
+    'pandas': PandasFrameEngine,
+    'columnar': ColumnarFrameEngine,
+}
+
+
+def write_csv(dataframe, csv_path, **kwargs):
+    """DataFrame保存为CSV（计入读写统计）"""
+    dataframe.to_csv(csv_path, **kwargs)
+    IO_STATS.record_save(csv_path)
+    IO_STATS.record_cells(csv_path, written=int(dataframe.size))
+
+
+def pandas_supports_calamine():
+    """pandas 2.2 起 read_excel 支持 engine='calamine'"""
+    version = tuple(int(part) for part in re.findall(r'\d+', pd.__version__)[:2])
+    return version >= (2, 2)
+
+
+def read_excel_frame(file_path, sheet_name, engine):
+    """用pandas读取工作表为DataFrame（计入读写统计）
+
+    只读引擎为 python-calamine 且 pandas 支持时由它代替 engine 读取
+    """
+    if reader_engine() == 'calamine' and pandas_supports_calamine():
+        engine = 'calamine'
+    df = pd.read_excel(file_path, sheet_name=sheet_name, engine=engine)
+    IO_STATS.record_open(file_path)
+    IO_STATS.record_cells(file_path, read=int(df.size))
+    return df
+
+
+def copy_file(source_path, target_path):
+    """复制CSV到基线文件夹（计入读写统计）"""
+    shutil.copy2(source_path, target_path)
+    IO_STATS.record_open(source_path)
+    IO_STATS.record_save(target_path)
+
+
 class ExcelToCSVConverter:
-    def __init__(self, target_folder, output_folder):
+    def __init__(self, target_folder, output_folder, work_dir=None):
         self.target_folder = Path(target_folder)
         # 输出文件夹在当前工作目录下，而不是目标文件夹下
-        self.output_folder = Path.cwd() / output_folder
+        # （常驻进程为每个客户端的工作目录单独创建转换器）
+        work_dir = Path(work_dir) if work_dir else Path.cwd()
+        self.output_folder = work_dir / output_folder
 
         # 确保输出文件夹存在
         self.output_folder.mkdir(exist_ok=True)
 
         # 基线备份文件夹
-        self.base_folder = Path.cwd() / BASE_FOLDER
+        self.base_folder = work_dir / BASE_FOLDER
         self.base_folder.mkdir(exist_ok=True)
 
+        # 运行报告文件夹（保存时才创建）
+        self.report_folder = work_dir / REPORT_FOLDER if REPORT_FOLDER else None
+
+        # 内存预算（MB），超出后改为分块处理
+        self.memory_budget = MEMORY_BUDGET_MB
+
+        # 表格引擎（FRAME_ENGINES 中的名称）
+        self.frame_engine = FRAME_ENGINE
+
+        # 批量修改ID前的工作簿备份文件夹（写入时才创建）
+        self.renumber_backup_folder = work_dir / RENUMBER_BACKUP_FOLDER
+
+        # 引用索引（第一次查询时建立，保存在目标文件夹对应的缓存文件夹下）
+        self._reference_index = None
+
+    def get_reference_index(self):
+        """目标文件夹的引用索引（本转换器内共享，常驻进程中一直在内存里）"""
+        if self._reference_index is None:
+            self._reference_index = ReferenceIndex(self)
+        return self._reference_index
+
+    def get_frame_engine(self):
+        """预预处理、预处理和基线比对使用的表格引擎"""
+        engine = FRAME_ENGINES.get(self.frame_engine)
+        if engine is None:
+            print(f"未知的表格引擎 '{self.frame_engine}'，使用 pandas")
+            engine = PandasFrameEngine
+        return engine(self)
+
+    def over_memory_budget(self):
+        """当前内存占用是否超出预算"""
+        if not self.memory_budget:
+            return False
+        used = current_memory()
+        if used is None or used <= self.memory_budget * MB:
+            return False
+        print(f"⚠️ 内存占用 {used / MB:.0f}MB 超出预算 {self.memory_budget}MB，改为分块处理")
+        count_in_stage('over_budget')
+        return True
+
 
     def parse_command(self, command):
         """解析命令行参数，提取文件名和工作表名"""
@@ -102,44 +393,44 @@ class ExcelToCSVConverter:
         file_extension = file_path.suffix.lower()
 
         try:
-            if file_extension == '.xlsx':
-                return self.read_xlsx_sheet(file_path, sheet_name)
-            elif file_extension == '.xls':
-                return self.read_xls_sheet(file_path, sheet_name)
-            else:
-                raise ValueError(f"不支持的文件格式: {file_extension}")
+            with workbook_lock(file_path, shared=True):
+                if file_extension == '.xlsx':
+                    return self.read_xlsx_sheet(file_path, sheet_name)
+                elif file_extension == '.xls':
+                    return self.read_xls_sheet(file_path, sheet_name)
+                else:
+                    raise ValueError(f"不支持的文件格式: {file_extension}")
         except Exception as e:
             raise Exception(f"读取Excel文件失败: {str(e)}")
 
+    def check_sheet_exists(self, file_path, sheet_name):
+        """工作表不存在时抛出ValueError，列出可用的工作表"""
+        sheet_names = get_workbook_catalog(file_path.parent).sheet_names(file_path)
+        if sheet_name not in sheet_names:
+            available_sheets = ', '.join(sheet_names)
+            raise ValueError(f"工作表 '{sheet_name}' 不存在。可用工作表: {available_sheets}")
+
     def read_xlsx_sheet(self, file_path, sheet_name):
         """读取.xlsx文件的指定工作表"""
         try:
-            # 首先检查工作表是否存在
-            workbook = openpyxl.load_workbook(file_path, read_only=True)
-            if sheet_name not in workbook.sheetnames:
-                available_sheets = ', '.join(workbook.sheetnames)
-                raise ValueError(f"工作表 '{sheet_name}' 不存在。可用工作表: {available_sheets}")
-            workbook.close()
+            # 首先检查工作表是否存在（查工作簿目录，不必打开工作簿）
+            self.check_sheet_exists(file_path, sheet_name)
 
-            # 使用pandas读取指定工作表
-            df = pd.read_excel(file_path, sheet_name=sheet_name, engine='openpyxl')
-            return df
+            # 使用pandas读取指定工作表（工作簿没有变化时直接读影子缓存）
+            return ShadowCache(file_path).get(
+                'frame', sheet_name, lambda: read_excel_frame(file_path, sheet_name, engine='openpyxl'))
         except Exception as e:
             raise Exception(f"读取.xlsx文件失败: {str(e)}")
 
     def read_xls_sheet(self, file_path, sheet_name):
         """读取.xls文件的指定工作表"""
         try:
-            # 首先检查工作表是否存在
-            workbook = xlrd.open_workbook(file_path)
-            sheet_names = workbook.sheet_names()
-            if sheet_name not in sheet_names:
-                available_sheets = ', '.join(sheet_names)
-                raise ValueError(f"工作表 '{sheet_name}' 不存在。可用工作表: {available_sheets}")
-
-            # 使用pandas读取指定工作表
-            df = pd.read_excel(file_path, sheet_name=sheet_name, engine='xlrd')
-            return df
+            # 首先检查工作表是否存在（查工作簿目录，不必打开工作簿）
+            self.check_sheet_exists(file_path, sheet_name)
+
+            # 使用pandas读取指定工作表（工作簿没有变化时直接读影子缓存）
+            return ShadowCache(file_path).get(
+                'frame', sheet_name, lambda: read_excel_frame(file_path, sheet_name, engine='xlrd'))
         except Exception as e:
             raise Exception(f"读取.xls文件失败: {str(e)}")
 
@@ -175,19 +466,20 @@ class ExcelToCSVConverter:
 
         return list(set(t_strings))  # 去重
 
+    def find_t_keys_in_part(self, part):
+        """数组或逗号分隔的一项（parse_ids_from_value 的结果）中的t_*键
+
+        整项是t_*键，或 1001{t_xxx} 中{}内的键；不像 find_t_strings 那样找出 effect_type 这类单词中间的 t_type
+        """
+        if re.match(r'^t_[a-zA-Z0-9_]+$', part):
+            return [part]
+        return re.findall(r'\{(t_[a-zA-Z0-9_]+)\}', part)
+
     def search_chinese_text(self, t_string):
         """直接调用go.py的方法获取t_string对应的中文文本"""
         try:
-            # 导入go.py模块
-            import sys
-            sys.path.append(str(Path.cwd()))
-            from go import ExcelTextReplacer, TARGET_FOLDER
-
-            # 创建ExcelTextReplacer实例
-            replacer = ExcelTextReplacer({})  # 空的替换配置，因为我们只是用来搜索
-
-            # 直接调用新的方法获取中文文本
-            chinese_text = replacer.get_chinese_text_by_id(t_string, TARGET_FOLDER)
+            # 直接调用go.py的方法获取中文文本（空的替换配置，只用来搜索）
+            chinese_text = ExcelTextReplacer({}).get_chinese_text_by_id(t_string, go.TARGET_FOLDER)
 
             return chinese_text
 
@@ -206,37 +498,29 @@ class ExcelToCSVConverter:
         print(f"使用 {max_workers} 个线程并发搜索...")
 
         results = {}
-        completed_count = 0
-        total_count = len(t_strings)
-        lock = threading.Lock()
-
-        def search_single(t_string):
-            nonlocal completed_count
-            chinese_text = self.search_chinese_text(t_string)
-
-            with lock:
-                completed_count += 1
-                if chinese_text:
-                    print(f"  [{completed_count}/{total_count}] {t_string} -> {chinese_text}")
-                else:
-                    print(f"  [{completed_count}/{total_count}] {t_string} -> 未找到")
 
-            return t_string, chinese_text
+        # 工作线程只做查找，进度由收集结果的线程限频显示
+        with ProgressReporter("查找中文", len(t_strings)) as progress:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                # 提交所有任务
+                future_to_string = {executor.submit(self.search_chinese_text, t_string): t_string
+                                  for t_string in t_strings}
 
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            # 提交所有任务
-            future_to_string = {executor.submit(search_single, t_string): t_string
-                              for t_string in t_strings}
-
-            # 收集结果
-            for future in as_completed(future_to_string):
-                try:
-                    t_string, chinese_text = future.result()
-                    results[t_string] = chinese_text
-                except Exception as e:
+                # 收集结果
+                for future in as_completed(future_to_string):
                     t_string = future_to_string[future]
-                    print(f"搜索 {t_string} 时出错: {str(e)}")
-                    results[t_string] = None
+                    try:
+                        results[t_string] = future.result()
+                        progress.advance()
+                    except Exception as e:
+                        progress.log(f"搜索 {t_string} 时出错: {str(e)}")
+                        results[t_string] = None
+                        progress.advance(failed=True)
+
+        not_found = sorted(t_string for t_string, chinese_text in results.items() if not chinese_text)
+        if not_found:
+            more = f" 等{len(not_found)}个" if len(not_found) > 20 else ""
+            print(f"  未找到（或结果不唯一）: {', '.join(not_found[:20])}{more}")
 
         return results
 
@@ -275,17 +559,9 @@ class ExcelToCSVConverter:
 
         print("正在进行预预处理，处理自定义字段关联...")
 
-        # 导入go.py模块
-        try:
-            import sys
-            sys.path.append(str(Path.cwd()))
-            from go import ExcelTextReplacer
-        except Exception as e:
-            print(f"导入go.py模块失败: {str(e)}")
-            return df
-
         # 创建查找器实例
         replacer = ExcelTextReplacer({})
+        engine = self.get_frame_engine()
         df_processed = df.copy()
 
         # 处理每个配置规则
@@ -305,37 +581,10 @@ class ExcelToCSVConverter:
                     continue
 
                 # 解析目标配置: "heroSkill[heroskill], 技能id, 名称"
-                target_parts = [part.strip() for part in target_config.split(',')]
-                if len(target_parts) != 3:
-                    print(f"目标配置格式错误: {target_config}")
-                    continue
-
-                target_table_sheet = target_parts[0]  # "heroSkill[heroskill]"
-                match_column = target_parts[1]        # "技能id"
-                return_column = target_parts[2]       # "名称"
-
-                # 解析目标表信息
-                if '[' not in target_table_sheet or ']' not in target_table_sheet:
-                    print(f"目标表格式错误: {target_table_sheet}")
+                lookup_target = self.resolve_lookup_target(target_config)
+                if lookup_target is None:
                     continue
-
-                target_file_part, target_sheet_part = target_table_sheet.split('[', 1)
-                target_sheet_name = target_sheet_part.rstrip(']')
-                target_filename = f"{target_file_part.strip()}.xls"
-
-                # 构建目标文件的绝对路径
-                target_file_path = Path(TARGET_FOLDER) / target_filename
-
-                if not target_file_path.exists():
-                    # 尝试其他扩展名
-                    for ext in SUPPORTED_EXTENSIONS:
-                        test_path = Path(TARGET_FOLDER) / f"{target_file_part.strip()}{ext}"
-                        if test_path.exists():
-                            target_file_path = test_path
-                            break
-                    else:
-                        print(f"未找到目标文件: {target_filename}")
-                        continue
+                target_file_path, target_sheet_name, match_column, return_column = lookup_target
 
                 print(f"处理字段关联: {source_column} -> {target_file_path.name}[{target_sheet_name}]")
 
@@ -345,16 +594,14 @@ class ExcelToCSVConverter:
                     continue
 
                 # 收集所有需要查找的ID
-                all_ids = set()
-                for idx, cell_value in df_processed[source_column].items():
-                    ids = self.parse_ids_from_value(cell_value)
-                    all_ids.update(ids)
+                all_ids = engine.ids(df_processed[source_column])
 
                 if not all_ids:
                     print(f"在列 '{source_column}' 中未找到任何ID")
                     continue
 
                 print(f"找到 {len(all_ids)} 个唯一ID，正在查找对应值...")
+                count_in_stage('lookup_ids', len(all_ids))
 
                 # 使用并发优化的查找方法
                 lookup_results = self._lookup_field_values_concurrent(
@@ -368,28 +615,32 @@ class ExcelToCSVConverter:
 
                 found_count = len(lookup_results)
                 print(f"成功找到 {found_count}/{len(all_ids)} 个ID的对应值")
+                count_in_stage('lookup_found', found_count)
 
                 # 替换DataFrame中的内容
-                for idx, cell_value in df_processed[source_column].items():
-                    if pd.notna(cell_value) and isinstance(cell_value, str):
-                        ids = self.parse_ids_from_value(cell_value)
-                        if ids:
-                            # 构建新值，格式: id{对应值}
-                            new_parts = []
-                            for id_val in ids:
-                                if id_val in lookup_results:
-                                    new_parts.append(f"{id_val}{{{lookup_results[id_val]}}}")
-                                else:
-                                    new_parts.append(id_val)  # 保持原值
-
-                            # 根据原格式重新组装
-                            original_value = str(cell_value).strip()
-                            if original_value.startswith('[') and original_value.endswith(']'):
-                                # 保持数组格式
-                                df_processed.loc[idx, source_column] = f"[{', '.join(new_parts)}]"
-                            else:
-                                # 保持逗号分隔格式
-                                df_processed.loc[idx, source_column] = ', '.join(new_parts)
+                def annotate_ids(cell_value):
+                    ids = self.parse_ids_from_value(cell_value)
+                    if not ids:
+                        return None
+                    # 构建新值，格式: id{对应值}
+                    new_parts = []
+                    for id_val in ids:
+                        if id_val in lookup_results:
+                            new_parts.append(f"{id_val}{{{lookup_results[id_val]}}}")
+                        else:
+                            new_parts.append(id_val)  # 保持原值
+
+                    # 根据原格式重新组装
+                    original_value = str(cell_value).strip()
+                    if original_value.startswith('[') and original_value.endswith(']'):
+                        # 保持数组格式
+                        return f"[{', '.join(new_parts)}]"
+                    # 保持逗号分隔格式
+                    return ', '.join(new_parts)
+
+                written = engine.map_text(df_processed, source_column, annotate_ids)
+                if written:
+                    count_in_stage('cells_written', written)
 
                 print(f"完成字段 '{source_column}' 的关联处理")
 
@@ -400,11 +651,51 @@ class ExcelToCSVConverter:
         print("预预处理完成")
         return df_processed
 
+    def resolve_lookup_target(self, target_config):
+        """解析预预处理目标配置
+
+        Args:
+            target_config: 如 "heroSkill[heroskill], 技能id, 名称"
+
+        Returns:
+            tuple: (目标文件路径, 目标工作表, 匹配列, 返回列)；配置错误或文件不存在时返回None
+        """
+        target_parts = [part.strip() for part in target_config.split(',')]
+        if len(target_parts) != 3:
+            print(f"目标配置格式错误: {target_config}")
+            return None
+
+        target_table_sheet = target_parts[0]  # "heroSkill[heroskill]"
+        match_column = target_parts[1]        # "技能id"
+        return_column = target_parts[2]       # "名称"
+
+        # 解析目标表信息
+        if '[' not in target_table_sheet or ']' not in target_table_sheet:
+            print(f"目标表格式错误: {target_table_sheet}")
+            return None
+
+        target_file_part, target_sheet_part = target_table_sheet.split('[', 1)
+        target_sheet_name = target_sheet_part.rstrip(']')
+        target_filename = f"{target_file_part.strip()}.xls"
+
+        # 构建目标文件的绝对路径
+        target_file_path = Path(TARGET_FOLDER) / target_filename
+
+        if not target_file_path.exists():
+            # 尝试其他扩展名
+            for ext in SUPPORTED_EXTENSIONS:
+                test_path = Path(TARGET_FOLDER) / f"{target_file_part.strip()}{ext}"
+                if test_path.exists():
+                    target_file_path = test_path
+                    break
+            else:
+                print(f"未找到目标文件: {target_filename}")
+                return None
+
+        return target_file_path, target_sheet_name, match_column, return_column
+
     def _lookup_field_values_concurrent(self, replacer, file_path, sheet_name, match_column, return_column, search_values):
         """并发优化的字段值查找方法"""
-        from concurrent.futures import ThreadPoolExecutor, as_completed
-        import multiprocessing
-
         if not search_values:
             return {}
 
@@ -424,21 +715,21 @@ class ExcelToCSVConverter:
 
         # 并发执行查找
         all_results = {}
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            # 提交所有批次任务
-            future_to_batch = {executor.submit(lookup_batch, batch): batch for batch in batches}
-
-            # 收集结果
-            completed_count = 0
-            for future in as_completed(future_to_batch):
-                batch = future_to_batch[future]
-                try:
-                    batch_results = future.result()
-                    all_results.update(batch_results)
-                    completed_count += len(batch)
-                    print(f"  已完成 {completed_count}/{len(search_values)} 个ID的查找")
-                except Exception as e:
-                    print(f"  批次查找失败: {str(e)}")
+        with ProgressReporter("查找字段值", len(search_values), unit="个ID") as progress:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                # 提交所有批次任务
+                future_to_batch = {executor.submit(lookup_batch, batch): batch for batch in batches}
+
+                # 收集结果
+                for future in as_completed(future_to_batch):
+                    batch = future_to_batch[future]
+                    try:
+                        batch_results = future.result()
+                        all_results.update(batch_results)
+                        progress.advance(len(batch))
+                    except Exception as e:
+                        progress.log(f"  批次查找失败: {str(e)}")
+                        progress.advance(len(batch), failed=True)
 
         return all_results
 
@@ -447,13 +738,8 @@ class ExcelToCSVConverter:
         print("正在进行预处理，识别并查找t_*字符串...")
 
         # 收集所有需要查找的t_*字符串
-        all_t_strings = set()
-
-        for col in df.columns:
-            for idx, cell_value in df[col].items():
-                if pd.notna(cell_value) and isinstance(cell_value, str):
-                    t_strings = self.find_t_strings(cell_value)
-                    all_t_strings.update(t_strings)
+        engine = self.get_frame_engine()
+        all_t_strings = engine.t_strings(df)
 
         if not all_t_strings:
             print("未找到任何t_*字符串，跳过预处理")
@@ -462,7 +748,10 @@ class ExcelToCSVConverter:
         print(f"找到 {len(all_t_strings)} 个唯一的t_*字符串，正在并发查找对应中文...")
 
         # 并发批量查找中文文本
-        chinese_results = self.search_chinese_text_batch(list(all_t_strings))
+        with pipeline_stage('search_chinese_text_batch') as stage:
+            chinese_results = self.search_chinese_text_batch(list(all_t_strings))
+            stage.update(t_strings=len(all_t_strings),
+                         found=sum(1 for result in chinese_results.values() if result))
 
         # 构建替换映射
         t_string_map = {}
@@ -479,50 +768,76 @@ class ExcelToCSVConverter:
         print("正在替换DataFrame中的内容...")
         df_processed = df.copy()
 
-        for col in df_processed.columns:
-            for idx, cell_value in df_processed[col].items():
-                if pd.notna(cell_value) and isinstance(cell_value, str):
-                    new_value = cell_value
-
-                    # 方法1: 直接替换完整的t_*字符串（按逗号分割）
-                    parts = [part.strip() for part in new_value.split(',')]
-                    new_parts = []
+        def replace_t_in_braces(match):
+            t_string = match.group(1)  # 获取{}内的t_*字符串
+            if t_string in t_string_map:
+                return '{' + t_string_map[t_string] + '}'
+            else:
+                return match.group(0)  # 保持原样
 
-                    for part in parts:
-                        # 检查这个部分是否是完整的t_*字符串
-                        if part in t_string_map:
-                            new_parts.append(t_string_map[part])
-                        else:
-                            new_parts.append(part)
+        def annotate_t_strings(cell_value):
+            # 方法1: 直接替换完整的t_*字符串（按逗号分割）
+            parts = [part.strip() for part in cell_value.split(',')]
+            new_parts = []
 
-                    new_value = ', '.join(new_parts)
+            for part in parts:
+                # 检查这个部分是否是完整的t_*字符串
+                if part in t_string_map:
+                    new_parts.append(t_string_map[part])
+                else:
+                    new_parts.append(part)
 
-                    # 方法2: 替换{}内的t_*字符串
-                    import re
-                    def replace_t_in_braces(match):
-                        t_string = match.group(1)  # 获取{}内的t_*字符串
-                        if t_string in t_string_map:
-                            return '{' + t_string_map[t_string] + '}'
-                        else:
-                            return match.group(0)  # 保持原样
+            new_value = ', '.join(new_parts)
 
-                    # 使用正则表达式替换{}内的t_*字符串
-                    new_value = re.sub(r'\{(t_[a-zA-Z0-9_]+)\}', replace_t_in_braces, new_value)
+            # 方法2: 使用正则表达式替换{}内的t_*字符串
+            return re.sub(r'\{(t_[a-zA-Z0-9_]+)\}', replace_t_in_braces, new_value)
 
-                    df_processed.loc[idx, col] = new_value
+        for col in df_processed.columns:
+            written = engine.map_text(df_processed, col, annotate_t_strings)
+            if written:
+                count_in_stage('cells_written', written)
 
         print(f"预处理完成，共找到 {found_count}/{len(all_t_strings)} 个t_*字符串的中文对应")
         print(f"替换了 {found_count} 个t_*字符串为带中文的格式")
         return df_processed
 
+    def convert_in_chunks(self, df, current_table_sheet, output_filename):
+        """按行分块执行预预处理、预处理，并逐块追加写入CSV
+
+        每块只复制该块的数据，输出与整表处理相同。
+        """
+        output_path = self.output_folder / output_filename
+        chunk_count = max(1, (len(df) + CHUNK_ROWS - 1) // CHUNK_ROWS)
+        for chunk_idx in range(chunk_count):
+            chunk = df.iloc[chunk_idx * CHUNK_ROWS:(chunk_idx + 1) * CHUNK_ROWS]
+            print(f"分块 {chunk_idx + 1}/{chunk_count}: 第 {chunk_idx * CHUNK_ROWS + 1}-"
+                  f"{chunk_idx * CHUNK_ROWS + len(chunk)} 行")
+            with pipeline_stage(f'chunk_{chunk_idx + 1}'):
+                with pipeline_stage('pre_preprocess_dataframe') as stage:
+                    stage.update(rows=len(chunk), cells=int(chunk.size))
+                    chunk = self.pre_preprocess_dataframe(chunk, current_table_sheet)
+                with pipeline_stage('preprocess_dataframe') as stage:
+                    stage.update(rows=len(chunk), cells=int(chunk.size))
+                    chunk = self.preprocess_dataframe(chunk)
+                try:
+                    # 第一块写表头和BOM，之后的块追加（utf-8 编码追加，不重复写BOM）
+                    first = chunk_idx == 0
+                    write_csv(chunk, output_path, mode='w' if first else 'a', header=first, index=False,
+                              encoding='utf-8-sig' if first else 'utf-8', quoting=1, escapechar=None)
+                except Exception as e:
+                    raise Exception(f"保存CSV文件失败: {str(e)}")
+            count_in_stage('chunks')
+            del chunk
+        return output_path
+
     def save_to_csv(self, dataframe, output_filename):
         """将DataFrame保存为CSV文件"""
         output_path = self.output_folder / output_filename
 
         try:
             # 保存为CSV，使用UTF-8编码，禁用引号转义
-            dataframe.to_csv(output_path, index=False, encoding='utf-8-sig',
-                           quoting=1, escapechar=None)  # quoting=1 表示 QUOTE_ALL
+            write_csv(dataframe, output_path, index=False, encoding='utf-8-sig',
+                      quoting=1, escapechar=None)  # quoting=1 表示 QUOTE_ALL
             return output_path
         except Exception as e:
             raise Exception(f"保存CSV文件失败: {str(e)}")
@@ -532,7 +847,7 @@ class ExcelToCSVConverter:
         """获取文本的显示宽度（考虑中文字符）"""
         if not text:
             return 0
-        width = wcswidth(str(text))
+        width = wcwidth.wcswidth(str(text))
         return width if width is not None else len(str(text))
 
     def truncate_text(self, text, max_width):
@@ -654,12 +969,13 @@ class ExcelToCSVConverter:
                 return
 
             # 读取当前与基线
-            df_curr = pd.read_csv(csv_path, encoding='utf-8-sig')
-            df_base = pd.read_csv(base_path, encoding='utf-8-sig')
+            df_curr = read_csv(csv_path, encoding='utf-8-sig')
+            df_base = read_csv(base_path, encoding='utf-8-sig')
 
-            # 统一为字符串比较，空值置空串
-            df_curr_n = df_curr.astype(str).fillna('')
-            df_base_n = df_base.astype(str).fillna('')
+            # 统一为字符串比较，空值置空串（超出内存预算时原地转换，不复制整表）
+            low_memory = self.over_memory_budget()
+            df_curr_n = frame_as_text(df_curr, in_place=low_memory)
+            df_base_n = frame_as_text(df_base, in_place=low_memory)
 
             # 检查结构变化
             added_cols = [c for c in df_curr_n.columns if c not in df_base_n.columns]
@@ -671,76 +987,70 @@ class ExcelToCSVConverter:
             min_rows = min(len(df_curr_n), len(df_base_n))
             changes = []
 
+            engine = self.get_frame_engine()
+
             # 比较公共行的数据变更
-            for i in range(min_rows):
-                for col in common_cols:
-                    v_old = df_base_n.iat[i, df_base_n.columns.get_loc(col)]
-                    v_new = df_curr_n.iat[i, df_curr_n.columns.get_loc(col)]
-                    if v_old != v_new:
-                        row_num = i + 2  # 行号+2(表头+索引)
-
-                        # 使用统一的差异比较工具
-                        diff_changes = self.compare_values_with_diff(v_old, v_new)
-                        if diff_changes:
-                            # 处理变更信息（统一6元素格式）
-                            for change_type, arr_pos, old_item, new_item, _, arr_type in diff_changes:
-                                if change_type == '删除':
-                                    if arr_type == 'single':
-                                        # 单个值变更
-                                        changes.append((row_num, col, old_item, "删除"))
-                                    else:
-                                        # 数组项变更
-                                        changes.append((row_num, f"{col}[{arr_pos}]", old_item, "删除"))
-                                elif change_type == '新增':
-                                    if arr_type == 'single':
-                                        # 单个值变更
-                                        changes.append((row_num, col, "新增", new_item))
-                                    else:
-                                        # 数组项变更
-                                        changes.append((row_num, f"{col}[{arr_pos}]", "新增", new_item))
-                                elif change_type == '替换':
-                                    changes.append((row_num, col, old_item, new_item))
-                        else:
-                            # 如果没有检测到变更，但值确实不同，显示整体变更
-                            changes.append((row_num, col, v_old, v_new))
+            for i, col, v_old, v_new in engine.changed_cells(df_base_n, df_curr_n, common_cols, min_rows):
+                row_num = i + 2  # 行号+2(表头+索引)
+
+                # 使用统一的差异比较工具
+                diff_changes = self.compare_values_with_diff(v_old, v_new)
+                if diff_changes:
+                    # 处理变更信息（统一6元素格式）
+                    for change_type, arr_pos, old_item, new_item, _, arr_type in diff_changes:
+                        if change_type == '删除':
+                            if arr_type == 'single':
+                                # 单个值变更
+                                changes.append((row_num, col, old_item, "删除"))
+                            else:
+                                # 数组项变更
+                                changes.append((row_num, f"{col}[{arr_pos}]", old_item, "删除"))
+                        elif change_type == '新增':
+                            if arr_type == 'single':
+                                # 单个值变更
+                                changes.append((row_num, col, "新增", new_item))
+                            else:
+                                # 数组项变更
+                                changes.append((row_num, f"{col}[{arr_pos}]", "新增", new_item))
+                        elif change_type == '替换':
+                            changes.append((row_num, col, old_item, new_item))
+                else:
+                    # 如果没有检测到变更，但值确实不同，显示整体变更
+                    changes.append((row_num, col, v_old, v_new))
 
             # 处理新增行
             if len(df_curr_n) > len(df_base_n):
-                for i in range(len(df_base_n), len(df_curr_n)):
+                for i, col, v_new in engine.row_cells(df_curr_n, len(df_base_n), len(df_curr_n), common_cols):
                     row_num = i + 2  # 行号+2(表头+索引)
-                    for col in common_cols:
-                        v_new = df_curr_n.iat[i, df_curr_n.columns.get_loc(col)]
-                        # 跳过空值
-                        if pd.notna(v_new) and str(v_new).strip() and str(v_new) != 'nan':
-                            # 使用统一的数组解析
-                            array_items, arr_type = self.parse_array_value(v_new)
-                            if arr_type == 'single':
-                                # 单个值
-                                changes.append((row_num, col, "新增", v_new))
-                            else:
-                                # 数组值，拆包为单个项目
-                                for idx, item in enumerate(array_items):
-                                    if item.strip():  # 跳过空项
-                                        changes.append((row_num, f"{col}[{idx}]", "新增", item))
+                    # 跳过空值
+                    if pd.notna(v_new) and str(v_new).strip() and str(v_new) != 'nan':
+                        # 使用统一的数组解析
+                        array_items, arr_type = self.parse_array_value(v_new)
+                        if arr_type == 'single':
+                            # 单个值
+                            changes.append((row_num, col, "新增", v_new))
+                        else:
+                            # 数组值，拆包为单个项目
+                            for idx, item in enumerate(array_items):
+                                if item.strip():  # 跳过空项
+                                    changes.append((row_num, f"{col}[{idx}]", "新增", item))
 
             # 处理删除行
             if len(df_base_n) > len(df_curr_n):
-                for i in range(len(df_curr_n), len(df_base_n)):
+                for i, col, v_old in engine.row_cells(df_base_n, len(df_curr_n), len(df_base_n), common_cols):
                     row_num = i + 2  # 行号+2(表头+索引)
-                    for col in common_cols:
-                        v_old = df_base_n.iat[i, df_base_n.columns.get_loc(col)]
-                        # 跳过空值
-                        if pd.notna(v_old) and str(v_old).strip() and str(v_old) != 'nan':
-                            # 使用统一的数组解析
-                            array_items, arr_type = self.parse_array_value(v_old)
-                            if arr_type == 'single':
-                                # 单个值
-                                changes.append((row_num, col, v_old, "删除"))
-                            else:
-                                # 数组值，拆包为单个项目
-                                for idx, item in enumerate(array_items):
-                                    if item.strip():  # 跳过空项
-                                        changes.append((row_num, f"{col}[{idx}]", item, "删除"))
+                    # 跳过空值
+                    if pd.notna(v_old) and str(v_old).strip() and str(v_old) != 'nan':
+                        # 使用统一的数组解析
+                        array_items, arr_type = self.parse_array_value(v_old)
+                        if arr_type == 'single':
+                            # 单个值
+                            changes.append((row_num, col, v_old, "删除"))
+                        else:
+                            # 数组值，拆包为单个项目
+                            for idx, item in enumerate(array_items):
+                                if item.strip():  # 跳过空项
+                                    changes.append((row_num, f"{col}[{idx}]", item, "删除"))
 
             # 打印摘要
             if added_cols or removed_cols or row_change != 0:
@@ -804,7 +1114,8 @@ class ExcelToCSVConverter:
             print(f"解析命令: 文件名='{filename}', 工作表='{sheet_name}'")
 
             # 查找Excel文件
-            file_path = self.find_excel_file(filename)
+            with pipeline_stage('find_excel_file'):
+                file_path = self.find_excel_file(filename)
             if not file_path:
                 raise FileNotFoundError(f"在目录 '{self.target_folder}' 中未找到文件 '{filename}'")
 
@@ -812,7 +1123,9 @@ class ExcelToCSVConverter:
 
             # 读取指定工作表
             print(f"正在读取工作表 '{sheet_name}'...")
-            df = self.read_excel_sheet(file_path, sheet_name)
+            with pipeline_stage('read_excel_sheet') as stage:
+                df = self.read_excel_sheet(file_path, sheet_name)
+                stage.update(rows=len(df), cells=int(df.size))
 
             print(f"成功读取数据: {len(df)} 行, {len(df.columns)} 列")
 
@@ -820,32 +1133,46 @@ class ExcelToCSVConverter:
             base_filename = Path(filename).stem  # 去掉扩展名
             current_table_sheet = f"{base_filename}[{sheet_name}]"
 
-            # 预预处理DataFrame，处理自定义字段关联
-            df_pre_processed = self.pre_preprocess_dataframe(df, current_table_sheet)
-
-            # 预处理DataFrame，查找并替换t_*字符串
-            df_processed = self.preprocess_dataframe(df_pre_processed)
-
             # 生成输出文件名（去掉.xls扩展名）
-            base_filename = Path(filename).stem  # 去掉扩展名
             output_filename = f"{base_filename}[{sheet_name}].csv"
 
-            # 保存为CSV
-            print(f"正在保存为CSV文件: {output_filename}")
-            output_path = self.save_to_csv(df_processed, output_filename)
+            if self.over_memory_budget():
+                # 超出内存预算：按行分块预处理并逐块写入CSV，不再整表复制
+                print(f"正在分块处理并保存为CSV文件: {output_filename}")
+                with pipeline_stage('convert_in_chunks') as stage:
+                    output_path = self.convert_in_chunks(df, current_table_sheet, output_filename)
+                    stage.update(rows=len(df), cells=int(df.size),
+                                 bytes=output_path.stat().st_size)
+            else:
+                # 预预处理DataFrame，处理自定义字段关联
+                with pipeline_stage('pre_preprocess_dataframe') as stage:
+                    stage.update(rows=len(df), cells=int(df.size))
+                    df_pre_processed = self.pre_preprocess_dataframe(df, current_table_sheet)
+
+                # 预处理DataFrame，查找并替换t_*字符串
+                with pipeline_stage('preprocess_dataframe') as stage:
+                    stage.update(rows=len(df_pre_processed), cells=int(df_pre_processed.size))
+                    df_processed = self.preprocess_dataframe(df_pre_processed)
+
+                # 保存为CSV
+                print(f"正在保存为CSV文件: {output_filename}")
+                with pipeline_stage('save_to_csv') as stage:
+                    output_path = self.save_to_csv(df_processed, output_filename)
+                    stage.update(rows=len(df_processed), cells=int(df_processed.size),
+                                 bytes=output_path.stat().st_size)
 
             # 首次导出时保存基线备份（如已存在则不覆盖）
             base_output_path = self.base_folder / output_filename
             try:
                 if not base_output_path.exists():
-                    shutil.copyfile(output_path, base_output_path)
+                    copy_file(output_path, base_output_path)
                     print(f"保存基线备份: {base_output_path.name}")
                 else:
                     print(f"基线备份已存在: {base_output_path.name}")
             except Exception as be:
                 print(f"保存基线备份失败: {be}")
 
-            print(f"输出: {output_path.name} ({len(df_processed)}行 x {len(df_processed.columns)}列)")
+            print(f"输出: {output_path.name} ({len(df)}行 x {len(df.columns)}列)")
 
         except Exception as e:
             print(f"❌ 转换失败: {str(e)}")
@@ -855,8 +1182,6 @@ class ExcelToCSVConverter:
 
     def process_csv_content(self, csv_content):
         """处理CSV内容，将各种{中文}格式还原为原始格式"""
-        import re
-
         # 正则表达式匹配 t_*{中文} 格式
         t_pattern = r't_([a-zA-Z0-9_]+)\{[^}]*\}'
         # 替换为 t_* 格式
@@ -881,8 +1206,6 @@ class ExcelToCSVConverter:
         if not new_item or not isinstance(new_item, str):
             return False
 
-        import re
-
         # 正则表达式匹配 t_*{中文} 格式
         pattern = r't_([a-zA-Z0-9_]+)\{([^}]+)\}'
         matches = re.findall(pattern, new_item)
@@ -892,15 +1215,6 @@ class ExcelToCSVConverter:
 
         print(f"发现 {len(matches)} 个语言文本更新需求")
 
-        # 导入go.py模块
-        try:
-            import sys
-            sys.path.append(str(Path.cwd()))
-            from go import ExcelTextReplacer
-        except Exception as e:
-            print(f"导入go.py模块失败: {str(e)}")
-            return False
-
         # 创建文本替换器实例
         replacer = ExcelTextReplacer({})
 
@@ -956,7 +1270,9 @@ class ExcelToCSVConverter:
             print("开始同步变更到原始文件...")
 
             # 1. 获取增强的变更记录
-            enhanced_changes = self.get_enhanced_changes_with_baseline(csv_file_path)
+            with pipeline_stage('get_enhanced_changes_with_baseline') as stage:
+                enhanced_changes = self.get_enhanced_changes_with_baseline(csv_file_path)
+                stage['changes'] = len(enhanced_changes)
 
             if not enhanced_changes:
                 print("没有检测到变更，跳过同步")
@@ -966,15 +1282,19 @@ class ExcelToCSVConverter:
 
             # 2. 先处理语言文本关联
             print("\n步骤1: 处理语言文本关联...")
-            self.apply_language_text_changes(enhanced_changes)
+            with pipeline_stage('apply_language_text_changes'):
+                self.apply_language_text_changes(enhanced_changes)
 
             # 3. 再处理数据同步到原文件
             print("\n步骤2: 处理数据同步...")
-            self.apply_data_changes_to_original_files(enhanced_changes, csv_file_path)
+            with pipeline_stage('apply_data_changes_to_original_files') as stage:
+                stage['changes'] = len(enhanced_changes)
+                self.apply_data_changes_to_original_files(enhanced_changes, csv_file_path)
 
             # 4. 重新生成CSV和更新基线
             print("\n步骤3: 更新CSV和基线...")
-            self.refresh_csv_and_baseline_after_sync(csv_file_path)
+            with pipeline_stage('refresh_csv_and_baseline_after_sync'):
+                self.refresh_csv_and_baseline_after_sync(csv_file_path)
 
             print("变更同步完成！")
             return True
@@ -1029,8 +1349,7 @@ class ExcelToCSVConverter:
             print(f"  更新基线: {csv_file_path} → {base_csv_path}")
 
             # 复制当前CSV到基线文件夹
-            import shutil
-            shutil.copy2(csv_file_path, base_csv_path)
+            copy_file(csv_file_path, base_csv_path)
 
             print(f"  ✅ CSV和基线更新完成")
             return True
@@ -1054,33 +1373,33 @@ class ExcelToCSVConverter:
                 return []
 
             # 读取当前与基线
-            df_curr = pd.read_csv(csv_path, encoding='utf-8-sig')
-            df_base = pd.read_csv(base_path, encoding='utf-8-sig')
+            df_curr = read_csv(csv_path, encoding='utf-8-sig')
+            df_base = read_csv(base_path, encoding='utf-8-sig')
 
-            # 统一为字符串比较，空值置空串
-            df_curr_n = df_curr.astype(str).fillna('')
-            df_base_n = df_base.astype(str).fillna('')
+            # 统一为字符串比较，空值置空串（超出内存预算时原地转换，不复制整表）
+            low_memory = self.over_memory_budget()
+            df_curr_n = frame_as_text(df_curr, in_place=low_memory)
+            df_base_n = frame_as_text(df_base, in_place=low_memory)
 
             # 收集增强的变更记录
             enhanced_changes = []
             common_cols = [c for c in df_curr_n.columns if c in df_base_n.columns]
             min_rows = min(len(df_curr_n), len(df_base_n))
+            count_in_stage('rows', min_rows)
+            count_in_stage('cells', min_rows * len(common_cols))
 
             # 比较公共行的数据变更
-            for i in range(min_rows):
-                for col in common_cols:
-                    v_old = df_base_n.iat[i, df_base_n.columns.get_loc(col)]
-                    v_new = df_curr_n.iat[i, df_curr_n.columns.get_loc(col)]
-                    if v_old != v_new:
-                        row_num = i + 2  # 行号+2(表头+索引)
-
-                        # 使用统一的差异比较工具
-                        diff_changes = self.compare_values_with_diff(v_old, v_new)
-                        if diff_changes:
-                            enhanced_changes.extend([
-                                (row_num, col, old_item, new_item, arr_pos, arr_type)
-                                for _, arr_pos, old_item, new_item, _, arr_type in diff_changes
-                            ])
+            engine = self.get_frame_engine()
+            for i, col, v_old, v_new in engine.changed_cells(df_base_n, df_curr_n, common_cols, min_rows):
+                row_num = i + 2  # 行号+2(表头+索引)
+
+                # 使用统一的差异比较工具
+                diff_changes = self.compare_values_with_diff(v_old, v_new)
+                if diff_changes:
+                    enhanced_changes.extend([
+                        (row_num, col, old_item, new_item, arr_pos, arr_type)
+                        for _, arr_pos, old_item, new_item, _, arr_type in diff_changes
+                    ])
 
             return enhanced_changes
 
@@ -1161,15 +1480,8 @@ class ExcelToCSVConverter:
     def _apply_cell_changes_to_excel(self, excel_file_path, sheet_name, row_num, col, cell_changes):
         """将单元格的所有变更一次性应用到Excel文件"""
         try:
-            # 导入go.py模块
-            import sys
-            sys.path.append(str(Path.cwd()))
-            from go import ExcelTextReplacer
-
-            # 创建替换器实例
-            replacer = ExcelTextReplacer({})
-
             # 调用go.py的方法进行单元格级别的更新
+            replacer = ExcelTextReplacer({})
             return replacer.update_cell_with_multiple_changes(
                 str(excel_file_path), sheet_name, row_num, col, cell_changes
             )
@@ -1220,15 +1532,8 @@ class ExcelToCSVConverter:
             bool: 是否成功
         """
         try:
-            # 导入go.py模块
-            import sys
-            sys.path.append(str(Path.cwd()))
-            from go import ExcelTextReplacer
-
-            # 创建替换器实例
-            replacer = ExcelTextReplacer({})
-
             # 调用go.py的方法进行精确更新
+            replacer = ExcelTextReplacer({})
             return replacer.update_cell_value_precisely(
                 str(excel_file_path), sheet_name, row_num, col,
                 new_value, arr_pos, arr_type, change_type
@@ -1242,7 +1547,7 @@ class ExcelToCSVConverter:
         """将CSV文件内容写回到Excel文件的指定工作表"""
         try:
             # 读取CSV文件
-            df = pd.read_csv(csv_file_path, encoding='utf-8-sig')
+            df = read_csv(csv_file_path, encoding='utf-8-sig')
 
             # 处理CSV内容，将t_*{中文}格式还原为t_*格式
             for col in df.columns:
@@ -1251,15 +1556,16 @@ class ExcelToCSVConverter:
             # 将'nan'字符串转换回NaN
             df = df.replace('nan', pd.NA)
 
-            # 检查Excel文件类型并写入
+            # 检查Excel文件类型并写入（整个读-改-写过程持有排他锁）
             file_extension = Path(excel_file_path).suffix.lower()
 
-            if file_extension == '.xlsx':
-                self.write_to_xlsx(df, excel_file_path, sheet_name)
-            elif file_extension == '.xls':
-                self.write_to_xls(df, excel_file_path, sheet_name)
-            else:
-                raise ValueError(f"不支持的Excel文件格式: {file_extension}")
+            with workbook_lock(excel_file_path):
+                if file_extension == '.xlsx':
+                    self.write_to_xlsx(df, excel_file_path, sheet_name)
+                elif file_extension == '.xls':
+                    self.write_to_xls(df, excel_file_path, sheet_name)
+                else:
+                    raise ValueError(f"不支持的Excel文件格式: {file_extension}")
 
         except Exception as e:
             raise Exception(f"写入Excel文件失败: {str(e)}")
@@ -1270,7 +1576,7 @@ class ExcelToCSVConverter:
             # 检查文件是否存在
             if Path(excel_file_path).exists():
                 # 文件存在，读取现有工作簿
-                workbook = openpyxl.load_workbook(excel_file_path)
+                workbook = load_xlsx(excel_file_path)
 
                 # 记录原始工作表顺序
                 original_sheet_names = workbook.sheetnames.copy()
@@ -1310,7 +1616,8 @@ class ExcelToCSVConverter:
                     worksheet.cell(row=row_idx, column=col_idx, value=cell_value)
 
             # 保存文件
-            workbook.save(excel_file_path)
+            save_workbook(workbook, excel_file_path)
+            IO_STATS.record_cells(excel_file_path, written=int(df.size) + len(df.columns))
             workbook.close()
 
         except Exception as e:
@@ -1328,7 +1635,7 @@ class ExcelToCSVConverter:
 
             if Path(excel_file_path).exists():
                 try:
-                    old_workbook = xlrd.open_workbook(excel_file_path)
+                    old_workbook = open_xls(excel_file_path)
                     for sheet_idx in range(old_workbook.nsheets):
                         old_sheet = old_workbook.sheet_by_index(sheet_idx)
                         old_sheet_name = old_sheet.name
@@ -1385,30 +1692,70 @@ class ExcelToCSVConverter:
                             worksheet.write(row_idx, col_idx, cell_value)
 
             # 保存文件
-            new_workbook.save(excel_file_path)
+            save_workbook(new_workbook, excel_file_path)
+            cells_copied = sum(len(row_data) for _, sheet_data in existing_sheets if sheet_data
+                               for row_data in sheet_data)
+            IO_STATS.record_cells(excel_file_path, read=cells_copied,
+                                  written=cells_copied + int(df.size) + len(df.columns))
 
         except Exception as e:
             raise Exception(f"写入.xls文件失败: {str(e)}")
 
     def get_sheet_names(self, excel_file_path):
-        """获取Excel文件的工作表名称列表"""
+        """获取Excel文件的工作表名称列表（查工作簿目录，文件变化后才重新读取）"""
+        excel_file_path = Path(excel_file_path)
+        if excel_file_path.suffix.lower() not in SUPPORTED_EXTENSIONS:
+            return []
+        return get_workbook_catalog(excel_file_path.parent).sheet_names(excel_file_path)
+
+    def sync_csv_file(self, csv_file):
+        """将单个CSV文件的修改写回对应的Excel文件
+
+        Returns:
+            bool: 是否处理成功
+        """
         try:
-            file_extension = Path(excel_file_path).suffix.lower()
+            # 解析CSV文件名
+            csv_filename = csv_file.stem
+            if '[' not in csv_filename or ']' not in csv_filename:
+                print(f"跳过 {csv_file.name} (格式错误)")
+                return False
+
+            file_part, sheet_part = csv_filename.split('[', 1)
+            sheet_name = sheet_part.rstrip(']')
+            excel_filename = f"{file_part.strip()}.xls"
+
+            print(f"处理 {csv_file.name} → {excel_filename}[{sheet_name}]")
+
+            # 查找Excel文件
+            excel_file_path = self.find_excel_file(excel_filename)
+            if not excel_file_path:
+                print(f"  错误: 未找到 {excel_filename}")
+                return False
+
+            # 第1步：找到差异
+            print(f"  第1步: 分析变更差异...")
+            with pipeline_stage('show_diff_with_baseline'):
+                self.show_diff_with_baseline(csv_file)
 
-            if file_extension == '.xlsx':
-                workbook = openpyxl.load_workbook(excel_file_path)
-                sheet_names = workbook.sheetnames.copy()
-                workbook.close()
-                return sheet_names
-            elif file_extension == '.xls':
-                workbook = xlrd.open_workbook(excel_file_path)
-                sheet_names = workbook.sheet_names()
-                return sheet_names
+            # 第2步：智能同步变更到原文件
+            print(f"  第2步: 智能同步变更...")
+            sync_success = self.sync_changes_to_original_files(csv_file)
+
+            if sync_success:
+                print(f"  ✅ 智能同步完成")
             else:
-                return []
+                print(f"  ⚠️ 智能同步失败，使用传统方法...")
+                # 如果智能同步失败，回退到传统方法
+                with pipeline_stage('write_csv_to_excel'):
+                    self.write_csv_to_excel(csv_file, excel_file_path, sheet_name)
+                print(f"  完成传统写入")
+
+            return True
+
         except Exception as e:
-            print(f"警告: 读取工作表名称时出错: {str(e)}")
-            return []
+            print(f"  错误: {str(e)}")
+            return False
 
     def update_excel_from_csv(self):
         """遍历xls文件夹中的CSV文件，将其内容写回到对应的Excel文件"""
@@ -1434,80 +1781,1207 @@ class ExcelToCSVConverter:
 
             # 处理每个CSV文件
             for csv_file in csv_files:
-                try:
-                    # 解析CSV文件名
-                    csv_filename = csv_file.stem
-                    if '[' not in csv_filename or ']' not in csv_filename:
-                        print(f"跳过 {csv_file.name} (格式错误)")
-                        continue
+                with pipeline_stage(csv_file.name):
+                    if self.sync_csv_file(csv_file):
+                        success_count += 1
+                print()
+
+            # 结果摘要
+            if success_count == len(csv_files):
+                print(f"✅ 全部完成 ({success_count}/{len(csv_files)})")
+            else:
+                print(f"⚠️ 部分完成 ({success_count}/{len(csv_files)})")
+            return success_count > 0
 
-                    file_part, sheet_part = csv_filename.split('[', 1)
-                    sheet_name = sheet_part.rstrip(']')
-                    excel_filename = f"{file_part.strip()}.xls"
+        except Exception as e:
+            print(f"❌ 更新失败: {str(e)}")
+            return False
 
-                    print(f"处理 {csv_file.name} → {excel_filename}[{sheet_name}]")
+    def find_dependent_csv_files(self, changed_workbooks):
+        """找出依赖于指定工作簿的CSV文件
 
-                    # 查找Excel文件
-                    excel_file_path = self.find_excel_file(excel_filename)
-                    if not excel_file_path:
-                        print(f"  错误: 未找到 {excel_filename}")
-                        continue
+        CSV依赖其源工作簿，以及预预处理配置中它引用的目标工作簿。
+
+        Args:
+            changed_workbooks: 发生变化的工作簿路径列表
 
-                    # 第1步：找到差异
-                    print(f"  第1步: 分析变更差异...")
-                    self.show_diff_with_baseline(csv_file)
+        Returns:
+            list: 需要重新导出的CSV文件路径
+        """
+        changed_stems = {Path(path).stem for path in changed_workbooks}
+        dependents = []
 
-                    # 第2步：智能同步变更到原文件
-                    print(f"  第2步: 智能同步变更...")
-                    sync_success = self.sync_changes_to_original_files(csv_file)
+        for csv_file in sorted(self.output_folder.glob("*.csv")):
+            table_sheet = csv_file.stem  # "hero[hero]"
+            if '[' not in table_sheet:
+                continue
 
-                    if sync_success:
-                        print(f"  ✅ 智能同步完成")
-                    else:
-                        print(f"  ⚠️ 智能同步失败，使用传统方法...")
-                        # 如果智能同步失败，回退到传统方法
-                        self.write_csv_to_excel(csv_file, excel_file_path, sheet_name)
-                        print(f"  完成传统写入")
+            stems = {table_sheet.split('[', 1)[0].strip()}
+            for source_config, target_config in PRE_PROCESSING_CONFIG.items():
+                if source_config.split(',')[0].strip() == table_sheet:
+                    stems.add(target_config.split(',')[0].split('[', 1)[0].strip())
 
-                    success_count += 1
+            if stems & changed_stems:
+                dependents.append(csv_file)
 
-                except Exception as e:
-                    print(f"  错误: {str(e)}")
+        return dependents
 
-                print()
+    def handle_watch_changes(self, changed_paths, lang_folder):
+        """处理监视模式检测到的一批文件变化
 
-            # 结果摘要
-            if success_count == len(csv_files):
-                print(f"✅ 全部完成 ({success_count}/{len(csv_files)})")
+        - CSV被保存：只写回这一个CSV
+        - 语言文件变化：增量刷新语言索引
+        - 配置工作簿变化：重新导出依赖它的CSV（CSV有未写回的修改时跳过）
+
+        Returns:
+            list: 本次处理中写入的CSV文件路径
+        """
+        lang_folder = Path(lang_folder).resolve()
+        csv_changed = [p for p in changed_paths if p.suffix.lower() == '.csv']
+        workbooks_changed = [p for p in changed_paths if p.suffix.lower() in SUPPORTED_EXTENSIONS]
+        lang_changed = [p for p in workbooks_changed if p.parent.resolve() == lang_folder]
+        source_changed = [p for p in workbooks_changed if p.parent.resolve() != lang_folder]
+        timestamp = datetime.now().strftime('%H:%M:%S')
+        written = []
+
+        if lang_changed:
+            index = get_language_index(lang_folder)
+            index.refresh(force=True)
+            names = ', '.join(p.name for p in lang_changed)
+            print(f"[{timestamp}] 语言文件已变化: {names}，索引已刷新 ({index.stats()['ids']} 个ID)")
+
+        for csv_file in csv_changed:
+            print(f"[{timestamp}] CSV已保存: {csv_file.name}")
+            self.sync_csv_file(csv_file)
+            written.append(str(csv_file))
+            print()
+
+        if source_changed:
+            names = ', '.join(p.name for p in source_changed)
+            print(f"[{timestamp}] 配置文件已变化: {names}")
+            for csv_file in self.find_dependent_csv_files(source_changed):
+                if str(csv_file) in written:
+                    continue
+                base_path = self.base_folder / csv_file.name
+                if base_path.exists() and not filecmp.cmp(csv_file, base_path, shallow=False):
+                    print(f"  ⚠️ {csv_file.name} 有未写回的修改，跳过重新导出")
+                    continue
+                print(f"  重新导出: {csv_file.name}")
+                self.refresh_csv_and_baseline_after_sync(csv_file)
+                written.append(str(csv_file))
+            print()
+
+        return written
+
+    def renumber_ids(self, table_sheet, mapping, dry_run=False):
+        """批量修改ID，并同步修改所有引用它的单元格
+
+        要修改的列由预预处理配置决定：关联到该表的匹配列（ID本身）以及各源列（引用）。
+        通过引用索引找到这些列中出现旧ID的单元格，按原数组格式逐项替换（保留 1001{…} 的注释部分）。
+        先只读检查所有工作簿，有单元格无法修改时不写入任何文件；写入前把每个工作簿备份到 RENUMBER_BACKUP_FOLDER，
+        中途写入失败时列出已写入的工作簿和备份位置。
+
+        Args:
+            table_sheet: 被重新编号的表，如 "heroSkill[heroskill]"
+            mapping: {旧ID: 新ID}
+            dry_run: 为真时只列出将要修改的单元格，不写入文件
+
+        Returns:
+            int: 修改（试运行时为将要修改）的单元格数；参数错误或没有全部修改成功时返回None
+        """
+        from collections import Counter
+
+        def column_key(table, column):
+            file_part, sheet_part = table.split('[', 1)
+            return file_part.strip(), sheet_part.rstrip(']'), column
+
+        # 关联到该表的匹配列和源列: (表名, 工作表, 列名)
+        id_columns, ref_columns = set(), set()
+        for source_config, target_config in PRE_PROCESSING_CONFIG.items():
+            source_parts = [part.strip() for part in source_config.split(',')]
+            target_parts = [part.strip() for part in target_config.split(',')]
+            if len(source_parts) != 2 or len(target_parts) != 3 or target_parts[0] != table_sheet:
+                continue
+            id_columns.add(column_key(target_parts[0], target_parts[1]))
+            ref_columns.add(column_key(*source_parts))
+        if not id_columns:
+            print(f"预预处理配置中没有关联到 {table_sheet} 的字段")
+            return None
+
+        if not mapping:
+            print("没有需要修改的ID")
+            return 0
+        for old_id, new_id in mapping.items():
+            if not (ReferenceIndex.ID_PATTERN.match(old_id) and ReferenceIndex.ID_PATTERN.match(new_id)):
+                print(f"ID格式错误: {old_id} -> {new_id}")
+                return None
+        duplicates = [new_id for new_id, count in Counter(mapping.values()).items() if count > 1]
+        if duplicates:
+            print(f"多个旧ID改成了同一个新ID: {', '.join(duplicates)}")
+            return None
+
+        def in_columns(ref, columns):
+            return (Path(ref['file']).stem, ref['sheet'], ref['column']) in columns
+
+        index = self.get_reference_index()
+        index.refresh()
+        # 新ID已被表中其他行占用（且不会被改掉）时会产生重复ID
+        taken = [new_id for new_id in mapping.values()
+                 if new_id not in mapping
+                 and any(in_columns(ref, id_columns) for ref in index.lookup(new_id, refresh=False))]
+        if taken:
+            print(f"新ID在 {table_sheet} 中已存在: {', '.join(taken)}")
+            return None
+
+        # 工作簿 -> {(工作表, 行, 列): {数组中的位置: (旧ID, 新ID)}}
+        changes = {}
+        missing = []
+        for old_id, new_id in mapping.items():
+            references = [ref for ref in index.lookup(old_id, refresh=False)
+                          if in_columns(ref, id_columns | ref_columns)]
+            if not any(in_columns(ref, id_columns) for ref in references):
+                missing.append(old_id)
+            for ref in references:
+                cell = (ref['sheet'], ref['row'], ref['col'])
+                changes.setdefault(ref['file'], {}).setdefault(cell, {})[ref['position']] = (old_id, new_id)
+        if missing:
+            print(f"⚠️ {table_sheet} 中没有这些ID（仍会修改引用它们的单元格）: {', '.join(missing)}")
+
+        print(f"{'试运行：' if dry_run else ''}修改 {table_sheet} 的 {len(mapping)} 个ID，"
+              f"涉及 {len(changes)} 个工作簿")
+        # 先只读检查所有工作簿的每个单元格，全部能修改时才写入，不会只改了一部分工作簿
+        plans = []
+        failed = False
+        for file_name, cells in changes.items():
+            file_path = self.target_folder / file_name
+            print(f"{file_name}")
+            plan = self._plan_renumber_workbook(file_path, cells)
+            if plan is None:
+                failed = True
             else:
-                print(f"⚠️ 部分完成 ({success_count}/{len(csv_files)})")
-            return success_count > 0
+                plans.append(plan)
+        total = sum(plan['count'] for plan in plans)
+        if failed:
+            print(f"❌ 有工作簿读取失败或单元格内容已变化，未写入任何文件；请确认后重新运行")
+            return None
+        if dry_run:
+            print(f"🔍 试运行，未写入文件，将修改 {total} 个单元格")
+            return total
+
+        backup_folder = self.renumber_backup_folder / datetime.now().strftime('%Y%m%d_%H%M%S')
+        written = []
+        for plan in plans:
+            if not self._write_renumber_workbook(plan, backup_folder):
+                if written:
+                    print(f"❌ 已写入 {len(written)} 个工作簿: {', '.join(path.name for path in written)}")
+                    print(f"   修改前的文件备份在 {backup_folder}，复制回 {self.target_folder} 即可还原")
+                else:
+                    print("❌ 未写入任何文件")
+                return None
+            written.append(plan['file'])
+
+        print(f"✅ 已修改 {total} 个单元格")
+        if written:
+            print(f"修改前的工作簿已备份到: {backup_folder}")
+        stale_csv = self.find_dependent_csv_files(written)
+        if stale_csv:
+            print(f"⚠️ 以下已导出的CSV中仍是旧ID，请重新导出: {', '.join(p.stem for p in stale_csv)}")
+        return total
 
+    def _plan_renumber_workbook(self, file_path, cells):
+        """只读检查一个工作簿中要修改的单元格，算出新值
+
+        Args:
+            cells: {(工作表, 行, 列): {数组中的位置: (旧ID, 新ID)}}，行号、列号从1开始
+
+        Returns:
+            dict: {'file', 'signature', 'changes': {工作表: {(行, 列): 新值}}（从0开始）, 'count'}；
+                  读取失败或有单元格与引用索引不符（索引建立后又被修改过）时返回None
+        """
+        is_xlsx = file_path.suffix.lower() == '.xlsx'
+        changes = {}
+        mismatched = 0
+        try:
+            with workbook_lock(file_path, shared=True):
+                signature = file_signature(file_path)
+                workbook = load_xlsx(file_path) if is_xlsx else open_xls(file_path)
+                for (sheet_name, row, col), positions in sorted(cells.items()):
+                    if is_xlsx:
+                        value = workbook[sheet_name].cell(row=row, column=col).value
+                    else:
+                        value = workbook.sheet_by_name(sheet_name).cell_value(row - 1, col - 1)
+                    if isinstance(value, float) and value.is_integer():
+                        value = int(value)
+                    new_value = self.renumber_cell_value(value, positions)
+                    column = openpyxl.utils.get_column_letter(col)
+                    if new_value is None:
+                        print(f"  ❌ [{sheet_name}] 行{row} 列{column} 内容与引用索引不符: {value}")
+                        mismatched += 1
+                        continue
+                    print(f"  [{sheet_name}] 行{row} 列{column}: {value} -> {new_value}")
+                    changes.setdefault(sheet_name, {})[(row - 1, col - 1)] = new_value
+                if is_xlsx:
+                    workbook.close()
         except Exception as e:
-            print(f"❌ 更新失败: {str(e)}")
+            print(f"读取工作簿 {file_path.name} 时出错: {str(e)}")
+            return None
+        if mismatched:
+            return None
+        return {'file': file_path, 'signature': signature, 'changes': changes,
+                'count': sum(len(sheet_changes) for sheet_changes in changes.values())}
+
+    def _write_renumber_workbook(self, plan, backup_folder):
+        """在排他锁内写入一个工作簿的修改，写入前把原文件复制到 backup_folder
+
+        Returns:
+            bool: 是否写入成功（没有修改时不写入，也视为成功）
+        """
+        file_path = plan['file']
+        if not plan['count']:
+            return True
+        try:
+            with workbook_lock(file_path):
+                if file_signature(file_path) != plan['signature']:
+                    print(f"❌ {file_path.name} 在检查后被修改，未写入")
+                    return False
+                backup_folder.mkdir(parents=True, exist_ok=True)
+                copy_file(file_path, backup_folder / file_path.name)
+                if file_path.suffix.lower() == '.xlsx':
+                    workbook = load_xlsx(file_path)
+                    for sheet_name, sheet_changes in plan['changes'].items():
+                        sheet = workbook[sheet_name]
+                        for (row_idx, col_idx), new_value in sheet_changes.items():
+                            sheet.cell(row=row_idx + 1, column=col_idx + 1).value = new_value
+                    save_workbook(workbook, file_path)
+                    IO_STATS.record_cells(file_path, written=plan['count'])
+                    workbook.close()
+                else:
+                    ExcelTextReplacer({})._apply_xls_plan(plan)
+        except Exception as e:
+            print(f"写入工作簿 {file_path.name} 时出错: {str(e)}")
             return False
+        return True
+
+    def renumber_cell_value(self, value, positions):
+        """替换单元格中指定位置的ID，保留数组格式和 {…} 注释
+
+        Args:
+            value: 单元格原值
+            positions: {数组中的位置: (旧ID, 新ID)}，单个值的单元格位置为None
+
+        Returns:
+            新值；单元格内容与位置不符时返回None
+        """
+        if isinstance(value, bool):
+            return None
+        if isinstance(value, int):
+            old_id, new_id = positions.get(None, (None, None))
+            return int(new_id) if old_id is not None and value == int(old_id) else None
+        if not isinstance(value, str):
+            return None
+
+        if None in positions:
+            # 单个值：只替换ID本身，其余内容保持不变
+            old_id, new_id = positions[None]
+            parts = self.parse_ids_from_value(value)
+            if len(parts) != 1 or parts[0].split('{', 1)[0].strip() != old_id:
+                return None
+            return value.replace(parts[0], new_id + parts[0][len(old_id):], 1)
+
+        # 数组或逗号分隔：与单元格写回相同，逐项用 _apply_array_change 的替换变更修改
+        replacer = ExcelTextReplacer({})
+        _, arr_type = self.parse_array_value(value)
+        items = replacer._parse_value_to_array(value, arr_type)
+        new_value = value
+        for position, (old_id, new_id) in positions.items():
+            if position >= len(items) or items[position].split('{', 1)[0].strip() != old_id:
+                return None
+            new_value = replacer._apply_array_change(new_value, new_id + items[position][len(old_id):],
+                                                     position, arr_type, '替换')
+        return new_value
+
+    def validate_references(self, lang_folder=None):
+        """检查整个项目的引用完整性
+
+        引用索引和语言索引各读取一次所有工作簿（之后只重新读取变化过的文件），检查：
+        - 预预处理配置的每个关联：源列引用的ID在目标表匹配列中不存在（缺失）；
+          匹配列中同一个ID出现在多行（重复）；匹配列中没有被任何源列引用的ID（未被引用，只提示）
+        - 配置表中出现的每个t_*键（数组或逗号分隔的整项，或{}内的键；不含第1行表头）在语言表中不存在（缺失）；
+          语言表中同一个ID有多行（重复，查找时视为未找到）
+
+        Returns:
+            dict: {'missing': 缺失数, 'duplicates': 重复数, 'orphans': 未被引用数, 'errors': 配置错误数}
+        """
+        counts = {'missing': 0, 'duplicates': 0, 'orphans': 0, 'errors': 0}
+        relations = []  # [((源表, 源列), (目标表, 匹配列))]
+        for source_config, target_config in PRE_PROCESSING_CONFIG.items():
+            source_parts = [part.strip() for part in source_config.split(',')]
+            target_parts = [part.strip() for part in target_config.split(',')]
+            if (len(source_parts) != 2 or len(target_parts) != 3
+                    or '[' not in source_parts[0] or '[' not in target_parts[0]):
+                print(f"❌ 预预处理配置格式错误: \"{source_config}\": \"{target_config}\"")
+                counts['errors'] += 1
+                continue
+            relations.append((tuple(source_parts), tuple(target_parts[:2])))
+
+        index = self.get_reference_index()
+        index.refresh()
+        columns = index.column_ids([column for relation in relations for column in relation])
+
+        print("预预处理关联:")
+        referenced = {}  # (目标表, 匹配列) -> 被引用的ID
+        for source, target in relations:
+            label = f"{source[0]} {source[1]} -> {target[0]} {target[1]}"
+            not_found = [f"{table} 的列 {column}" for table, column in (source, target) if columns[(table, column)] is None]
+            if not_found:
+                print(f"  ❌ {label}: 未找到 {', '.join(not_found)}")
+                counts['errors'] += 1
+                continue
+            source_ids = columns[source][1]
+            target_ids = columns[target][1]
+            referenced.setdefault(target, set()).update(source_ids)
+            missing = sorted((id_value for id_value in source_ids if id_value not in target_ids), key=int)
+            print(f"  {'❌' if missing else '✅'} {label}: 引用 {len(source_ids)} 个ID，缺失 {len(missing)} 个")
+            for id_value in missing:
+                print(f"      缺失 {id_value}: {source[0]} 行{', '.join(map(str, source_ids[id_value]))}")
+            counts['missing'] += len(missing)
+
+        for target, ids in referenced.items():
+            file_name, target_ids = columns[target]
+            duplicates = sorted((id_value for id_value, rows in target_ids.items() if len(rows) > 1), key=int)
+            for id_value in duplicates:
+                print(f"  ❌ {target[0]} {target[1]} 重复ID {id_value}: 行{', '.join(map(str, target_ids[id_value]))}")
+            orphans = sorted((id_value for id_value in target_ids if id_value not in ids), key=int)
+            if orphans:
+                print(f"  ⚠️ {target[0]} {target[1]} 有 {len(orphans)} 个ID未被引用: {', '.join(orphans)}")
+            counts['duplicates'] += len(duplicates)
+            counts['orphans'] += len(orphans)
+
+        lang_index = get_language_index(lang_folder or go.TARGET_FOLDER)
+        lang_counts = lang_index.id_counts()
+        t_keys = sorted(key for key in index.keys(skip_header=True) if key.startswith('t_'))
+        missing = [key for key in t_keys if key not in lang_counts]
+        duplicates = sorted(key for key, count in lang_counts.items() if count > 1 and key.startswith('t_'))
+        print(f"t_*键: 配置表中引用 {len(t_keys)} 个，语言表中 {len(lang_counts)} 个，"
+              f"缺失 {len(missing)} 个，重复 {len(duplicates)} 个")
+        for key in missing:
+            references = [ref for ref in index.lookup(key, refresh=False) if ref['row'] > 1]
+            first = references[0]
+            more = f" 等 {len(references)} 处" if len(references) > 1 else ""
+            print(f"  ❌ 缺失 {key}: {first['file']}[{first['sheet']}] 行{first['row']} "
+                  f"列{openpyxl.utils.get_column_letter(first['col'])}{more}")
+        for key in duplicates:
+            rows = [f"{entry['file']}[{entry['sheet']}] 行{entry['row']}" for entry in lang_index.lookup(key)]
+            print(f"  ❌ 重复 {key}: {', '.join(rows)}")
+        counts['missing'] += len(missing)
+        counts['duplicates'] += len(duplicates)
+
+        failed = counts['missing'] or counts['duplicates'] or counts['errors']
+        print(f"{'❌' if failed else '✅'} 检查完成: 缺失 {counts['missing']}，重复 {counts['duplicates']}，"
+              f"配置错误 {counts['errors']}，未被引用 {counts['orphans']}（只提示）")
+        return counts
+
+    def run_pipeline(self, method, params):
+        """执行导出或写回，并记录分阶段耗时统计
+
+        Args:
+            method: export / sync
+            params: 命令参数；profile 为真时每个阶段额外保存cProfile数据，timing 为真时打印统计表，
+                    memory 为真时记录每个阶段的内存峰值，memory_budget 为内存预算（MB，覆盖 MEMORY_BUDGET_MB），
+                    frame_engine 为表格引擎（覆盖 FRAME_ENGINE）
+        """
+        command = f"{method} {params['command']}" if method == 'export' else method
+        profile_dir = None
+        if params.get('profile'):
+            folder = self.report_folder or self.output_folder.parent / "xls_report"
+            profile_dir = folder / f"{datetime.now():%Y%m%d_%H%M%S}_{go._safe_filename(command)}_profile"
+
+        budget = params.get('memory_budget')
+        self.memory_budget = MEMORY_BUDGET_MB if budget is None else budget
+        self.frame_engine = params.get('frame_engine') or FRAME_ENGINE
+        report = start_report(command, profile_dir, track_memory=bool(params.get('memory')))
+        try:
+            if method == 'export':
+                with pipeline_stage('convert'):
+                    success = self.convert(params['command'])
+                print("✅ 导出完成" if success else "❌ 导出失败")
+            else:
+                # 结果已在 update_excel_from_csv 中显示
+                success = self.update_excel_from_csv()
+        finally:
+            finish_report()
+
+        if params.get('timing') or params.get('profile') or params.get('memory'):
+            report.print_summary()
+        if self.report_folder:
+            try:
+                report_path = report.save(self.report_folder)
+                print(f"运行报告: {report_path}")
+            except OSError as e:
+                print(f"保存运行报告失败: {e}")
+        if profile_dir:
+            print(f"cProfile数据: {profile_dir}（可用 snakeviz / gprof2dot 等工具查看）")
+        return success
+
+    def run_command(self, method, params):
+        """执行一条命令（本地执行和常驻进程共用）
+
+        Args:
+            method: 命令名 export / sync / search / lookup / update-lang / refs / renumber / validate
+            params: 命令参数
+
+        Returns:
+            命令结果（可JSON序列化）
+        """
+        previous_progress = configure_progress(params.get('quiet', False), params.get('events'))
+        io_before = IO_STATS.snapshot()
+        try:
+            return self._run_command(method, params)
+        finally:
+            configure_progress(*previous_progress)
+            # --io: 命令结束后打印本次命令的文件读写统计
+            if params.get('io'):
+                print_io_report(io_delta(io_before, IO_STATS.snapshot()))
+
+    def _run_command(self, method, params):
+        lang_folder = go.TARGET_FOLDER
+
+        if method in ('export', 'sync'):
+            return self.run_pipeline(method, params)
+
+        replacer = ExcelTextReplacer({})
+
+        if method == 'search':
+            # report: 搜索结果逐条写入该文件（.jsonl 或 .csv）
+            # jobs / limit: 并行进程数、结果上限；format 为 jsonl 时结果以JSON Lines文本返回
+            # 常驻进程中（WORKBOOK_POOL 已启用）语言索引一直在内存里，语言文件夹下有保存的索引时也可直接加载，
+            # 这两种情况直接查索引（只重新读取变化过的文件）
+            if params.get('report'):
+                replacer.search_records.open(params['report'])
+            lines = io.StringIO() if params.get('format') == 'jsonl' else None
+            directory = params.get('directory') or lang_folder
+            index = get_language_index(directory)
+            if not (go.WORKBOOK_POOL.enabled or index.has_saved()):
+                index = None
+            jobs = params.get('jobs') or go.SEARCH_JOBS
+            try:
+                if 'terms' in params:
+                    # 批量搜索：所有词一次扫描（或逐个查索引），按词分组输出
+                    replacer.print_batch_results(replacer.batch_search(params['terms'], directory, jobs, index), lines)
+                else:
+                    replacer.search_in_excel_files(params['text'], directory, jobs, params.get('limit'), lines, index)
+            finally:
+                replacer.close_report()
+            return lines.getvalue() if lines is not None else replacer.search_count
+
+        if method == 'lookup':
+            chinese_text = replacer.get_chinese_text_by_id(params['t_id'], lang_folder)
+            if chinese_text:
+                print(f"{params['t_id']} -> {chinese_text}")
+            else:
+                print(f"{params['t_id']} -> 未找到（或结果不唯一）")
+            return chinese_text
+
+        if method == 'refs':
+            # 引用查询：哪些配置单元格引用了该ID或t_*键
+            references = self.get_reference_index().lookup(params['key'])
+            print_references(params['key'], references)
+            return len(references)
+
+        if method == 'validate':
+            # 引用完整性检查：返回各类问题的数量
+            return self.validate_references(lang_folder)
+
+        if method == 'renumber':
+            # 批量修改ID：mapping 为 {旧ID: 新ID}
+            return self.renumber_ids(params['table'], params['mapping'], params.get('dry_run', False))
+
+        if method == 'update-lang':
+            success = replacer.update_language_text_by_id(params['t_id'], params['text'], lang_folder)
+            print("✅ 语言文本已更新" if success else "❌ 语言文本更新失败")
+            return success
+
+        raise ValueError(f"未知命令: {method}")
+
+
+class ReferenceIndex:
+    """配置表引用索引（where-used）
+
+    读取目标文件夹中所有工作簿每个工作表的每个单元格，用与预预处理相同的方式解析：
+    parse_ids_from_value 拆出数组或逗号分隔的各项（1001{t_xxx} 取 { 前的ID），数字单元格取整数值，
+    find_t_keys_in_part 找出各项中的t_*键（整项或{}内）。记录每个ID和t_*键出现的位置 (工作簿, 工作表, 行, 列, 数组中的位置)。
+    按文件签名增量刷新，只重新读取修改过的工作簿；索引保存在目标文件夹对应的缓存文件夹（见 cache_folder）下的
+    REFERENCE_INDEX_FILE，同一用户的各工作目录和常驻进程共用。
+    """
+
+    VERSION = 2
+    ID_PATTERN = re.compile(r'^-?\d+$')
+
+    def __init__(self, converter):
+        self.converter = converter
+        self.folder = converter.target_folder
+        self.index_path = cache_folder(self.folder) / REFERENCE_INDEX_FILE if REFERENCE_INDEX_FILE else None
+        # 文件名 -> (文件签名, [(工作表名, [表头])], {键: [(工作表序号, 行号, 列号, 数组中的位置)]})
+        # 位置为该项在 parse_ids_from_value 结果中的序号，单个值的单元格为None；行号、列号从1开始
+        self._files = {}
+        self._order = {}    # 文件名 -> 扫描顺序
+        self._lock = threading.RLock()
+        self._saved_loaded = False
+
+    def refresh(self):
+        """检查目标文件夹，重新读取新增或修改过的工作簿"""
+        with self._lock:
+            if not self._saved_loaded:
+                self._saved_loaded = True
+                self._load_saved()
+
+            # Excel打开文件时生成的 ~$ 临时文件不是工作簿
+            current = [file_path for file_path in ExcelTextReplacer({}).find_excel_files(self.folder)
+                       if not file_path.name.startswith('~$')]
+            self._order = {file_path.name: order for order, file_path in enumerate(current)}
+
+            changed = False
+            for file_name in [name for name in self._files if name not in self._order]:
+                del self._files[file_name]
+                changed = True
+
+            stale = []
+            for file_path in current:
+                cached = self._files.get(file_path.name)
+                if cached is None or cached[0] is None or cached[0] != file_signature(file_path):
+                    stale.append(file_path)
+                IO_STATS.record_cache('reference_index', stale[-1:] != [file_path])
+            if stale:
+                with ProgressReporter("建立引用索引", len(stale), unit="个文件") as progress:
+                    for file_path in stale:
+                        signature = file_signature(file_path)
+                        loaded = self._load_file(file_path)
+                        if loaded is None:
+                            # 读取失败时不记录签名，下次重新读取
+                            loaded, signature = ([], {}), None
+                        self._files[file_path.name] = (signature,) + loaded
+                        progress.advance(failed=signature is None)
+                changed = True
+
+            if changed:
+                self._save()
+
+    def _load_file(self, file_path):
+        """读取单个工作簿的所有引用，返回 ([(工作表名, [表头])], {键: [位置]})；读取失败时返回None"""
+        sheets = []
+        refs = {}
+        try:
+            with workbook_lock(file_path, shared=True), WorkbookReader(file_path, pooled=True) as reader:
+                cells_read = 0
+                for sheet_idx, sheet_name in enumerate(reader.sheet_names):
+                    headers = []
+                    for row_idx, row in enumerate(reader.rows(sheet_name)):
+                        cells_read += len(row)
+                        if row_idx == 0:
+                            headers = ['' if value is None else str(value) for value in row]
+                        for col_idx, value in enumerate(row):
+                            # 空单元格：.xls 为''，.xlsx 为None
+                            if value is not None and value != '':
+                                self._add_cell(refs, sheet_idx, row_idx + 1, col_idx + 1, value)
+                    sheets.append((sheet_name, headers))
+                IO_STATS.record_cells(file_path, read=cells_read)
+        except Exception as e:
+            print(f"读取工作簿 {file_path.name} 时出错: {str(e)}")
+            return None
+        return sheets, refs
+
+    def _add_cell(self, refs, sheet_idx, row, col, value):
+        """解析一个单元格中的ID和t_*键，记录到 refs"""
+        if isinstance(value, bool):
+            return
+        if isinstance(value, (int, float)):
+            # 数字单元格（.xls中都是浮点数）：整数值视为ID
+            if isinstance(value, float) and not value.is_integer():
+                return
+            refs.setdefault(str(int(value)), []).append((sheet_idx, row, col, None))
+            return
+        if not isinstance(value, str):
+            return
+
+        parts = self.converter.parse_ids_from_value(value)
+        single = len(parts) == 1 and not value.strip().startswith('[')
+        for position, part in enumerate(parts):
+            key = part.split('{', 1)[0].strip()
+            if self.ID_PATTERN.match(key):
+                refs.setdefault(key, []).append((sheet_idx, row, col, None if single else position))
+            if 't_' in part:
+                # 同一个t_*键在数组中出现多次时每个位置都记录
+                for t_key in self.converter.find_t_keys_in_part(part):
+                    refs.setdefault(t_key, []).append((sheet_idx, row, col, None if single else position))
+
+    def _load_saved(self):
+        """读取保存的索引（文件签名不符的工作簿在 refresh 中重新读取）"""
+        saved = load_cache_file(self.index_path, self.VERSION, "引用索引")
+        if saved is not None and saved.get('folder') == str(self.folder.resolve()):
+            self._files = saved['files']
+
+    def _save(self):
+        save_cache_file(self.index_path, self.VERSION, "引用索引",
+                        folder=str(self.folder.resolve()), files=self._files)
+
+    def lookup(self, key, refresh=True):
+        """查找引用了该ID或t_*键的所有单元格
+
+        Args:
+            refresh: 为假时不检查文件变化（连续查询多个键时先调用一次 refresh）
+
+        Returns:
+            list: [{'file', 'sheet', 'row', 'col', 'column', 'position'}]，按工作簿、工作表、行、列排序；
+                  column 为该列第1行的表头，position 为数组中的位置（从0开始，单个值为None）
+        """
+        results = []
+        with self._lock:
+            if refresh:
+                self.refresh()
+            for file_name in sorted(self._files, key=lambda name: self._order.get(name, 0)):
+                _, sheets, refs = self._files[file_name]
+                for sheet_idx, row, col, position in sorted(refs.get(key, ()),
+                                                            key=lambda ref: (ref[0], ref[1], ref[2], ref[3] or 0)):
+                    sheet_name, headers = sheets[sheet_idx]
+                    results.append({'file': file_name, 'sheet': sheet_name, 'row': row, 'col': col,
+                                    'column': headers[col - 1] if col <= len(headers) else '',
+                                    'position': position})
+        return results
+
+    def column_ids(self, columns):
+        """指定各列中出现的ID（每个工作簿的引用只遍历一次）
+
+        Args:
+            columns: [(表, 列名)]，表如 "hero[hero]"，列名为第1行的表头
+
+        Returns:
+            dict: {(表, 列名): (工作簿文件名, {ID: [行号]})}，工作簿、工作表或列不存在时为None
+        """
+        result = {}
+        with self._lock:
+            for file_name in sorted(self._files, key=lambda name: self._order.get(name, 0)):
+                _, sheets, refs = self._files[file_name]
+                wanted = {}  # (工作表序号, 列号) -> (表, 列名)
+                for table_sheet, column in columns:
+                    if (table_sheet, column) in result:
+                        continue
+                    file_part, sheet_part = table_sheet.split('[', 1)
+                    if Path(file_name).stem != file_part.strip():
+                        continue
+                    for sheet_idx, (sheet_name, headers) in enumerate(sheets):
+                        if sheet_name == sheet_part.rstrip(']') and column in headers:
+                            wanted[(sheet_idx, headers.index(column) + 1)] = (table_sheet, column)
+                            result[(table_sheet, column)] = (file_name, {})
+                            break
+                if not wanted:
+                    continue
+                for key, cells in refs.items():
+                    if not self.ID_PATTERN.match(key):
+                        continue
+                    for sheet_idx, row, col, _ in cells:
+                        target = wanted.get((sheet_idx, col))
+                        if target is not None and row > 1:
+                            rows = result[target][1].setdefault(key, [])
+                            if row not in rows:
+                                rows.append(row)
+        return {column: result.get(column) for column in columns}
+
+    def keys(self, skip_header=False):
+        """所有工作簿中出现过的ID和t_*键；skip_header 为真时不含只出现在第1行（表头）的键"""
+        with self._lock:
+            keys = set()
+            for _, _, refs in self._files.values():
+                if skip_header:
+                    keys.update(key for key, cells in refs.items() if any(cell[1] > 1 for cell in cells))
+                else:
+                    keys.update(refs)
+            return keys
+
+    def stats(self):
+        """返回索引规模 {'files': 工作簿数, 'keys': 不同的键数}"""
+        with self._lock:
+            return {'files': len(self._files), 'keys': len(self.keys())}
+
+
+def print_references(key, references):
+    """打印引用查询结果"""
+    if not references:
+        print(f"没有单元格引用 {key}")
+        return
+    print(f"引用 {key} 的单元格（共 {len(references)} 处）:")
+    for ref in references:
+        column = openpyxl.utils.get_column_letter(ref['col'])
+        if ref['column']:
+            column = f"{column}({ref['column']})"
+        position = f" 第{ref['position'] + 1}项" if ref['position'] is not None else ""
+        print(f"  {ref['file']}[{ref['sheet']}] 行{ref['row']} 列{column}{position}")
+
+
+class ConfigDaemon:
+    """常驻进程
+
+    保持语言索引、.xls工作簿缓存和预预处理关联查找表常驻内存，
+    通过本地套接字接收JSON-RPC请求（每行一个JSON）。命令逐条执行，
+    输出被捕获后随结果一起返回给客户端。
+    """
+
+    def __init__(self, address=DAEMON_ADDRESS):
+        self.address = address
+        self.converters = {}  # 客户端工作目录 -> ExcelToCSVConverter
+        self.exec_lock = threading.Lock()
+        self.started_at = time.time()
+        self.request_count = 0
+        self.server = None
+
+    def warm_up(self):
+        """预热：建立语言索引并读取所有关联查找表"""
+        go.WORKBOOK_POOL.enabled = True
+        start = time.perf_counter()
+
+        index = get_language_index(go.TARGET_FOLDER)
+        index.refresh(force=True)
+        stats = index.stats()
+        print(f"语言索引: {stats['files']} 个文件, {stats['ids']} 个ID")
+
+        catalog = get_workbook_catalog(TARGET_FOLDER)
+        catalog.refresh()
+        stats = catalog.stats()
+        print(f"工作簿目录: {stats['workbooks']} 个工作簿, {stats['sheets']} 个工作表")
+
+        converter = ExcelToCSVConverter(TARGET_FOLDER, OUTPUT_FOLDER)
+        replacer = ExcelTextReplacer({})
+        table_count = 0
+        for target_config in set(PRE_PROCESSING_CONFIG.values()):
+            lookup_target = converter.resolve_lookup_target(target_config)
+            if lookup_target:
+                replacer.get_lookup_table(*lookup_target)
+                table_count += 1
+        print(f"关联查找表: {table_count} 个")
+        print(f"预热完成，耗时 {time.perf_counter() - start:.2f} 秒")
+
+    def get_converter(self, work_dir):
+        if work_dir not in self.converters:
+            self.converters[work_dir] = ExcelToCSVConverter(TARGET_FOLDER, OUTPUT_FOLDER, work_dir)
+        return self.converters[work_dir]
+
+    def status(self):
+        return {
+            'pid': os.getpid(),
+            'uptime': round(time.time() - self.started_at, 1),
+            'requests': self.request_count,
+            'language_index': get_language_index(go.TARGET_FOLDER).stats(),
+            'workbook_catalog': get_workbook_catalog(TARGET_FOLDER).stats(),
+            'workbook_pool': len(go.WORKBOOK_POOL),
+            'lookup_tables': len(go._lookup_tables),
+            'io': IO_STATS.summary(),
+        }
+
+    def handle_request(self, request):
+        """处理一条JSON-RPC请求，返回响应字典"""
+        response = {'jsonrpc': '2.0', 'id': request.get('id')}
+        method = request.get('method')
+        params = request.get('params') or {}
+
+        if method == 'ping':
+            response['result'] = self.status()
+            return response
+
+        if method == 'shutdown':
+            # 响应发出后再停止（见 RequestHandler.handle）
+            response['result'] = 'ok'
+            return response
+
+        if method not in ('export', 'sync', 'search', 'lookup', 'update-lang', 'refs', 'renumber', 'validate'):
+            response['error'] = {'code': -32601, 'message': f"未知命令: {method}"}
+            return response
+
+        output = io.StringIO()
+        try:
+            with self.exec_lock:
+                self.request_count += 1
+                converter = self.get_converter(params.get('cwd') or os.getcwd())
+                with redirect_stdout(output):
+                    result = converter.run_command(method, params)
+            response['result'] = {'result': result, 'output': output.getvalue()}
+        except Exception as e:
+            response['error'] = {'code': -32000, 'message': str(e), 'data': output.getvalue()}
+        return response
+
+    def serve_forever(self):
+        daemon = self
+
+        class RequestHandler(socketserver.StreamRequestHandler):
+            def handle(self):
+                line = self.rfile.readline()
+                if not line:
+                    return
+                request = {}
+                try:
+                    request = json.loads(line.decode('utf-8'))
+                    response = daemon.handle_request(request)
+                except ValueError as e:
+                    response = {'jsonrpc': '2.0', 'id': None,
+                                'error': {'code': -32700, 'message': f"请求格式错误: {e}"}}
+                self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8') + b'\n')
+                self.wfile.flush()
+
+                if request.get('method') == 'shutdown':
+                    threading.Thread(target=daemon.server.shutdown, daemon=True).start()
+
+        if hasattr(socket, 'AF_UNIX'):
+            if os.path.exists(self.address):
+                os.remove(self.address)
+
+            class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+                daemon_threads = True
+
+            old_umask = os.umask(0o077)  # 套接字仅当前用户可访问
+            try:
+                self.server = Server(self.address, RequestHandler)
+            finally:
+                os.umask(old_umask)
+            print(f"常驻进程已启动: {self.address}")
+        else:
+            class Server(socketserver.ThreadingMixIn, socketserver.TCPServer):
+                daemon_threads = True
+
+            self.server = Server(('127.0.0.1', 0), RequestHandler)
+            with open(self.address, 'w', encoding='utf-8') as f:
+                f.write(str(self.server.server_address[1]))
+            print(f"常驻进程已启动: 127.0.0.1:{self.server.server_address[1]}")
+
+        print("按 Ctrl+C 停止")
+        try:
+            self.server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.server.server_close()
+            if os.path.exists(self.address):
+                os.remove(self.address)
+            print("常驻进程已停止")
+
+
+class FileWatcher:
+    """以轮询方式监视文件变化
+
+    文件签名（修改时间、大小）变化后，等它稳定 debounce 秒再报告，
+    避免编辑器保存时分多次写入导致重复处理。
+    """
+
+    def __init__(self, watches, debounce=WATCH_DEBOUNCE):
+        self.watches = watches  # [(文件夹, 通配符)]
+        self.debounce = debounce
+        self.known = self._scan()
+        self.pending = {}  # 路径 -> (签名, 最近一次变化的时间)
+
+    def _scan(self):
+        files = {}
+        for folder, pattern in self.watches:
+            folder = Path(folder)
+            if not folder.is_dir():
+                continue
+            for path in folder.glob(pattern):
+                # 跳过Excel临时文件(~$)和锁文件(.)
+                if path.name.startswith(('~$', '.')):
+                    continue
+                files[str(path)] = file_signature(path)
+        return files
+
+    def poll(self):
+        """检查一次，返回已稳定的变化文件列表"""
+        now = time.monotonic()
+        current = self._scan()
+
+        for path, signature in current.items():
+            if self.known.get(path) == signature:
+                self.pending.pop(path, None)
+                continue
+            pending = self.pending.get(path)
+            if pending is None or pending[0] != signature:
+                self.pending[path] = (signature, now)
+
+        for path in [p for p in self.known if p not in current]:
+            del self.known[path]
+        # 等待稳定期间被删除的文件不再报告
+        for path in [p for p in self.pending if p not in current]:
+            del self.pending[path]
+
+        ready = [path for path, (_, changed_at) in self.pending.items() if now - changed_at >= self.debounce]
+        for path in ready:
+            self.known[path] = self.pending.pop(path)[0]
+        return [Path(path) for path in ready]
+
+    def absorb(self, saved_signatures):
+        """处理完一批变化后调用，忽略处理过程自身写入造成的变化
+
+        只忽略当前签名与本进程最后一次保存时相同的文件（saved_signatures 为 IO_STATS.saved_signatures()）；
+        处理期间别人保存的工作簿、CSV签名不同，仍会在下一轮被发现。
+        """
+        for path, signature in self._scan().items():
+            if signature is None or saved_signatures.get(os.path.abspath(path)) != signature:
+                continue
+            self.known[path] = signature
+            self.pending.pop(path, None)
+
+
+def watch():
+    """监视模式（python config.py --watch）
+
+    CSV保存后自动写回Excel，配置工作簿变化后自动重新导出相关CSV，
+    语言文件变化后增量刷新语言索引。
+    """
+    go.WORKBOOK_POOL.enabled = True
+    converter = ExcelToCSVConverter(TARGET_FOLDER, OUTPUT_FOLDER)
+    lang_folder = Path(go.TARGET_FOLDER)
+    get_language_index(lang_folder).refresh(force=True)
+
+    watches = [(converter.output_folder, '*.csv')]
+    for folder in (Path(TARGET_FOLDER), lang_folder):
+        watches.extend((folder, f"*{ext}") for ext in SUPPORTED_EXTENSIONS)
+    watcher = FileWatcher(watches)
+
+    print("Excel配置监视模式")
+    print(f"目标文件夹: {TARGET_FOLDER}")
+    print(f"语言文件夹: {lang_folder}")
+    print(f"CSV文件夹: {converter.output_folder}")
+    print("保存CSV后自动写回Excel，按 Ctrl+C 停止")
+    print()
+
+    try:
+        while True:
+            changed = watcher.poll()
+            if changed:
+                converter.handle_watch_changes(changed, lang_folder)
+                watcher.absorb(IO_STATS.saved_signatures())
+            time.sleep(WATCH_INTERVAL)
+    except KeyboardInterrupt:
+        print("监视已停止")
+
+
+def serve():
+    """启动常驻进程（python config.py serve）"""
+    try:
+        response = daemon_request('ping', timeout=5)
+    except DaemonRequestError as e:
+        print(f"❌ {e}，常驻进程可能已在运行但没有响应")
+        return
+    if response is not None:
+        print(f"常驻进程已在运行 (PID {response['result']['pid']})")
+        return
+
+    print("Excel配置工具常驻进程")
+    print(f"目标文件夹: {TARGET_FOLDER}")
+    print()
+    daemon = ConfigDaemon()
+    daemon.warm_up()
+    daemon.serve_forever()
+
+
+def execute_command(method, params, use_daemon=True):
+    """执行命令：常驻进程运行时交给它处理，否则在本进程中执行"""
+    if use_daemon:
+        try:
+            response = daemon_request(method, dict(params, cwd=str(Path.cwd())))
+        except DaemonRequestError as e:
+            # 请求已发出：命令可能已在常驻进程中执行，不在本地重复执行（如重编号执行两次会把ID换回去）
+            print_daemon_error(e)
+            return None
+        if response is not None:
+            handled, result = daemon_response_result(response)
+            if handled:
+                return result
+
+    converter = ExcelToCSVConverter(TARGET_FOLDER, OUTPUT_FOLDER)
+    return converter.run_command(method, params)
+
+
+def read_id_mapping(args):
+    """读取ID映射：旧ID=新ID 参数，或映射文件（每行 旧ID,新ID 或 旧ID=新ID，可有表头，# 开头为注释）
+
+    Returns:
+        dict: {旧ID: 新ID}；格式错误时返回None
+    """
+    from_file = len(args) == 1 and '=' not in args[0]
+    if from_file:
+        try:
+            with open(args[0], encoding='utf-8-sig') as f:
+                lines = f.read().splitlines()
+        except OSError as e:
+            print(f"读取映射文件失败: {e}")
+            return None
+    else:
+        lines = args
+
+    mapping = {}
+    for line_no, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        parts = [part.strip() for part in re.split(r'[=,\t]', line)]
+        if len(parts) != 2 or not all(parts):
+            print(f"映射格式错误（第{line_no}行）: {line}")
+            return None
+        if from_file and line_no == 1 and not ReferenceIndex.ID_PATTERN.match(parts[0]):
+            continue  # 表头
+        if mapping.get(parts[0], parts[1]) != parts[1]:
+            print(f"旧ID {parts[0]} 对应了多个新ID")
+            return None
+        mapping[parts[0]] = parts[1]
+    return mapping
+
+
+def print_usage():
+    print("Excel配置工具")
+    print("="*50)
+    print("使用方法:")
+    print("1. 导出Excel工作表为CSV:")
+    print("   py config.py filename[sheetname]")
+    print("   示例: py config.py hero[hero]")
+    print()
+    print("2. 将CSV文件写回Excel:")
+    print("   py config.py")
+    print("   (无参数，自动处理xls文件夹中的所有CSV文件)")
+    print()
+    print("3. 语言表:")
+    print("   py config.py search t_hero_getway*      搜索语言表（加 --limit N 最多显示N条）")
+    print("   py config.py lookup t_heronew_name500001")
+    print("   py config.py update-lang t_heronew_name500001 五竹")
+    print()
+    print("   py config.py refs 1001                  查找引用了该ID或t_*键的所有配置单元格")
+    print("   py config.py renumber heroSkill[heroskill] 1001=2001 1002=2002")
+    print("                                           批量修改ID并同步修改引用它的单元格")
+    print("                                           （也可指定映射文件，每行 旧ID,新ID；加 --dry-run 只列出不写入）")
+    print("   py config.py validate                   检查引用完整性（缺失、重复、未被引用），有问题时退出码为1")
+    print()
+    print("4. 常驻进程（保持索引常驻内存，命令毫秒级响应）:")
+    print("   py config.py serve     启动")
+    print("   py config.py stop      停止")
+    print("   py config.py status    查看状态")
+    print("   其他命令在常驻进程运行时自动交给它执行，加 --local 强制本地执行")
+    print()
+    print("5. 监视模式（保存CSV后自动写回，源表变化后自动重新导出）:")
+    print("   py config.py --watch")
+    print()
+    print("加 --timing 可在结束时显示启动耗时和各阶段耗时统计")
+    print("加 --profile 可为导出/写回的每个阶段保存cProfile数据（在 xls_report 文件夹）")
+    print("加 --io 可在结束时显示文件读写统计（打开次数、读写字节数、单元格数、缓存命中率）")
+    print("加 --quiet 不显示进度，加 --events 文件 将进度事件写入JSONL文件（供CI日志使用）")
+    print("加 --memory 可记录导出/写回各阶段的内存峰值，加 --memory-budget MB 超出内存预算后改为分块处理")
+    print("加 --frame-engine columnar 按列整体处理导出和比对（大表更快，输出相同）")
+    print("="*50)
+
 
 def main():
     """主函数"""
-    # 创建转换器实例
-    converter = ExcelToCSVConverter(TARGET_FOLDER, OUTPUT_FOLDER)
+    args = sys.argv[1:]
+    use_daemon = '--local' not in args
+    show_timing = '--timing' in args
+    # 导出和写回的分阶段统计、文件读写统计、进度显示选项
+    options = {'timing': show_timing, 'profile': '--profile' in args, 'io': '--io' in args,
+               'quiet': '--quiet' in args, 'memory': '--memory' in args, 'dry_run': '--dry-run' in args}
+    if '--memory-budget' in args:
+        # --memory-budget MB: 内存预算
+        position = args.index('--memory-budget')
+        try:
+            options['memory_budget'] = float(args[position + 1])
+        except (IndexError, ValueError):
+            print("--memory-budget 需要指定内存预算（MB）")
+            return
+        del args[position:position + 2]
+    if '--frame-engine' in args:
+        # --frame-engine 名称: 表格引擎
+        position = args.index('--frame-engine')
+        if position + 1 >= len(args) or args[position + 1] not in FRAME_ENGINES:
+            print(f"--frame-engine 需要指定表格引擎: {' / '.join(FRAME_ENGINES)}")
+            return
+        options['frame_engine'] = args[position + 1]
+        del args[position:position + 2]
+    if '--limit' in args:
+        # --limit N: 搜索时最多显示N条结果
+        position = args.index('--limit')
+        try:
+            options['limit'] = int(args[position + 1])
+        except (IndexError, ValueError):
+            print("--limit 需要指定结果条数")
+            return
+        del args[position:position + 2]
+    if '--events' in args:
+        # --events 文件: 进度事件写入JSONL文件
+        position = args.index('--events')
+        if position + 1 >= len(args):
+            print("--events 需要指定文件路径")
+            return
+        options['events'] = str(Path(args.pop(position + 1)).resolve())
+        args.pop(position)
+    args = [arg for arg in args
+            if arg not in ('--local', '--timing', '--profile', '--io', '--quiet', '--memory', '--dry-run')]
+
+    loaded_at = time.perf_counter()
+    try:
+        run_main(args, use_daemon, options)
+    finally:
+        if show_timing:
+            print_timing_report(_STARTED_AT, loaded_at)
+
+
+def run_main(args, use_daemon, options):
+    if args == ['serve']:
+        serve()
+        return
+
+    if args == ['--watch']:
+        watch()
+        return
+
+    if args in (['stop'], ['status']):
+        try:
+            response = daemon_request('shutdown' if args == ['stop'] else 'ping', timeout=5)
+        except DaemonRequestError as e:
+            print(f"❌ {e}")
+            return
+        if response is None:
+            print("常驻进程未运行")
+        elif args == ['stop']:
+            print("常驻进程已停止")
+        else:
+            print(json.dumps(response['result'], ensure_ascii=False, indent=2))
+        return
 
-    # 检查命令行参数
-    if len(sys.argv) == 1:
+    if not args:
         # 没有参数，执行CSV到Excel的更新操作
         print("Excel更新工具")
         print(f"目标文件夹: {TARGET_FOLDER}")
-        print(f"CSV文件夹: {converter.output_folder}")
-        print(f"基线文件夹: {converter.base_folder}")
+        print(f"CSV文件夹: {Path.cwd() / OUTPUT_FOLDER}")
+        print(f"基线文件夹: {Path.cwd() / BASE_FOLDER}")
         print()
 
-        success = converter.update_excel_from_csv()
+        execute_command('sync', dict(options), use_daemon)
+
+    elif len(args) == 2 and args[0] in ('search', 'lookup', 'refs'):
+        if args[0] == 'search':
+            execute_command('search', dict(options, text=args[1].strip('"')), use_daemon)
+        elif args[0] == 'refs':
+            execute_command('refs', dict(options, key=args[1].strip('"')), use_daemon)
+        else:
+            execute_command('lookup', dict(options, t_id=args[1]), use_daemon)
+
+    elif args == ['validate']:
+        counts = execute_command('validate', dict(options), use_daemon)
+        if not counts or counts['missing'] or counts['duplicates'] or counts['errors']:
+            sys.exit(1)
 
-        # success 结果已在 update_excel_from_csv 中显示
+    elif len(args) >= 3 and args[0] == 'renumber':
+        mapping = read_id_mapping(args[2:])
+        if mapping is not None:
+            execute_command('renumber', dict(options, table=args[1], mapping=mapping), use_daemon)
 
-    elif len(sys.argv) == 2:
+    elif len(args) == 3 and args[0] == 'update-lang':
+        execute_command('update-lang', dict(options, t_id=args[1], text=args[2]), use_daemon)
+
+    elif len(args) == 1:
         # 有一个参数，执行Excel到CSV的导出操作
-        command = sys.argv[1]
+        command = args[0]
 
         print("Excel导出工具")
         print(f"目标文件夹: {TARGET_FOLDER}")
@@ -1515,25 +2989,11 @@ def main():
         print(f"执行: {command}")
         print()
 
-        success = converter.convert(command)
-
-        if success:
-            print("✅ 导出完成")
-        else:
-            print("❌ 导出失败")
+        execute_command('export', dict(options, command=command), use_daemon)
     else:
         # 参数错误
-        print("Excel配置工具")
-        print("="*50)
-        print("使用方法:")
-        print("1. 导出Excel工作表为CSV:")
-        print("   py config.py filename[sheetname]")
-        print("   示例: py config.py hero[hero]")
-        print()
-        print("2. 将CSV文件写回Excel:")
-        print("   py config.py")
-        print("   (无参数，自动处理xls文件夹中的所有CSV文件)")
-        print("="*50)
+        print_usage()
+
 
 if __name__ == "__main__":
     main()
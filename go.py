@@ -5,15 +5,53 @@ Excel文本替换工具
 用于批量替换Excel文件中的文本内容，保持原有格式不变
 """
 
+import time
+_STARTED_AT = time.perf_counter()
+
 import os
 import sys
+import json
+import socket
+import getpass
+import tempfile
+import importlib
+import threading
+from collections import namedtuple
+from itertools import islice
+from contextlib import contextmanager, nullcontext, redirect_stdout
 from pathlib import Path
-import openpyxl
-from openpyxl.styles import Font, PatternFill, Border, Side, Alignment
-import xlrd
-import xlwt
 
-from datetime import datetime
+from datetime import datetime, date as date_type, time as time_type, timedelta
+
+
+# 第三方依赖的导入耗时（毫秒）：{模块名: 耗时}
+IMPORT_TIMINGS = {}
+
+
+class LazyModule:
+    """按需导入的模块代理
+
+    第一次访问属性时才真正导入模块，使不读写Excel的代码路径（帮助信息、
+    常驻进程客户端等）不必为openpyxl/xlrd/pandas等依赖付出导入时间。
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            start = time.perf_counter()
+            module = importlib.import_module(self._name)
+            if self._name not in IMPORT_TIMINGS:
+                IMPORT_TIMINGS[self._name] = (time.perf_counter() - start) * 1000
+            self._module = module
+        return getattr(self._module, attr)
+
+
+openpyxl = LazyModule('openpyxl')
+xlrd = LazyModule('xlrd')
+xlwt = LazyModule('xlwt')
 
 # ==================== 配置区域 ====================
 # 目标文件夹路径配置
@@ -47,19 +85,1550 @@ REPLACEMENT_CONFIG = {
 
 # 支持的文件扩展名
 SUPPORTED_EXTENSIONS = ['.xlsx', '.xls']
+
+# 只读扫描（搜索、语言索引、替换前的扫描、关联查找表、工作簿目录、引用索引、导出读取工作表）使用的读取引擎：
+# 'default' 使用 xlrd(.xls) / openpyxl(.xlsx)；'calamine' 使用 python-calamine（pip install python-calamine）；
+# 'auto' 安装了 python-calamine 时使用它，否则使用默认引擎。导出读取工作表时 pandas 2.2 以上才支持 calamine，
+# 更早的版本仍用默认引擎读取。写入工作簿仍使用 xlrd+xlwt / openpyxl
+READER_ENGINE = 'default'
+
+# 工作簿锁配置（多人同时运行 config.py / go.py 时保护同一个工作簿）
+LOCK_TIMEOUT = 60           # 等待锁的最长时间（秒）
+LOCK_STALE_SECONDS = 600    # 无法确认持有进程是否存活时，超过该时长的锁文件视为失效
+LOCK_POLL_INTERVAL = 0.1    # 等待锁时的轮询间隔（秒）
+
+# 语言索引检查文件变化的最小间隔（秒），本进程内的写入会立即生效
+LANG_INDEX_CHECK_INTERVAL = 1.0
+# 索引和缓存文件保存在当前用户自己的缓存文件夹中（不写入共享的配置、语言文件夹，
+# 也不会加载别人放在共享文件夹中的pickle文件），每个工作文件夹对应其中一个子文件夹（文件夹名加完整路径的哈希）
+CACHE_FOLDER = os.path.join(os.environ.get('LOCALAPPDATA') or os.path.join(os.path.expanduser('~'), '.cache'),
+                            'qyn_config')
+
+# 语言索引保存文件（在语言文件夹对应的缓存文件夹下）：保存各文件的条目和中文的二字索引，下次只重新读取变化过的文件；
+# 存在时 go.py 搜索直接查索引，替换前用它找出含有替换文本的文件。设为None则不保存
+LANG_INDEX_FILE = "lang_index.pickle"
+
+# 工作簿目录保存文件（在工作簿所在文件夹对应的缓存文件夹下）：每个工作簿的工作表、表头、列序号和行列数，
+# 检查工作表是否存在、查找列时不必打开工作簿。设为None则不保存
+WORKBOOK_CATALOG_FILE = "workbook_catalog.pickle"
+
+# 工作表影子缓存文件夹（在工作簿所在文件夹对应的缓存文件夹下）：按工作簿签名保存各工作表的读取结果
+# （DataFrame、关联查找表），工作簿没有变化时直接读缓存，不再解析Excel文件。设为None则不使用
+SHADOW_CACHE_FOLDER = "shadow_cache"
+
+# 常驻进程（python config.py serve）的本地套接字地址
+# 不支持Unix套接字的系统上，该文件中保存常驻进程监听的本机TCP端口
+DAEMON_ADDRESS = os.path.join(tempfile.gettempdir(), f"qyn_config_{getpass.getuser()}.sock")
+DAEMON_TIMEOUT = 600  # 客户端等待常驻进程响应的最长时间（秒）
+
+# 进度显示的最短刷新间隔（秒）
+PROGRESS_INTERVAL = 0.5
+
+# 替换时并行处理的进程数，1为逐个文件处理；也可在命令行用 --jobs N 指定
+REPLACE_JOBS = 1
+
+# 搜索时并行搜索的进程数，1为逐个文件搜索；也可在命令行用 --jobs N 指定
+SEARCH_JOBS = 4
+
+# 待搜索文件的总大小（字节）小于该值时逐个文件搜索，不启动进程池（进程启动比搜索本身还慢）
+SEARCH_PARALLEL_MIN_SIZE = 20 * 1024 * 1024
+
+# 并行搜索时工作进程每找到多少条结果发送一次，结果边搜边显示
+SEARCH_STREAM_BATCH = 200
+
+# 增量替换记录文件（在工作文件夹对应的缓存文件夹下，每个用户各自一份）：再次运行时跳过未变化的文件，
+# 规则只新增时已处理的行只应用新增规则；设为None则每次全部重新替换，也可在命令行用 --full 本次全部重新替换
+REPLACE_STATE_FILE = "replace_state.json"
+
+# 详细替换记录、搜索结果在终端最多显示的条数；完整记录用 --report 文件 保存（.jsonl 或 .csv）
+PRINT_RECORD_LIMIT = 500
 # ================================================
 
+
+class WorkbookLockTimeout(Exception):
+    """等待工作簿锁超时"""
+
+
+class DaemonRequestError(Exception):
+    """请求已发给常驻进程，但没有收到有效的响应（命令可能已经执行，不能再在本地重新执行）"""
+
+
+# 进程内的锁状态：{工作簿路径: {'mutex', 'owner', 'depth', 'shared'}}
+_lock_states = {}
+_lock_states_guard = threading.Lock()
+_lock_local = threading.local()
+
+
+def _pid_alive(pid):
+    """检查本机进程是否仍在运行"""
+    if pid == os.getpid():
+        return True
+    if os.name == 'nt':
+        # Windows 上 os.kill(pid, 0) 会发送 CTRL_C_EVENT，改用 OpenProcess 查询
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return False
+        exit_code = ctypes.c_ulong()
+        kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code))
+        kernel32.CloseHandle(handle)
+        return exit_code.value == 259  # STILL_ACTIVE
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _lock_file_is_stale(lock_path):
+    """判断锁文件是否已失效（持有进程已退出，或超过失效时长）"""
+    try:
+        with open(lock_path, 'r', encoding='utf-8') as f:
+            owner = json.load(f)
+        if owner.get('host') == socket.gethostname():
+            return not _pid_alive(int(owner.get('pid', -1)))
+        return time.time() - float(owner.get('time', 0)) > LOCK_STALE_SECONDS
+    except FileNotFoundError:
+        return False
+    except (ValueError, OSError):
+        # 锁文件正在写入或内容损坏，按修改时间判断
+        try:
+            return time.time() - os.path.getmtime(lock_path) > LOCK_STALE_SECONDS
+        except OSError:
+            return False
+
+
+def _create_lock_file(lock_path, mode):
+    """原子地创建锁文件并写入持有者信息，已存在时返回False"""
+    try:
+        fd = os.open(str(lock_path), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        return False
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump({
+            'pid': os.getpid(),
+            'host': socket.gethostname(),
+            'thread': threading.get_ident(),
+            'mode': mode,
+            'time': time.time(),
+        }, f)
+    return True
+
+
+def _remove_lock_file(lock_path):
+    try:
+        os.remove(lock_path)
+    except FileNotFoundError:
+        pass
+
+
+def _lock_paths(workbook_path):
+    """返回 (排他锁文件, 本进程共享锁文件, 共享锁文件通配符)"""
+    workbook_path = Path(workbook_path)
+    folder, name = workbook_path.parent, workbook_path.name
+    return (folder / f".{name}.lock",
+            folder / f".{name}.{os.getpid()}.rlock",
+            f".{name}.*.rlock")
+
+
+def _get_lock_state(key):
+    with _lock_states_guard:
+        if key not in _lock_states:
+            _lock_states[key] = {'mutex': threading.Lock(), 'owner': None, 'depth': 0, 'shared': 0}
+        return _lock_states[key]
+
+
+def _thread_shared_counts():
+    if not hasattr(_lock_local, 'shared'):
+        _lock_local.shared = {}
+    return _lock_local.shared
+
+
+def _acquire_exclusive(key, timeout):
+    state = _get_lock_state(key)
+    me = threading.get_ident()
+    if state['owner'] == me:
+        state['depth'] += 1
+        return
+
+    lock_path, own_reader_path, reader_glob = _lock_paths(key)
+    deadline = time.monotonic() + timeout
+
+    # 1. 抢占排他锁文件
+    while not _create_lock_file(lock_path, 'exclusive'):
+        if _lock_file_is_stale(lock_path):
+            print(f"  清理失效的锁文件: {lock_path.name}")
+            _remove_lock_file(lock_path)
+            continue
+        if time.monotonic() > deadline:
+            raise WorkbookLockTimeout(f"等待工作簿锁超时: {Path(key).name} (被其他进程占用)")
+        time.sleep(LOCK_POLL_INTERVAL)
+
+    # 2. 等待其他读者释放共享锁（本线程自身持有的共享锁不阻塞升级）
+    while True:
+        own_only = _thread_shared_counts().get(key, 0) == state['shared'] > 0
+        readers = []
+        for reader_path in lock_path.parent.glob(reader_glob):
+            if own_only and reader_path == own_reader_path:
+                continue
+            if _lock_file_is_stale(reader_path):
+                _remove_lock_file(reader_path)
+                continue
+            readers.append(reader_path)
+        if not readers:
+            break
+        if time.monotonic() > deadline:
+            _remove_lock_file(lock_path)
+            raise WorkbookLockTimeout(f"等待工作簿锁超时: {Path(key).name} (仍有 {len(readers)} 个读者)")
+        time.sleep(LOCK_POLL_INTERVAL)
+
+    state['owner'] = me
+    state['depth'] = 1
+
+
+def _release_exclusive(key):
+    state = _get_lock_state(key)
+    state['depth'] -= 1
+    if state['depth'] == 0:
+        state['owner'] = None
+        # 排他锁意味着文件可能已被修改，先清除缓存再放行其他进程
+        invalidate_workbook_caches(key)
+        _remove_lock_file(_lock_paths(key)[0])
+
+
+def _acquire_shared(key, timeout):
+    state = _get_lock_state(key)
+    counts = _thread_shared_counts()
+    if state['owner'] == threading.get_ident():
+        # 已持有排他锁，共享访问直接放行
+        state['depth'] += 1
+        return 'exclusive'
+
+    lock_path, own_reader_path, _ = _lock_paths(key)
+    deadline = time.monotonic() + timeout
+
+    with state['mutex']:
+        if state['shared'] == 0:
+            # 本进程第一个读者负责创建共享锁文件
+            while True:
+                if lock_path.exists():
+                    if _lock_file_is_stale(lock_path):
+                        _remove_lock_file(lock_path)
+                        continue
+                else:
+                    _remove_lock_file(own_reader_path)
+                    _create_lock_file(own_reader_path, 'shared')
+                    # 创建后再次确认没有写者抢先，避免与写者的检查交错
+                    if not lock_path.exists():
+                        break
+                    _remove_lock_file(own_reader_path)
+                if time.monotonic() > deadline:
+                    raise WorkbookLockTimeout(f"等待工作簿共享锁超时: {Path(key).name}")
+                time.sleep(LOCK_POLL_INTERVAL)
+        state['shared'] += 1
+        counts[key] = counts.get(key, 0) + 1
+    return 'shared'
+
+
+def _release_shared(key, mode):
+    if mode == 'exclusive':
+        _release_exclusive(key)
+        return
+    state = _get_lock_state(key)
+    counts = _thread_shared_counts()
+    with state['mutex']:
+        state['shared'] -= 1
+        counts[key] -= 1
+        if state['shared'] == 0:
+            _remove_lock_file(_lock_paths(key)[1])
+
+
+@contextmanager
+def workbook_lock(workbook_path, shared=False, timeout=None):
+    """工作簿级别的咨询锁
+
+    排他锁用于读-改-写操作，共享锁用于只读扫描。锁文件与工作簿放在同一目录，
+    记录持有者的PID、主机名和时间；持有进程退出后遗留的锁文件会被自动清理。
+    同一线程内可重入，持有排他锁时再申请共享锁直接放行。
+
+    Args:
+        workbook_path: 工作簿路径
+        shared: True为共享锁（读），False为排他锁（写）
+        timeout: 等待超时秒数，默认使用LOCK_TIMEOUT
+
+    Raises:
+        WorkbookLockTimeout: 超时仍未获得锁
+    """
+    key = str(Path(workbook_path).resolve())
+    if timeout is None:
+        timeout = LOCK_TIMEOUT
+
+    if shared:
+        mode = _acquire_shared(key, timeout)
+        try:
+            yield
+        finally:
+            _release_shared(key, mode)
+    else:
+        _acquire_exclusive(key, timeout)
+        try:
+            yield
+        finally:
+            _release_exclusive(key)
+
+
+class IOStats:
+    """文件读写统计
+
+    go.py 和 config.py 中所有工作簿、CSV的打开和保存都经过 open_xls / load_xlsx / save_workbook
+    （config.py 中为 read_csv / write_csv / read_excel_frame）登记到这里：每个文件的打开次数、
+    读取和写入字节数、读写单元格数，以及各内存缓存的命中情况。同一文件被反复打开时可以直接看出来。
+    """
+
+    FIELDS = ('opens', 'bytes_read', 'saves', 'bytes_written', 'cells_read', 'cells_written')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.files = {}   # 文件路径 -> {字段: 计数}
+        self.caches = {}  # 缓存名 -> {'hits': 命中数, 'misses': 未命中数}
+        self.saved = {}   # 文件路径 -> 本进程最近一次保存后的文件签名（监视模式据此区分自己写入和别人的修改）
+
+    def _file(self, file_path):
+        key = os.path.abspath(file_path)
+        if key not in self.files:
+            self.files[key] = dict.fromkeys(self.FIELDS, 0)
+        return self.files[key]
+
+    def record_open(self, file_path):
+        """登记一次打开（读取整个文件）"""
+        size = os.path.getsize(file_path) if os.path.exists(file_path) else 0
+        with self._lock:
+            counts = self._file(file_path)
+            counts['opens'] += 1
+            counts['bytes_read'] += size
+
+    def record_save(self, file_path):
+        """登记一次保存（写入整个文件）"""
+        size = os.path.getsize(file_path) if os.path.exists(file_path) else 0
+        signature = file_signature(file_path)
+        with self._lock:
+            counts = self._file(file_path)
+            counts['saves'] += 1
+            counts['bytes_written'] += size
+            self.saved[os.path.abspath(file_path)] = signature
+
+    def saved_signatures(self):
+        """{文件路径: 本进程最近一次保存后的文件签名}"""
+        with self._lock:
+            return dict(self.saved)
+
+    def record_cells(self, file_path, read=0, written=0):
+        """登记读取、写入的单元格数"""
+        with self._lock:
+            counts = self._file(file_path)
+            counts['cells_read'] += read
+            counts['cells_written'] += written
+
+    def record_cache(self, name, hit):
+        """登记一次缓存查询"""
+        with self._lock:
+            counts = self.caches.setdefault(name, {'hits': 0, 'misses': 0})
+            counts['hits' if hit else 'misses'] += 1
+
+    def snapshot(self):
+        """当前统计的副本 {'files': {...}, 'caches': {...}}"""
+        with self._lock:
+            return {
+                'files': {key: dict(counts) for key, counts in self.files.items()},
+                'caches': {name: dict(counts) for name, counts in self.caches.items()},
+            }
+
+    def summary(self):
+        """汇总统计（常驻进程 status 使用）"""
+        return io_summary(self.snapshot())
+
+    def merge(self, snapshot):
+        """并入另一个进程的统计快照（并行替换的工作进程）"""
+        with self._lock:
+            for key, counts in snapshot['files'].items():
+                target = self._file(key)
+                for field, value in counts.items():
+                    target[field] = target.get(field, 0) + value
+            for name, counts in snapshot['caches'].items():
+                target = self.caches.setdefault(name, {'hits': 0, 'misses': 0})
+                for field, value in counts.items():
+                    target[field] = target.get(field, 0) + value
+
+
+def io_delta(before, after):
+    """两次 IOStats.snapshot() 之间的增量"""
+    delta = {'files': {}, 'caches': {}}
+    for key, counts in after['files'].items():
+        old = before['files'].get(key, {})
+        changed = {field: value - old.get(field, 0) for field, value in counts.items()}
+        if any(changed.values()):
+            delta['files'][key] = changed
+    for name, counts in after['caches'].items():
+        old = before['caches'].get(name, {})
+        changed = {field: value - old.get(field, 0) for field, value in counts.items()}
+        if any(changed.values()):
+            delta['caches'][name] = changed
+    return delta
+
+
+def io_summary(snapshot):
+    """把快照汇总为总数和缓存命中率"""
+    totals = dict.fromkeys(IOStats.FIELDS, 0)
+    for counts in snapshot['files'].values():
+        for field in IOStats.FIELDS:
+            totals[field] += counts.get(field, 0)
+    totals['files'] = len(snapshot['files'])
+
+    caches = {}
+    for name, counts in snapshot['caches'].items():
+        lookups = counts['hits'] + counts['misses']
+        caches[name] = dict(counts, hit_rate=round(counts['hits'] / lookups, 3) if lookups else None)
+    totals['caches'] = caches
+    return totals
+
+
+def print_io_report(snapshot, top=20):
+    """打印文件读写统计（--io）"""
+    totals = io_summary(snapshot)
+    print()
+    print("="*60)
+    print("文件读写统计")
+    print("="*60)
+    if not snapshot['files'] and not snapshot['caches']:
+        print("  本次运行没有读写文件")
+        return
+
+    files = sorted(snapshot['files'].items(),
+                   key=lambda item: (item[1]['opens'] + item[1]['saves'], item[1]['bytes_read']), reverse=True)
+    for file_path, counts in files[:top]:
+        file_path = Path(file_path)
+        print(f"  {file_path.parent.name}/{file_path.name}: 打开 {counts['opens']} 次 / 读 {counts['bytes_read'] / 1024:.1f} KB, "
+              f"保存 {counts['saves']} 次 / 写 {counts['bytes_written'] / 1024:.1f} KB, "
+              f"单元格 读 {counts['cells_read']} / 写 {counts['cells_written']}")
+    if len(files) > top:
+        print(f"  ...（另有 {len(files) - top} 个文件）")
+
+    print(f"  合计: {totals['files']} 个文件, 打开 {totals['opens']} 次, 读 {totals['bytes_read'] / 1024:.1f} KB, "
+          f"保存 {totals['saves']} 次, 写 {totals['bytes_written'] / 1024:.1f} KB, "
+          f"单元格 读 {totals['cells_read']} / 写 {totals['cells_written']}")
+    for name, counts in totals['caches'].items():
+        hit_rate = f"{counts['hit_rate'] * 100:.1f}%" if counts['hit_rate'] is not None else "-"
+        print(f"  缓存 {name}: 命中 {counts['hits']} / 未命中 {counts['misses']}（命中率 {hit_rate}）")
+
+
+IO_STATS = IOStats()
+
+
+def open_xls(file_path, **kwargs):
+    """打开.xls工作簿（计入读写统计）"""
+    book = xlrd.open_workbook(str(file_path), **kwargs)
+    IO_STATS.record_open(file_path)
+    return book
+
+
+def load_xlsx(file_path, **kwargs):
+    """打开.xlsx工作簿（计入读写统计）"""
+    workbook = openpyxl.load_workbook(file_path, **kwargs)
+    IO_STATS.record_open(file_path)
+    return workbook
+
+
+def xls_cell_count(book):
+    """.xls工作簿的单元格总数（整表重写时全部计入读写）"""
+    return sum(sheet.nrows * sheet.ncols for sheet in book.sheets())
+
+
+def save_workbook(workbook, file_path):
+    """保存 openpyxl / xlwt 工作簿（计入读写统计）"""
+    workbook.save(str(file_path))
+    IO_STATS.record_save(file_path)
+
+
+def file_signature(file_path):
+    """文件签名 (修改时间, 大小)，用于判断缓存是否过期"""
+    try:
+        st = os.stat(file_path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+class WorkbookPool:
+    """已解析的.xls工作簿缓存
+
+    常驻进程中启用，按文件签名校验，文件变化后自动重新读取。
+    未启用时每次都重新打开文件，行为与直接调用xlrd相同。
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self._books = {}  # 文件路径 -> (文件签名, xlrd.Book)
+        self._lock = threading.Lock()
+
+    def open_xls(self, file_path):
+        if not self.enabled:
+            return open_xls(file_path)
+
+        key = str(Path(file_path).resolve())
+        signature = file_signature(key)
+        with self._lock:
+            cached = self._books.get(key)
+            if cached and cached[0] == signature:
+                IO_STATS.record_cache('workbook_pool', True)
+                return cached[1]
+
+        IO_STATS.record_cache('workbook_pool', False)
+        book = open_xls(file_path)
+        with self._lock:
+            self._books[key] = (signature, book)
+        return book
+
+    def invalidate(self, file_path):
+        with self._lock:
+            self._books.pop(str(Path(file_path).resolve()), None)
+
+    def __len__(self):
+        return len(self._books)
+
+
+WORKBOOK_POOL = WorkbookPool()
+
+_calamine_installed = None
+
+
+def reader_engine():
+    """实际使用的只读读取引擎：'calamine' 或 'default'"""
+    global _calamine_installed
+    if READER_ENGINE != 'auto':
+        return READER_ENGINE
+    if _calamine_installed is None:
+        import importlib.util
+        _calamine_installed = importlib.util.find_spec('python_calamine') is not None
+    return 'calamine' if _calamine_installed else 'default'
+
+
+class WorkbookReader:
+    """只读读取工作簿，所有只读扫描共用
+
+    引擎由 reader_engine() 决定。python-calamine 读出的值按默认引擎的约定转换，扫描结果与默认引擎相同：
+    .xls 空单元格为''、数字（含日期）为float、布尔为0/1；.xlsx 空单元格为None、整数值为int。
+    每行为该行所有列的值，行序号从0开始与工作表的行对应；.xlsx 不信任文件中记录的表格范围，逐行读到末尾。
+
+    用法:
+        with WorkbookReader(file_path) as reader:
+            for sheet_name in reader.sheet_names:
+                for row in reader.rows(sheet_name):
+                    ...
+    """
+
+    def __init__(self, file_path, pooled=False, engine=None):
+        """
+        Args:
+            pooled: .xls 使用默认引擎时从 WORKBOOK_POOL 取已解析的工作簿（常驻进程中复用）
+            engine: 指定引擎，默认为 reader_engine()
+        """
+        self.file_path = Path(file_path)
+        self.is_xls = self.file_path.suffix.lower() == '.xls'
+        self.engine = engine or reader_engine()
+        self.pooled = pooled
+        if self.engine == 'calamine':
+            from python_calamine import CalamineWorkbook
+            self._book = CalamineWorkbook.from_path(str(self.file_path))
+            IO_STATS.record_open(self.file_path)
+            self.sheet_names = list(self._book.sheet_names)
+        elif self.is_xls:
+            # 不复用时按需加载工作表，读完一个工作表即释放
+            self._book = WORKBOOK_POOL.open_xls(self.file_path) if pooled else open_xls(self.file_path, on_demand=True)
+            self.sheet_names = self._book.sheet_names()
+        else:
+            self._book = load_xlsx(self.file_path, read_only=True)
+            self.sheet_names = list(self._book.sheetnames)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        if self.engine == 'calamine':
+            close = getattr(self._book, 'close', None)
+            if close:
+                close()
+        elif not self.is_xls:
+            self._book.close()
+        elif not self.pooled:
+            self._book.release_resources()
+
+    def rows(self, sheet_name):
+        """逐行返回工作表中每行的值"""
+        if self.engine == 'calamine':
+            convert = self._xls_value if self.is_xls else self._xlsx_value
+            for row in self._book.get_sheet_by_name(sheet_name).to_python(skip_empty_area=False):
+                row = [convert(value) for value in row]
+                if not self.is_xls:
+                    # python-calamine 把每行补齐到工作表的宽度，openpyxl 的行到最后一个单元格为止
+                    while row and row[-1] is None:
+                        row.pop()
+                yield row
+        elif self.is_xls:
+            sheet_index = self.sheet_names.index(sheet_name)
+            sheet = self._book.sheet_by_index(sheet_index)
+            for row_idx in range(sheet.nrows):
+                yield sheet.row_values(row_idx)
+            if not self.pooled:
+                self._book.unload_sheet(sheet_index)
+        else:
+            sheet = self._book[sheet_name]
+            # 部分导出工具写入的尺寸信息不准确，只读模式下会漏读行
+            sheet.reset_dimensions()
+            yield from sheet.iter_rows(values_only=True)
+
+    @staticmethod
+    def _xls_value(value):
+        """python-calamine 的值转换为 xlrd 的约定"""
+        if isinstance(value, bool):
+            return int(value)
+        if isinstance(value, int):
+            return float(value)
+        if isinstance(value, (datetime, date_type, time_type, timedelta)):
+            return WorkbookReader._excel_serial(value)
+        return value
+
+    @staticmethod
+    def _xlsx_value(value):
+        """python-calamine 的值转换为 openpyxl 的约定"""
+        if isinstance(value, str) and value == '':
+            return None
+        if isinstance(value, float) and value.is_integer():
+            return int(value)
+        if type(value) is date_type:
+            # openpyxl 读出的日期都是 datetime
+            return datetime(value.year, value.month, value.day)
+        return value
+
+    @staticmethod
+    def _excel_serial(value):
+        """日期时间转换为Excel的日期序列号（1900日期系统）"""
+        if isinstance(value, timedelta):
+            return value.total_seconds() / 86400
+        if isinstance(value, time_type):
+            return (value.hour * 3600 + value.minute * 60 + value.second + value.microsecond / 1e6) / 86400
+        if not isinstance(value, datetime):
+            value = datetime(value.year, value.month, value.day)
+        return (value - datetime(1899, 12, 30)).total_seconds() / 86400
+
+# 预预处理关联查找表缓存：(文件, 工作表, 匹配列, 返回列) -> (文件签名, {匹配值: 返回值})
+_lookup_tables = {}
+_lookup_tables_lock = threading.Lock()
+_lookup_tables_build_lock = threading.Lock()
+
+# 语言索引：语言文件夹 -> LanguageIndex
+_language_indexes = {}
+_language_indexes_lock = threading.Lock()
+
+# 工作簿目录：文件夹 -> WorkbookCatalog
+_workbook_catalogs = {}
+_workbook_catalogs_lock = threading.Lock()
+
+
+class ShadowCache:
+    """工作表影子缓存
+
+    把工作表的读取结果（pandas DataFrame、关联查找表）按 (工作簿, 工作表) 保存为pickle文件，
+    以工作簿签名（修改时间、大小）校验，读取引擎不同的结果分开保存。工作簿没有变化时直接读缓存文件，
+    变化后第一次读取时重新解析并覆盖。
+    缓存文件放在工作簿所在文件夹对应的缓存文件夹（见 cache_folder）下的 SHADOW_CACHE_FOLDER 中，
+    本用户的多个进程、多次运行共用。
+    """
+
+    VERSION = 1
+
+    def __init__(self, file_path):
+        self.file_path = Path(file_path)
+        self.folder = cache_folder(self.file_path.parent) / SHADOW_CACHE_FOLDER if SHADOW_CACHE_FOLDER else None
+
+    def get(self, kind, key, build):
+        """返回缓存的读取结果；缓存不存在或工作簿已变化时调用 build() 重新读取并保存
+
+        Args:
+            kind: 结果类型，如 frame / lookup
+            key: 工作表名等，与 kind 一起区分同一工作簿的不同结果
+            build: 读取函数；返回None时不保存
+        """
+        signature = file_signature(self.file_path)
+        if self.folder is None or signature is None:
+            return build()
+
+        # 不同读取引擎读出的结果分开缓存
+        key = (key, reader_engine())
+        cache_path = self.folder / (_safe_filename(f"{self.file_path.name}[{key[0]}]") + f".{key[1]}.{kind}.pickle")
+        saved = load_cache_file(cache_path, self.VERSION, "影子缓存")
+        if saved is not None and saved.get('key') == (kind, key) and saved.get('signature') == signature:
+            IO_STATS.record_cache('shadow_cache', True)
+            IO_STATS.record_open(cache_path)
+            return saved['data']
+
+        IO_STATS.record_cache('shadow_cache', False)
+        data = build()
+        # 读取期间工作簿被修改时不保存
+        if data is None or file_signature(self.file_path) != signature:
+            return data
+        if save_cache_file(cache_path, self.VERSION, "影子缓存", key=(kind, key), signature=signature, data=data):
+            IO_STATS.record_save(cache_path)
+        return data
+
+
+def invalidate_workbook_caches(workbook_path):
+    """工作簿被修改后清除与之相关的所有内存缓存"""
+    key = str(Path(workbook_path).resolve())
+    WORKBOOK_POOL.invalidate(key)
+    with _lookup_tables_lock:
+        for table_key in [k for k in _lookup_tables if k[0] == key]:
+            del _lookup_tables[table_key]
+    with _language_indexes_lock:
+        indexes = list(_language_indexes.values())
+    for index in indexes:
+        index.invalidate(key)
+
+
+def get_language_index(directory):
+    """获取语言文件夹对应的语言索引（同一进程内共享）"""
+    key = str(Path(directory).resolve())
+    with _language_indexes_lock:
+        if key not in _language_indexes:
+            _language_indexes[key] = LanguageIndex(key)
+        return _language_indexes[key]
+
+
+def get_workbook_catalog(directory):
+    """获取文件夹对应的工作簿目录（同一进程内共享）"""
+    key = str(Path(directory).resolve())
+    with _workbook_catalogs_lock:
+        if key not in _workbook_catalogs:
+            _workbook_catalogs[key] = WorkbookCatalog(key)
+        return _workbook_catalogs[key]
+
+
+def _daemon_connect(timeout):
+    """连接常驻进程，未运行时返回None"""
+    if hasattr(socket, 'AF_UNIX'):
+        if not os.path.exists(DAEMON_ADDRESS):
+            return None
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        address = DAEMON_ADDRESS
+    else:
+        try:
+            with open(DAEMON_ADDRESS, 'r', encoding='utf-8') as f:
+                address = ('127.0.0.1', int(f.read().strip()))
+        except (OSError, ValueError):
+            return None
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+
+    sock.settimeout(timeout)
+    try:
+        sock.connect(address)
+    except OSError:
+        sock.close()
+        return None
+    return sock
+
+
+def daemon_request(method, params=None, timeout=None):
+    """向常驻进程发送一条JSON-RPC请求
+
+    Returns:
+        dict: JSON-RPC响应；连接不上常驻进程（未运行）时返回None
+
+    Raises:
+        DaemonRequestError: 连接后发送或等待响应出错、超时、响应为空或格式错误
+    """
+    sock = _daemon_connect(DAEMON_TIMEOUT if timeout is None else timeout)
+    if sock is None:
+        return None
+
+    request = {'jsonrpc': '2.0', 'id': os.getpid(), 'method': method, 'params': params or {}}
+    try:
+        with sock, sock.makefile('rwb') as stream:
+            stream.write(json.dumps(request, ensure_ascii=False).encode('utf-8') + b'\n')
+            stream.flush()
+            line = stream.readline()
+    except OSError as e:
+        raise DaemonRequestError(f"与常驻进程通信失败: {e}") from e
+
+    if not line:
+        raise DaemonRequestError("常驻进程没有返回响应")
+    try:
+        response = json.loads(line.decode('utf-8'))
+    except ValueError as e:
+        raise DaemonRequestError(f"常驻进程的响应格式错误: {e}") from e
+    if not isinstance(response, dict):
+        raise DaemonRequestError("常驻进程的响应格式错误")
+    return response
+
+
+# 常驻进程没有执行命令的错误码（未知命令、请求格式错误），只有这两种情况可以改为本地执行
+DAEMON_NOT_EXECUTED_CODES = (-32601, -32700)
+
+
+def daemon_response_result(response):
+    """处理常驻进程对命令的响应：打印输出
+
+    Returns:
+        tuple: (是否已由常驻进程处理, 命令结果)；常驻进程未执行该命令（可改为本地执行）时返回 (False, None)
+    """
+    if 'error' not in response:
+        print(response['result']['output'], end='')
+        return True, response['result']['result']
+    error = response['error']
+    if error.get('code') in DAEMON_NOT_EXECUTED_CODES:
+        print(f"常驻进程未执行: {error.get('message')}，改为本地执行")
+        return False, None
+    # 命令已在常驻进程中执行（可能只完成了一部分），不在本地重新执行
+    print(error.get('data') or '', end='')
+    print(f"常驻进程执行失败: {error.get('message')}")
+    return True, None
+
+
+def print_daemon_error(error):
+    """请求已发出但没有收到有效响应时的提示"""
+    print(f"❌ {error}")
+    print("命令可能已在常驻进程中执行，请检查结果后再决定是否重试（加 --local 在本进程中执行）")
+
+
+MB = 1024 * 1024
+
+
+def process_memory():
+    """返回本进程当前和峰值常驻内存（字节），取不到的项为None"""
+    if os.name == 'nt':
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD)] + [
+                (name, ctypes.c_size_t) for name in (
+                    'PeakWorkingSetSize', 'WorkingSetSize',
+                    'QuotaPeakPagedPoolUsage', 'QuotaPagedPoolUsage',
+                    'QuotaPeakNonPagedPoolUsage', 'QuotaNonPagedPoolUsage',
+                    'PagefileUsage', 'PeakPagefileUsage')]
+
+        try:
+            counters = PROCESS_MEMORY_COUNTERS()
+            counters.cb = ctypes.sizeof(counters)
+            kernel32 = ctypes.windll.kernel32
+            kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+            if ctypes.windll.psapi.GetProcessMemoryInfo(kernel32.GetCurrentProcess(),
+                                                        ctypes.byref(counters), counters.cb):
+                return counters.WorkingSetSize, counters.PeakWorkingSetSize
+        except (OSError, AttributeError):
+            pass
+        return None, None
+
+    current = peak = None
+    try:
+        import resource
+        # Linux上单位为KB，macOS上为字节
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        peak *= 1 if sys.platform == 'darwin' else 1024
+    except (ImportError, OSError):
+        pass
+    try:
+        with open('/proc/self/statm') as f:
+            current = int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        pass
+    return current, peak
+
+
+def current_memory():
+    """本进程当前内存占用（字节），用于判断是否超出内存预算
+
+    优先取常驻内存；取不到时用tracemalloc的当前分配量，再不行用峰值常驻内存。
+    """
+    import tracemalloc
+    current, peak = process_memory()
+    if current is not None:
+        return current
+    if tracemalloc.is_tracing():
+        return tracemalloc.get_traced_memory()[0]
+    return peak
+
+
+class RunReport:
+    """一次运行的分阶段统计
+
+    每个阶段记录墙钟时间、CPU时间，以及阶段内累加的行数、单元格数等计数。
+    阶段可以嵌套，记录中的阶段名带上级路径，如 sync/hero[hero].csv/convert/read_excel_sheet。
+    指定 profile_dir 时每个阶段单独用cProfile采样，保存为 .prof 文件
+    （嵌套阶段的耗时只计入最内层阶段；线程池中工作线程的调用不在采样范围内）。
+    track_memory 为真时用tracemalloc记录每个阶段的Python分配峰值（含嵌套阶段），
+    以及阶段结束时的常驻内存和进程常驻内存峰值；tracemalloc会让运行变慢，默认不开启。
+    """
+
+    def __init__(self, command, profile_dir=None, track_memory=False):
+        self.command = command
+        self.started_at = datetime.now()
+        self.profile_dir = Path(profile_dir) if profile_dir else None
+        self.track_memory = track_memory
+        self.stages = []
+        self._stack = []        # 当前嵌套的阶段名
+        self._counters = []     # 与 _stack 一一对应的计数字典
+        self._profilers = []    # 与 _stack 一一对应的cProfile实例
+        self._alloc_peaks = []  # 与 _stack 一一对应，已结束的子阶段中的最大分配峰值
+        self.memory = None      # 整次运行的内存峰值（finish后可用）
+        self._tracing = False
+        if track_memory:
+            import tracemalloc
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._tracing = True  # 由本报告开启，finish时关闭
+            tracemalloc.reset_peak()
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.process_time()
+        self._wall_ms = None
+        self._cpu_ms = None
+        self._io_before = IO_STATS.snapshot()
+        self.io = None  # 本次运行的文件读写增量（finish后可用）
+
+    @contextmanager
+    def stage(self, name):
+        """记录一个阶段，返回可写入计数的字典"""
+        self._stack.append(name)
+        record = {'stage': '/'.join(self._stack), 'depth': len(self._stack) - 1}
+        self.stages.append(record)
+        index = len(self.stages)
+        counters = {}
+        self._counters.append(counters)
+
+        profiler = None
+        if self.profile_dir:
+            import cProfile
+            if self._profilers and self._profilers[-1]:
+                self._profilers[-1].disable()
+            profiler = cProfile.Profile()
+        self._profilers.append(profiler)
+
+        if self.track_memory:
+            # 上级阶段到此为止的峰值先记下，再重置峰值只统计本阶段
+            import tracemalloc
+            if self._alloc_peaks:
+                self._alloc_peaks[-1] = max(self._alloc_peaks[-1], tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        self._alloc_peaks.append(0)
+
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        if profiler:
+            profiler.enable()
+        try:
+            yield counters
+        finally:
+            if profiler:
+                profiler.disable()
+            record['wall_ms'] = round((time.perf_counter() - wall_start) * 1000, 3)
+            record['cpu_ms'] = round((time.process_time() - cpu_start) * 1000, 3)
+            alloc_peak = self._alloc_peaks.pop()
+            if self.track_memory:
+                import tracemalloc
+                alloc_peak = max(alloc_peak, tracemalloc.get_traced_memory()[1])
+                if self._alloc_peaks:
+                    self._alloc_peaks[-1] = max(self._alloc_peaks[-1], alloc_peak)
+                rss, peak_rss = process_memory()
+                record['peak_alloc_mb'] = round(alloc_peak / MB, 1)
+                record['rss_mb'] = round(rss / MB, 1) if rss is not None else None
+                record['peak_rss_mb'] = round(peak_rss / MB, 1) if peak_rss is not None else None
+            record.update(counters)
+
+            self._profilers.pop()
+            self._counters.pop()
+            self._stack.pop()
+            if profiler:
+                self.profile_dir.mkdir(parents=True, exist_ok=True)
+                profile_path = self.profile_dir / f"{index:03d}_{_safe_filename(record['stage'])}.prof"
+                profiler.dump_stats(str(profile_path))
+                record['profile'] = str(profile_path)
+            if self._profilers and self._profilers[-1]:
+                self._profilers[-1].enable()
+
+    def count(self, key, n=1):
+        """给当前最内层阶段累加计数"""
+        if self._counters:
+            counters = self._counters[-1]
+            counters[key] = counters.get(key, 0) + n
+
+    def finish(self):
+        self._wall_ms = round((time.perf_counter() - self._wall_start) * 1000, 3)
+        self._cpu_ms = round((time.process_time() - self._cpu_start) * 1000, 3)
+        self.io = io_delta(self._io_before, IO_STATS.snapshot())
+        if self.track_memory:
+            import tracemalloc
+            alloc_peak = max([tracemalloc.get_traced_memory()[1]] +
+                             [r['peak_alloc_mb'] * MB for r in self.stages if 'peak_alloc_mb' in r])
+            peak_rss = process_memory()[1]
+            self.memory = {'peak_alloc_mb': round(alloc_peak / MB, 1),
+                           'peak_rss_mb': round(peak_rss / MB, 1) if peak_rss is not None else None}
+            if self._tracing:
+                tracemalloc.stop()
+                self._tracing = False
+
+    def to_dict(self):
+        return {
+            'command': self.command,
+            'started_at': self.started_at.isoformat(timespec='seconds'),
+            'wall_ms': self._wall_ms,
+            'cpu_ms': self._cpu_ms,
+            'profile_dir': str(self.profile_dir) if self.profile_dir else None,
+            'stages': self.stages,
+            'io': dict(self.io, totals=io_summary(self.io)) if self.io is not None else None,
+            'memory': self.memory,
+        }
+
+    def save(self, folder):
+        """保存为JSON文件，返回文件路径"""
+        folder = Path(folder)
+        folder.mkdir(parents=True, exist_ok=True)
+        report_path = folder / f"{self.started_at:%Y%m%d_%H%M%S}_{_safe_filename(self.command)}.json"
+        with open(report_path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+        return report_path
+
+    def print_summary(self):
+        print()
+        print("="*60)
+        print(f"阶段耗时统计: {self.command}")
+        print("="*60)
+        memory_header = f"{'分配峰值MB':>11}{'RSS MB':>10}" if self.track_memory else ''
+        print(f"  {'阶段':<42}{'墙钟ms':>10}{'CPU ms':>10}{memory_header}  计数")
+        for record in self.stages:
+            name = '  ' * record['depth'] + record['stage'].rsplit('/', 1)[-1]
+            counts = ', '.join(f"{k}={v}" for k, v in record.items()
+                               if k not in ('stage', 'depth', 'wall_ms', 'cpu_ms', 'profile',
+                                            'peak_alloc_mb', 'rss_mb', 'peak_rss_mb'))
+            memory = ''
+            if self.track_memory:
+                rss = record.get('rss_mb')
+                memory = f"{record.get('peak_alloc_mb', 0):>15.1f}{rss if rss is not None else '-':>10}"
+            print(f"  {name:<44}{record.get('wall_ms', 0):>10.1f}{record.get('cpu_ms', 0):>10.1f}{memory}  {counts}")
+        if self._wall_ms is not None:
+            print(f"  {'总计':<42}{self._wall_ms:>10.1f}{self._cpu_ms:>10.1f}")
+        if self.memory:
+            peak_rss = self.memory['peak_rss_mb']
+            print(f"  内存峰值: Python分配 {self.memory['peak_alloc_mb']}MB"
+                  + (f", 进程常驻 {peak_rss}MB" if peak_rss is not None else ''))
+
+
+def _safe_filename(text):
+    """把阶段名、命令等转换为可用作文件名的字符串"""
+    import re
+    return re.sub(r'[^\w.\[\]-]+', '_', text).strip('_') or 'run'
+
+
+def cache_folder(folder):
+    """文件夹对应的缓存文件夹：CACHE_FOLDER 下以文件夹名和完整路径的哈希命名的子文件夹（使用时再创建）"""
+    import hashlib
+
+    folder = Path(folder).resolve()
+    digest = hashlib.sha1(str(folder).encode('utf-8')).hexdigest()[:12]
+    return Path(CACHE_FOLDER) / f"{_safe_filename(folder.name)}_{digest}"
+
+
+def load_cache_file(path, version, name):
+    """读取缓存文件夹中保存的索引或缓存（pickle）
+
+    Args:
+        path: 文件路径，为None时不读取
+        version: 当前格式版本，与保存时的版本不同时视为没有保存
+        name: 出错时提示用的名称，如 "语言索引"
+
+    Returns:
+        dict: 保存的内容（含 version）；文件不存在、读取失败或版本不符时返回None
+    """
+    if path is None:
+        return None
+    import pickle
+
+    try:
+        with open(path, 'rb') as f:
+            saved = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"读取{name}文件失败，重新建立: {e}")
+        return None
+    if not isinstance(saved, dict) or saved.get('version') != version:
+        return None
+    return saved
+
+
+def save_cache_file(path, version, name, **fields):
+    """保存索引或缓存到缓存文件夹（pickle），内容为 {'version': version, **fields}
+
+    先写本进程自己的临时文件再替换：常驻进程和 --local 运行同时保存时不会写同一个临时文件，
+    其他进程也不会读到写了一半的文件
+
+    Returns:
+        bool: 是否保存成功
+    """
+    if path is None:
+        return False
+    import pickle
+
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp_path, 'wb') as f:
+            pickle.dump({'version': version, **fields}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"保存{name}文件失败: {e}")
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        return False
+    return True
+
+
+# 当前进行中的运行报告；常驻进程中命令串行执行，同一时刻只有一个
+_active_report = None
+
+
+def start_report(command, profile_dir=None, track_memory=False):
+    """开始记录一次运行的分阶段统计"""
+    global _active_report
+    _active_report = RunReport(command, profile_dir, track_memory)
+    return _active_report
+
+
+def finish_report():
+    """结束当前运行报告并返回它"""
+    global _active_report
+    report, _active_report = _active_report, None
+    if report:
+        report.finish()
+    return report
+
+
+@contextmanager
+def pipeline_stage(name):
+    """记录流水线中的一个阶段；没有进行中的运行报告时不做统计"""
+    report = _active_report
+    if report is None:
+        yield {}
+        return
+    with report.stage(name) as counters:
+        yield counters
+
+
+def count_in_stage(key, n=1):
+    """给当前最内层阶段累加计数（行数、单元格数等）"""
+    report = _active_report
+    if report is not None:
+        report.count(key, n)
+
+
+# 进度显示设置：quiet 不显示进度；events 为JSONL事件文件路径（供CI日志使用）
+_progress_settings = {'quiet': False, 'events': None}
+
+
+def configure_progress(quiet=False, events_path=None):
+    """设置进度显示方式，返回之前的设置 (quiet, events_path)"""
+    previous = (_progress_settings['quiet'], _progress_settings['events'])
+    _progress_settings['quiet'] = quiet
+    _progress_settings['events'] = str(events_path) if events_path else None
+    return previous
+
+
+class ProgressReporter:
+    """限频的进度显示
+
+    只在收集结果的线程中调用 advance()，工作线程不输出、不加锁。
+    终端中显示一行不断刷新的进度，输出被重定向时（常驻进程、CI日志）每隔 PROGRESS_INTERVAL 打印一行。
+    设置了事件文件时，开始、进度、结束各写一行JSON。
+    """
+
+    def __init__(self, task, total, unit="项"):
+        self.task = task
+        self.total = total
+        self.unit = unit
+        self.done = 0
+        self.failed = 0
+        self.quiet = _progress_settings['quiet']
+        self.events_path = _progress_settings['events']
+        self._tty = not self.quiet and sys.stdout.isatty()
+        self._line_open = False
+        self._started_at = time.perf_counter()
+        self._shown_at = self._started_at
+
+    def __enter__(self):
+        self._emit('start')
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._show(final=True)
+        self._emit('finish' if exc_type is None else 'error')
+        return False
+
+    def advance(self, n=1, failed=False):
+        """完成n项；到了刷新时间才输出"""
+        self.done += n
+        if failed:
+            self.failed += n
+        now = time.perf_counter()
+        if now - self._shown_at >= PROGRESS_INTERVAL and self.done < self.total:
+            self._shown_at = now
+            self._show()
+            self._emit('progress')
+
+    def log(self, message):
+        """打印一条消息（不与刷新中的进度行混在一起）"""
+        if self._line_open:
+            sys.stdout.write('\n')
+            self._line_open = False
+        print(message)
+
+    def _line(self):
+        elapsed = time.perf_counter() - self._started_at
+        percent = self.done * 100 / self.total if self.total else 100
+        rate = self.done / elapsed if elapsed > 0 else 0
+        line = f"  {self.task}: {self.done}/{self.total} {self.unit} ({percent:.0f}%), {rate:.0f} {self.unit}/秒"
+        if self.failed:
+            line += f", 失败 {self.failed}"
+        return line
+
+    def _show(self, final=False):
+        if self.quiet:
+            return
+        if self._tty:
+            sys.stdout.write('\r' + self._line() + ('\n' if final else ''))
+            sys.stdout.flush()
+            self._line_open = not final
+        else:
+            print(self._line())
+
+    def _emit(self, event):
+        if not self.events_path:
+            return
+        record = {
+            'time': datetime.now().isoformat(timespec='milliseconds'),
+            'event': event,
+            'task': self.task,
+            'done': self.done,
+            'total': self.total,
+            'failed': self.failed,
+            'elapsed': round(time.perf_counter() - self._started_at, 3),
+        }
+        try:
+            with open(self.events_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        except OSError:
+            pass
+
+
+ReplacementRecord = namedtuple('ReplacementRecord', 'file sheet row col id before after old_text new_text')
+SearchRecord = namedtuple('SearchRecord', 'file sheet row col id content chinese_content search_text')
+
+
+class RecordSink:
+    """详细记录的输出
+
+    每条记录写入时立即追加到报告文件（JSONL每行一个数组，CSV每行一条；第一行为字段名），
+    内存中只保留条数和前 keep 条记录（用于终端显示），记录再多内存占用也不变。
+    """
+
+    def __init__(self, fields, keep=None):
+        self.fields = fields
+        self.keep = PRINT_RECORD_LIMIT if keep is None else keep
+        self.path = None
+        self.count = 0
+        self.kept = []
+        self._file = None
+        self._writer = None
+
+    def open(self, path):
+        """开始把记录写入文件（.csv 为CSV，其他为JSONL）"""
+        self.close()
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self.path.suffix.lower() == '.csv':
+            import csv
+            self._file = open(self.path, 'w', encoding='utf-8-sig', newline='')
+            self._writer = csv.writer(self._file)
+            self._writer.writerow(self.fields)
+        else:
+            self._file = open(self.path, 'w', encoding='utf-8')
+            self._writer = None
+            self._file.write(json.dumps(list(self.fields), ensure_ascii=False) + '\n')
+
+    def write(self, record):
+        self.count += 1
+        if len(self.kept) < self.keep:
+            self.kept.append(record)
+        if self._file is None:
+            return
+        if self._writer:
+            self._writer.writerow(record)
+        else:
+            self._file.write(json.dumps(list(record), ensure_ascii=False) + '\n')
+
+    @property
+    def omitted(self):
+        """未保留在内存中（终端不显示）的条数"""
+        return self.count - len(self.kept)
+
+    def print_footer(self):
+        """终端显示的记录之后，提示省略的条数和报告文件位置"""
+        if self.omitted:
+            print(f"\n... 另有 {self.omitted} 条未显示")
+        if self.path:
+            print(f"完整记录（{self.count} 条）已保存到: {self.path}")
+        elif self.omitted:
+            print("加 --report 文件 可保存完整记录（.jsonl 或 .csv）")
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+            self._writer = None
+
+
+class ReplacementState:
+    """增量替换记录，保存在工作文件夹对应的缓存文件夹（见 cache_folder）下的 REPLACE_STATE_FILE 中
+
+    每个用户各自一份，多人同时替换时不会互相覆盖；记录按文件签名校验，别人修改过的文件会重新处理。
+
+    按工作簿记录替换后的文件签名，按工作表记录已应用规则集的指纹和每行内容（第1、3列）的哈希。
+    再次运行时：文件和规则都没变的工作簿直接跳过，不打开文件；规则只在末尾新增时，
+    内容与上次处理后相同的行只应用新增规则，新增或改动过的行应用全部规则；
+    规则被修改、删除或调换顺序时全部重新替换。
+    """
+
+    HASH_SIZE = 8
+
+    def __init__(self, path=None):
+        self.path = Path(path) if path else None
+        self.rule_sets = {}  # 指纹 -> [[原文本, 新文本], ...]
+        self.files = {}      # 文件名 -> {'signature': [...], 'sheets': {工作表名: {'rules': 指纹, 'rows': 行哈希}}}
+
+    @classmethod
+    def load(cls, path):
+        """读取记录；没有记录或记录损坏时返回空记录（全部重新替换）"""
+        state = cls(path)
+        try:
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+            state.rule_sets = data['rule_sets']
+            state.files = data['files']
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        return state
+
+    def save(self):
+        # 只保留仍被引用的规则集
+        used = {sheet['rules'] for entry in self.files.values() for sheet in entry['sheets'].values()}
+        data = {'rule_sets': {fp: rules for fp, rules in self.rule_sets.items() if fp in used},
+                'files': self.files}
+        temp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(temp_path, self.path)
+
+    @staticmethod
+    def fingerprint(rules):
+        """规则集（有序）的指纹"""
+        import hashlib
+        return hashlib.sha1(json.dumps(rules, ensure_ascii=False).encode('utf-8')).hexdigest()[:16]
+
+    @classmethod
+    def row_hash(cls, cells):
+        import hashlib
+        return hashlib.blake2b(repr(cells).encode('utf-8'), digest_size=cls.HASH_SIZE).digest()
+
+    @classmethod
+    def pack_rows(cls, hashes):
+        """行哈希集合编码为字符串（去重排序后拼接再base64）"""
+        import base64
+        return base64.b64encode(b''.join(sorted(set(hashes)))).decode('ascii')
+
+    @classmethod
+    def unpack_rows(cls, packed):
+        import base64
+        data = base64.b64decode(packed)
+        return {data[i:i + cls.HASH_SIZE] for i in range(0, len(data), cls.HASH_SIZE)}
+
+    def is_current(self, entry, signature, rules_fingerprint):
+        """文件自上次替换后未变化，且所有工作表都已应用当前规则集"""
+        return (signature is not None and entry['signature'] == list(signature) and
+                all(sheet['rules'] == rules_fingerprint for sheet in entry['sheets'].values()))
+
+    def new_rules(self, rules_fingerprint, rules):
+        """上次的规则集是当前规则的前缀时返回新增的规则，否则返回None"""
+        previous = self.rule_sets.get(rules_fingerprint)
+        if previous is None:
+            return None
+        previous = [tuple(rule) for rule in previous]
+        if list(rules[:len(previous)]) != previous:
+            return None
+        return list(rules[len(previous):])
+
+    def update(self, file_path, entry, rules):
+        self.rule_sets[self.fingerprint(rules)] = [list(rule) for rule in rules]
+        self.files[Path(file_path).name] = entry
+
+    def for_file(self, file_path):
+        """只含该文件记录的副本（传给并行替换的工作进程）"""
+        subset = ReplacementState()
+        entry = self.files.get(Path(file_path).name)
+        if entry:
+            subset.files[Path(file_path).name] = entry
+            for sheet in entry['sheets'].values():
+                if sheet['rules'] in self.rule_sets:
+                    subset.rule_sets[sheet['rules']] = self.rule_sets[sheet['rules']]
+        return subset
+
+
+class ReplacementMatcher:
+    """替换规则的多模式匹配器（Aho-Corasick自动机），由替换配置构建一次
+
+    逐条规则对单元格做 in / count / replace 的开销随规则数线性增长；这里一次扫描找出文本中
+    出现了哪些规则。大多数单元格不含任何规则文本，先用所有规则拼成的正则（C实现）判断，
+    命中时再用自动机求出具体的规则集合，之后只检查这些规则和被替换结果引出的规则。
+    """
+
+    def __init__(self, replacement_config):
+        import re
+        from collections import deque
+
+        self.rules = [(old_text, new_text) for old_text, new_text in replacement_config.items() if old_text]
+        patterns = [old_text for old_text, _ in self.rules]
+        self._prefilter = re.compile('|'.join(map(re.escape, patterns))) if patterns else None
+
+        # 构建字典树：_goto[状态][字符] -> 状态，_output[状态] 为在该状态结束的规则序号
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [()]
+        for rule_idx, pattern in enumerate(patterns):
+            state = 0
+            for ch in pattern:
+                next_state = self._goto[state].get(ch)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append(())
+                    self._goto[state][ch] = next_state
+                state = next_state
+            self._output[state] += (rule_idx,)
+
+        # 按层次计算失败指针，并把失败状态的输出合并进来
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(ch, 0)
+                self._output[next_state] += self._output[self._fail[next_state]]
+
+        # 应用第i条规则后可能新出现的后续规则：新出现的匹配必然包含替换进来的字符，
+        # 替换为空串时则跨越删除处的接缝（长度至少为2）
+        rules_by_char = {}
+        for rule_idx, pattern in enumerate(patterns):
+            for ch in set(pattern):
+                rules_by_char.setdefault(ch, set()).add(rule_idx)
+        self._created_by = []
+        for rule_idx, (_, new_text) in enumerate(self.rules):
+            if new_text:
+                created = set().union(*(rules_by_char.get(ch, ()) for ch in set(new_text)))
+            else:
+                created = {idx for idx, pattern in enumerate(patterns) if len(pattern) >= 2}
+            self._created_by.append({idx for idx in created if idx > rule_idx})
+
+    def find_rules(self, text):
+        """返回文本中出现的规则序号集合"""
+        if self._prefilter is None or not self._prefilter.search(text):
+            return set()
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        found = set()
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if output[state]:
+                found.update(output[state])
+        return found
+
+    def apply(self, text):
+        """按配置顺序依次应用规则，与逐条 in / count / replace 的结果相同
+
+        Returns:
+            list: [(规则序号, 替换次数, 替换后文本)]，按应用顺序
+        """
+        applied = []
+        pending = self.find_rules(text)
+        while pending:
+            rule_idx = min(pending)
+            pending.discard(rule_idx)
+            old_text, new_text = self.rules[rule_idx]
+            # 前面的替换可能已破坏该规则的匹配
+            if old_text not in text:
+                continue
+            count = text.count(old_text)
+            text = text.replace(old_text, new_text)
+            applied.append((rule_idx, count, text))
+            pending.update(self._created_by[rule_idx])
+        return applied
+
+
 class ExcelTextReplacer:
     def __init__(self, replacement_config):
         self.replacement_config = replacement_config
+        self.matcher = ReplacementMatcher(replacement_config)
+        self.rules_fingerprint = ReplacementState.fingerprint(self.matcher.rules)
+        # 增量替换记录（ReplacementState），为None时每次全部重新替换
+        self.state = None
+        self._incremental_matchers = {}
         self.total_replacements = 0
         self.processed_files = []
         self.replacement_details = {}
-        self.detailed_replacements = []  # 存储详细的替换信息
-        self.search_results = []  # 存储搜索结果
-        
-    def replace_text_in_cell(self, cell_value, file_name, sheet_name, row_idx, col_idx, id_value=""):
-        """在单元格文本中进行替换，并记录详细信息"""
+        # 详细替换信息和搜索结果逐条写入报告文件，内存中只保留用于终端显示的前几条
+        self.replacement_records = RecordSink(ReplacementRecord._fields)
+        self.search_records = RecordSink(SearchRecord._fields)
+
+    def close_report(self):
+        self.replacement_records.close()
+        self.search_records.close()
+
+    @property
+    def search_count(self):
+        """搜索结果条数"""
+        return self.search_records.count
+
+    def replace_text_in_cell(self, cell_value, file_name, sheet_name, row_idx, col_idx, id_value="",
+                             details=None, records=None, matcher=None):
+        """在单元格文本中进行替换，并记录详细信息
+
+        details / records 指定时替换次数和详细记录写入其中（替换计划），否则直接计入本实例的统计；
+        matcher 指定时只应用其中的规则（增量替换）
+        """
+        if matcher is None:
+            matcher = self.matcher
+        if details is None:
+            details = self.replacement_details
+        add_record = records.append if records is not None else self.replacement_records.write
         # 统一转换为字符串处理，避免数字类型问题
         if cell_value is None:
             return cell_value, 0
@@ -72,31 +1641,21 @@ class ExcelTextReplacer:
         original_value_str = cell_value_str
         replacements_count = 0
 
-        for old_text, new_text in self.replacement_config.items():
-            if old_text in cell_value_str:
-                count_before = cell_value_str.count(old_text)
-                new_cell_value_str = cell_value_str.replace(old_text, new_text)
-                replacements_count += count_before
-
-                # 记录替换详情
-                if old_text not in self.replacement_details:
-                    self.replacement_details[old_text] = 0
-                self.replacement_details[old_text] += count_before
-
-                # 记录详细的替换信息
-                self.detailed_replacements.append({
-                    'file': file_name,
-                    'sheet': sheet_name,
-                    'row': row_idx + 1,  # 转换为1基索引
-                    'col': col_idx + 1,
-                    'id': id_value,
-                    'before': original_value_str,
-                    'after': new_cell_value_str,
-                    'old_text': old_text,
-                    'new_text': new_text
-                })
-
-                cell_value_str = new_cell_value_str
+        # 一次扫描找出命中的规则，按配置顺序应用
+        for rule_idx, count_before, new_cell_value_str in matcher.apply(cell_value_str):
+            old_text, new_text = matcher.rules[rule_idx]
+            replacements_count += count_before
+
+            # 记录替换详情
+            if old_text not in details:
+                details[old_text] = 0
+            details[old_text] += count_before
+
+            # 记录详细的替换信息（行列转换为1基索引）
+            add_record(ReplacementRecord(file_name, sheet_name, row_idx + 1, col_idx + 1, id_value,
+                                         original_value_str, new_cell_value_str, old_text, new_text))
+
+            cell_value_str = new_cell_value_str
 
         # 如果有替换，返回字符串；如果没有替换，返回原始值
         if replacements_count > 0:
@@ -121,20 +1680,17 @@ class ExcelTextReplacer:
             if col_idx == 0:  # 如果当前就是第1列
                 id_value = cell_value_str
 
-            self.search_results.append({
-                'file': file_name,
-                'sheet': sheet_name,
-                'row': row_idx + 1,  # 转换为1基索引
-                'col': col_idx + 1,
-                'id': id_value,
-                'content': cell_value_str,
-                'search_text': search_text
-            })
+            # 行列转换为1基索引
+            self.search_records.write(SearchRecord(file_name, sheet_name, row_idx + 1, col_idx + 1, id_value,
+                                                   cell_value_str, "", search_text))
             return True
         return False
 
     def is_text_match(self, text, search_text):
         """检查文本是否匹配搜索条件（支持模糊搜索）"""
+        if len(search_text) > 1 and search_text.startswith('*') and search_text.endswith('*'):
+            # 包含搜索：*知己* 匹配包含该文本的单元格
+            return search_text[1:-1] in text
         if search_text.endswith('*'):
             # 模糊搜索：前缀匹配
             prefix = search_text[:-1]  # 去掉末尾的 *
@@ -145,6 +1701,8 @@ class ExcelTextReplacer:
 
     def copy_cell_style(self, source_cell, target_cell):
         """复制单元格样式"""
+        from openpyxl.styles import Font, PatternFill, Border, Alignment
+
         if source_cell.font:
             target_cell.font = Font(
                 name=source_cell.font.name,
@@ -182,153 +1740,293 @@ class ExcelTextReplacer:
                 indent=source_cell.alignment.indent
             )
     
-    def process_excel_file(self, file_path):
-        """处理单个Excel文件"""
+    def process_excel_file(self, file_path, dry_run=False):
+        """处理单个Excel文件：先只读规划替换，有替换时再写入"""
         print(f"正在处理文件: {file_path}")
+        plan = self.plan_file(file_path)
+        if plan is None:
+            return False
+        return self.apply_plan(plan, dry_run)
 
-        file_path_obj = Path(file_path)
-        file_extension = file_path_obj.suffix.lower()
+    def plan_file(self, file_path):
+        """只读扫描文件，计算所有替换，不修改文件
 
-        if file_extension == '.xls':
-            return self.process_xls_file(file_path)
-        elif file_extension == '.xlsx':
-            return self.process_xlsx_file(file_path)
-        else:
+        Returns:
+            dict: 替换计划 {'file', 'signature', 'changes': {工作表名: {(行, 列): 新值}},
+                  'sheets': {工作表名: 替换次数}, 'replacements', 'details': {规则: 替换次数},
+                  'records': [详细替换记录], 'state': 本文件新的增量记录（未启用增量替换时为None）}；
+                  出错时返回None
+        """
+        file_extension = Path(file_path).suffix.lower()
+        if file_extension not in SUPPORTED_EXTENSIONS:
             print(f"不支持的文件格式: {file_extension}")
-            return False
+            return None
 
-    def process_xlsx_file(self, file_path):
-        """处理.xlsx文件"""
+        plan = {'file': str(file_path), 'signature': None, 'changes': {}, 'sheets': {},
+                'replacements': 0, 'details': {}, 'records': [], 'state': None,
+                'rows_incremental': 0, 'rows_full': 0}
         try:
-            # 读取工作簿
-            workbook = openpyxl.load_workbook(file_path)
-            file_replacements = 0
-            file_name = Path(file_path).name
+            with workbook_lock(file_path, shared=True):
+                plan['signature'] = file_signature(file_path)
+                previous = self.state.files.get(Path(file_path).name) if self.state else None
+                if previous and self.state.is_current(previous, plan['signature'], self.rules_fingerprint):
+                    # 文件和规则都没有变化，不用打开文件
+                    print(f"    文件和替换规则均未变化，跳过")
+                    plan['state'] = previous
+                    return plan
+
+                if self.state:
+                    plan['state'] = {'signature': list(plan['signature']), 'sheets': {}}
+                    plan['previous'] = previous
+                if file_extension == '.xls':
+                    self._plan_xls_file(file_path, plan)
+                else:
+                    self._plan_xlsx_file(file_path, plan)
+                plan.pop('previous', None)
+        except Exception as e:
+            print(f"处理文件 {file_path} 时出错: {str(e)}")
+            return None
 
-            print(f"  处理文件: {file_name}")
+        if self.state and plan['rows_incremental']:
+            print(f"    增量替换: {plan['rows_incremental']} 行只应用新增规则, {plan['rows_full']} 行应用全部规则")
+        for sheet_name, sheet_replacements in plan['sheets'].items():
+            print(f"    工作表: {sheet_name}  替换 {sheet_replacements} 处")
+        return plan
 
-            # 遍历所有工作表
-            for sheet_name in workbook.sheetnames:
-                sheet = workbook[sheet_name]
-                sheet_replacements = 0
+    def _sheet_state(self, plan, sheet_name):
+        """增量替换时本工作表的上下文 [已处理行的哈希集合, 只含新增规则的匹配器, 本次的行哈希]
 
-                print(f"    工作表: {sheet_name}")
+        上次没有处理过该工作表，或规则不是只在末尾新增时，已处理行的哈希集合为None（全部规则重新替换）
+        """
+        if self.state is None:
+            return None
+        done_rows, new_rules_matcher = None, None
+        previous = plan['previous']['sheets'].get(sheet_name) if plan['previous'] else None
+        if previous:
+            new_rules = self.state.new_rules(previous['rules'], self.matcher.rules)
+            if new_rules is not None:
+                done_rows = ReplacementState.unpack_rows(previous['rows'])
+                new_rules_matcher = self._matcher_for(new_rules)
+        return [done_rows, new_rules_matcher, []]
+
+    def _finish_sheet_state(self, plan, sheet_name, sheet_state):
+        if sheet_state is not None:
+            plan['state']['sheets'][sheet_name] = {'rules': self.rules_fingerprint,
+                                                   'rows': ReplacementState.pack_rows(sheet_state[2])}
+
+    def _matcher_for(self, rules):
+        """只含指定规则的匹配器（增量替换用，按规则缓存）"""
+        key = tuple(rules)
+        if key not in self._incremental_matchers:
+            self._incremental_matchers[key] = ReplacementMatcher(dict(rules))
+        return self._incremental_matchers[key]
+
+    def _plan_row(self, plan, sheet_state, file_name, sheet_name, row_idx, id_value, cells):
+        """规划一行的替换
+
+        cells 为本行需要检查的单元格 [(列序号, 值)]（第1列和第3列）。增量替换时，内容与上次处理后
+        相同的行只应用新增规则，其余行应用全部规则。
+        """
+        matcher = None
+        if sheet_state is not None:
+            done_rows, new_rules_matcher, _ = sheet_state
+            if done_rows is not None and ReplacementState.row_hash(cells) in done_rows:
+                matcher = new_rules_matcher
+                plan['rows_incremental'] += 1
+            else:
+                plan['rows_full'] += 1
 
-                # 遍历所有行
-                for row_idx, row in enumerate(sheet.iter_rows()):
+        cells_after = []
+        for col_idx, cell_value in cells:
+            new_value, replacements = self.replace_text_in_cell(
+                cell_value, file_name, sheet_name, row_idx, col_idx, id_value,
+                details=plan['details'], records=plan['records'], matcher=matcher
+            )
+            if replacements > 0:
+                plan['changes'].setdefault(sheet_name, {})[(row_idx, col_idx)] = new_value
+                plan['sheets'][sheet_name] = plan['sheets'].get(sheet_name, 0) + replacements
+                plan['replacements'] += replacements
+            cells_after.append((col_idx, new_value))
+
+        if sheet_state is not None:
+            # 记录替换后（即写入文件后）的内容哈希
+            sheet_state[2].append(ReplacementState.row_hash(cells_after))
+
+    def _plan_xlsx_file(self, file_path, plan):
+        """只读模式逐行扫描.xlsx文件（不把整个工作簿载入内存）"""
+        file_name = Path(file_path).name
+        cells_read = 0
+        with WorkbookReader(file_path) as reader:
+            for sheet_name in reader.sheet_names:
+                sheet_state = self._sheet_state(plan, sheet_name)
+                for row_idx, row in enumerate(reader.rows(sheet_name)):
                     id_value = ""
                     # 获取第1列的ID值（如果存在）
-                    if len(row) > 0 and row[0].value is not None:
-                        id_value = str(row[0].value)
+                    if len(row) > 0 and row[0] is not None:
+                        id_value = str(row[0])
 
                     # 只处理第1列(ID)和第3列(中文名称)
-                    for col_idx in [0, 2]:  # 0基索引，对应第1列和第3列
-                        if col_idx < len(row) and row[col_idx].value is not None:
-                            cell = row[col_idx]
-                            new_value, replacements = self.replace_text_in_cell(
-                                cell.value, file_name, sheet_name, row_idx, col_idx, id_value
-                            )
-                            if replacements > 0:
-                                cell.value = new_value
-                                sheet_replacements += replacements
-
-                if sheet_replacements > 0:
-                    print(f"      完成替换: {sheet_replacements} 处")
-                file_replacements += sheet_replacements
-
-            # 直接保存到原文件
-            workbook.save(file_path)
-            workbook.close()
-
-            self.total_replacements += file_replacements
-            self.processed_files.append({
-                'file': str(file_path),
-                'replacements': file_replacements
-            })
-
-            if file_replacements > 0:
-                print(f"  ✅ 文件已更新，替换总数: {file_replacements}")
-            else:
-                print(f"  ⚪ 文件无需更新")
-
-        except Exception as e:
-            print(f"处理文件 {file_path} 时出错: {str(e)}")
-            return False
-
-        return True
-
-    def process_xls_file(self, file_path):
-        """处理.xls文件"""
-        try:
-            # 读取.xls文件
-            workbook_read = xlrd.open_workbook(file_path)
-            workbook_write = xlwt.Workbook()
-            file_replacements = 0
-            file_name = Path(file_path).name
-
-            print(f"  处理文件: {file_name}")
-
-            # 遍历所有工作表
-            for sheet_index in range(workbook_read.nsheets):
-                sheet_read = workbook_read.sheet_by_index(sheet_index)
-                sheet_name = sheet_read.name
-                sheet_write = workbook_write.add_sheet(sheet_name)
-                sheet_replacements = 0
-
-                print(f"    工作表: {sheet_name}")
-
-                # 遍历所有行
-                for row_idx in range(sheet_read.nrows):
+                    cells = [(col_idx, row[col_idx]) for col_idx in [0, 2]  # 0基索引，对应第1列和第3列
+                             if col_idx < len(row) and row[col_idx] is not None]
+                    cells_read += len(cells)
+                    self._plan_row(plan, sheet_state, file_name, sheet_name, row_idx, id_value, cells)
+                self._finish_sheet_state(plan, sheet_name, sheet_state)
+        IO_STATS.record_cells(file_path, read=cells_read)
+
+    def _plan_xls_file(self, file_path, plan):
+        """按需加载工作表扫描.xls文件，扫描完一个工作表即释放"""
+        file_name = Path(file_path).name
+        cells_read = 0
+        with WorkbookReader(file_path) as reader:
+            for sheet_name in reader.sheet_names:
+                sheet_state = self._sheet_state(plan, sheet_name)
+                for row_idx, row in enumerate(reader.rows(sheet_name)):
                     id_value = ""
                     # 获取第1列的ID值（如果存在）
-                    if sheet_read.ncols > 0:
-                        id_cell_value = sheet_read.cell_value(row_idx, 0)
-                        if id_cell_value:
-                            id_value = str(id_cell_value)
-
-                    # 处理所有列，但只对第1列和第3列进行替换检查
-                    for col_idx in range(sheet_read.ncols):
-                        cell_value = sheet_read.cell_value(row_idx, col_idx)
-
-                        # 只对第1列(ID)和第3列(中文名称)进行替换
-                        if col_idx in [0, 2] and cell_value is not None:
-                            new_value, replacements = self.replace_text_in_cell(
-                                cell_value, file_name, sheet_name, row_idx, col_idx, id_value
-                            )
-                            if replacements > 0:
-                                sheet_write.write(row_idx, col_idx, new_value)
-                                sheet_replacements += replacements
-                            else:
-                                # 保持原始数据类型，避免数字格式问题
-                                sheet_write.write(row_idx, col_idx, cell_value)
-                        else:
-                            # 其他列直接复制，保持原始数据类型
-                            sheet_write.write(row_idx, col_idx, cell_value)
-
-                if sheet_replacements > 0:
-                    print(f"      完成替换: {sheet_replacements} 处")
-                file_replacements += sheet_replacements
-
-            # 直接保存到原文件
-            workbook_write.save(str(file_path))
-
-            self.total_replacements += file_replacements
-            self.processed_files.append({
-                'file': str(file_path),
-                'replacements': file_replacements
-            })
+                    if len(row) > 0 and row[0]:
+                        id_value = str(row[0])
+
+                    # 只对第1列(ID)和第3列(中文名称)进行替换
+                    cells = [(col_idx, row[col_idx]) for col_idx in [0, 2] if col_idx < len(row)]
+                    cells_read += len(cells)
+                    self._plan_row(plan, sheet_state, file_name, sheet_name, row_idx, id_value, cells)
+                self._finish_sheet_state(plan, sheet_name, sheet_state)
+        IO_STATS.record_cells(file_path, read=cells_read)
+
+    def apply_plan(self, plan, dry_run=False):
+        """按替换计划写入文件并计入统计；没有替换的文件不写入，dry_run 时都不写入"""
+        if not dry_run:
+            plan = self.write_plan(plan)
+            if plan is None:
+                return False
+            if self.state and plan['state']:
+                self.state.update(plan['file'], plan['state'], self.matcher.rules)
+        self.commit_plan(plan)
+        self.print_plan_status(plan, dry_run)
+        return True
 
-            if file_replacements > 0:
-                print(f"  ✅ 文件已更新，替换总数: {file_replacements}")
-            else:
-                print(f"  ⚪ 文件无需更新")
+    def write_plan(self, plan):
+        """写入有替换的文件
 
+        Returns:
+            dict: 实际写入的替换计划（文件在规划后被修改过时为重新规划的结果），出错时返回None
+        """
+        file_path = plan['file']
+        if plan['replacements'] == 0:
+            return plan
+        try:
+            with workbook_lock(file_path):
+                if file_signature(file_path) != plan['signature']:
+                    # 规划之后文件被其他人修改过，在排他锁内重新规划
+                    print(f"  文件在规划后被修改，重新规划: {Path(file_path).name}")
+                    plan = self.plan_file(file_path)
+                    if plan is None:
+                        return None
+                if plan['replacements'] > 0:
+                    if Path(file_path).suffix.lower() == '.xls':
+                        self._apply_xls_plan(plan)
+                    else:
+                        self._apply_xlsx_plan(plan)
+                    if plan['state']:
+                        plan['state']['signature'] = list(file_signature(file_path))
         except Exception as e:
             print(f"处理文件 {file_path} 时出错: {str(e)}")
-            return False
+            return None
+        return plan
+
+    def print_plan_status(self, plan, dry_run=False):
+        if plan['replacements'] == 0:
+            print(f"  ⚪ 文件无需更新")
+        elif dry_run:
+            print(f"  🔍 试运行，未写入文件，替换总数: {plan['replacements']}")
+        else:
+            print(f"  ✅ 文件已更新，替换总数: {plan['replacements']}")
+
+    def process_files_parallel(self, excel_files, jobs, dry_run=False):
+        """多进程并行规划并写入各文件，结果按文件顺序并入统计，与逐个处理的总结相同"""
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+
+        jobs = min(jobs, len(excel_files))
+        print(f"使用 {jobs} 个进程并行处理 {len(excel_files)} 个文件")
+        results = [None] * len(excel_files)
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            futures = {executor.submit(_replace_file_worker, self.replacement_config, str(file_path), dry_run,
+                                       self.state.for_file(file_path) if self.state else None): idx
+                       for idx, file_path in enumerate(excel_files)}
+            with ProgressReporter("替换", len(excel_files), unit="个文件") as progress:
+                for future in as_completed(futures):
+                    idx = futures[future]
+                    try:
+                        results[idx] = future.result()
+                    except Exception as e:
+                        results[idx] = (None, f"处理文件 {excel_files[idx]} 时出错: {str(e)}\n", None)
+                    progress.advance(failed=results[idx][0] is None)
+
+        # 按文件顺序输出各进程的日志并合并统计
+        for file_path, (plan, output, io_snapshot) in zip(excel_files, results):
+            print(f"{Path(file_path).name}")
+            if output:
+                print(output, end='')
+            if io_snapshot:
+                IO_STATS.merge(io_snapshot)
+            if plan is not None:
+                if self.state and plan['state'] and not dry_run:
+                    self.state.update(plan['file'], plan['state'], self.matcher.rules)
+                self.commit_plan(plan)
+                self.print_plan_status(plan, dry_run)
+
+    def commit_plan(self, plan):
+        """把替换计划的统计并入本实例（总替换次数、各规则次数、详细记录）"""
+        self.total_replacements += plan['replacements']
+        self.processed_files.append({
+            'file': plan['file'],
+            'replacements': plan['replacements']
+        })
+        for old_text, count in plan['details'].items():
+            self.replacement_details[old_text] = self.replacement_details.get(old_text, 0) + count
+        # 详细记录写入报告后不再保留在计划中
+        for record in plan['records']:
+            self.replacement_records.write(record)
+        plan['records'] = []
+
+    def _apply_xlsx_plan(self, plan):
+        """只修改有替换的单元格，其余内容和格式保持不变"""
+        file_path = plan['file']
+        workbook = load_xlsx(file_path)
+        cells_written = 0
+        for sheet_name, changes in plan['changes'].items():
+            sheet = workbook[sheet_name]
+            for (row_idx, col_idx), new_value in changes.items():
+                sheet.cell(row=row_idx + 1, column=col_idx + 1).value = new_value
+                cells_written += 1
+
+        # 直接保存到原文件
+        save_workbook(workbook, file_path)
+        IO_STATS.record_cells(file_path, written=cells_written)
+        workbook.close()
+
+    def _apply_xls_plan(self, plan):
+        """.xls只能整体重写：复制所有工作表，有替换的单元格写入新值"""
+        file_path = plan['file']
+        workbook_read = open_xls(file_path)
+        workbook_write = xlwt.Workbook()
+
+        for sheet_index in range(workbook_read.nsheets):
+            sheet_read = workbook_read.sheet_by_index(sheet_index)
+            sheet_write = workbook_write.add_sheet(sheet_read.name)
+            changes = plan['changes'].get(sheet_read.name, {})
+
+            for row_idx in range(sheet_read.nrows):
+                for col_idx in range(sheet_read.ncols):
+                    # 保持原始数据类型，避免数字格式问题
+                    cell_value = changes.get((row_idx, col_idx), sheet_read.cell_value(row_idx, col_idx))
+                    sheet_write.write(row_idx, col_idx, cell_value)
+
+        # 直接保存到原文件
+        save_workbook(workbook_write, file_path)
+        cell_count = xls_cell_count(workbook_read)
+        IO_STATS.record_cells(file_path, read=cell_count, written=cell_count)
 
-        return True
-    
     def find_excel_files(self, directory):
         """查找目录中的Excel文件"""
         excel_files = []
@@ -343,168 +2041,352 @@ class ExcelTextReplacer:
         
         return excel_files
 
-    def search_in_excel_files(self, search_text, directory):
-        """在Excel文件中搜索指定文本"""
+    def search_in_excel_files(self, search_text, directory, jobs=1, limit=None, output=None, index=None):
+        """在Excel文件中搜索指定文本，结果边搜索边输出
+
+        Args:
+            jobs: 并行搜索的进程数，1为逐个文件搜索
+            limit: 最多输出的结果条数，达到后停止搜索其余文件
+            output: 指定时每条结果以一行JSON写入其中（机器可读），不在终端逐行显示
+            index: 该文件夹的语言索引（LanguageIndex），指定时直接查索引，不逐个扫描文件
+
+        Returns:
+            int: 输出的结果条数
+        """
         excel_files = self.find_excel_files(directory)
 
         if not excel_files:
             print(f"在路径 '{directory}' 中未找到Excel文件")
-            return
+            return 0
 
-        search_type = "模糊搜索" if search_text.endswith('*') else "精确搜索"
-        print(f"在 {len(excel_files)} 个Excel文件中{search_type}: '{search_text}'")
+        if len(search_text) > 1 and search_text.startswith('*') and search_text.endswith('*'):
+            search_type = "包含搜索"
+        else:
+            search_type = "模糊搜索" if search_text.endswith('*') else "精确搜索"
+        limit_note = f"（最多 {limit} 条）" if limit else ""
+        print(f"在 {len(excel_files)} 个Excel文件中{search_type}: '{search_text}'{limit_note}")
         print("="*60)
 
-        for file_path in excel_files:
-            self.search_in_single_file(search_text, file_path)
-
-        # 输出搜索结果
-        if self.search_results:
-            print(f"\n找到 {len(self.search_results)} 个匹配结果:")
-            print("="*60)
-
-            # 按文件和行分组，避免重复显示同一行的不同列
-            processed_rows = set()
+        if index is not None:
+            results = (self._match_row(search_text, file_name, sheet_name, row - 1, id_value, chinese_value)
+                       for file_name, sheet_name, row, id_value, chinese_value in index.search(search_text, limit))
+        else:
+            results = self.iter_search(search_text, excel_files, jobs, limit)
+        for result in results:
+            self.search_records.write(result)
+            if output is not None:
+                output.write(json.dumps(result._asdict(), ensure_ascii=False) + '\n')
+                output.flush()
+            elif self.search_records.count <= self.search_records.keep:
+                # 输出格式：文件名[工作表名], 行X: ID, 中文内容
+                if result.chinese_content:
+                    print(f"{result.file}[{result.sheet}], 行{result.row}: {result.id}, {result.chinese_content}", flush=True)
+                else:
+                    print(f"{result.file}[{result.sheet}], 行{result.row}: {result.id}", flush=True)
+
+        # 输出搜索结果统计
+        if self.search_records.count:
+            if output is None:
+                self.search_records.print_footer()
+            print(f"\n找到 {self.search_records.count} 个匹配结果")
+            if limit and self.search_records.count >= limit:
+                print(f"已达到结果上限 {limit} 条，其余内容未搜索")
+        else:
+            print(f"\n未找到包含 '{search_text}' 的内容")
+        return self.search_records.count
 
-            for result in self.search_results:
-                row_key = f"{result['file']}_{result['sheet']}_{result['row']}"
+    def iter_search(self, search_text, excel_files, jobs=1, limit=None):
+        """按文件顺序逐条产生搜索结果（SearchRecord）
 
-                if row_key not in processed_rows:
-                    processed_rows.add(row_key)
+        jobs > 1 且文件总大小达到 SEARCH_PARALLEL_MIN_SIZE 时各文件在工作进程中搜索，工作进程每找到
+        SEARCH_STREAM_BATCH 条结果就通过队列发回：当前文件的结果边搜边产生，后面先搜完的文件的结果暂存，
+        仍按文件顺序产生，结果与逐个搜索相同。
+        达到 limit 条或调用方提前停止迭代时，取消还未开始的文件，并通知正在搜索的文件停止。
+        """
+        if limit is not None and limit <= 0:
+            return
+        found = 0
+        jobs = search_jobs(jobs, excel_files)
+        if jobs <= 1:
+            for file_path in excel_files:
+                for result in self.iter_file_matches(search_text, file_path):
+                    yield result
+                    found += 1
+                    if limit is not None and found >= limit:
+                        return
+            return
 
-                    # 获取ID和中文内容
-                    id_content = result['id'] if result['id'] else ""
-                    chinese_content = result.get('chinese_content', "")
+        import queue
+        from collections import deque
+        from multiprocessing import Manager
+        from concurrent.futures import ProcessPoolExecutor
 
-                    # 输出格式：文件名[工作表名], 行X: ID, 中文内容
-                    if chinese_content:
-                        print(f"{result['file']}[{result['sheet']}], 行{result['row']}: {id_content}, {chinese_content}")
+        manager = Manager()
+        executor = ProcessPoolExecutor(max_workers=min(jobs, len(excel_files)))
+        futures = []
+        try:
+            batches, stop = manager.Queue(), manager.Event()
+            futures = [executor.submit(_search_file_worker, search_text, str(file_path), limit, idx, batches, stop)
+                       for idx, file_path in enumerate(excel_files)]
+            waiting = {idx: deque() for idx in range(len(excel_files))}
+            for idx, (file_path, future) in enumerate(zip(excel_files, futures)):
+                # 产生本文件的结果，直到收到结束标记（None）或工作进程出错
+                while True:
+                    if waiting[idx]:
+                        results = waiting[idx].popleft()
                     else:
-                        print(f"{result['file']}[{result['sheet']}], 行{result['row']}: {id_content}")
-        else:
-            print(f"\n未找到包含 '{search_text}' 的内容")
-
-    def search_in_single_file(self, search_text, file_path):
-        """在单个Excel文件中搜索"""
-        file_path_obj = Path(file_path)
-        file_extension = file_path_obj.suffix.lower()
-
-        if file_extension == '.xls':
-            self.search_in_xls_file(search_text, file_path)
-        elif file_extension == '.xlsx':
-            self.search_in_xlsx_file(search_text, file_path)
+                        try:
+                            file_idx, results = batches.get(timeout=0.1)
+                        except queue.Empty:
+                            if future.done() and future.exception() is not None:
+                                print(f"搜索文件 {file_path} 时出错: {str(future.exception())}")
+                                break
+                            continue
+                        if file_idx != idx:
+                            waiting[file_idx].append(results)
+                            continue
+                    if results is None:
+                        break
+                    for result in results:
+                        yield result
+                        found += 1
+                        if limit is not None and found >= limit:
+                            return
+                del waiting[idx]
+                if future.exception() is not None:
+                    continue
+                worker_output, io_snapshot = future.result()
+                if worker_output:
+                    print(worker_output, end='')
+                if io_snapshot:
+                    IO_STATS.merge(io_snapshot)
+                futures[idx] = None
+        finally:
+            stop.set()
+            executor.shutdown(wait=True, cancel_futures=True)
+            manager.shutdown()
+            # 提前停止时已经开始搜索的文件，读写统计仍然计入
+            for future in futures:
+                if future is not None and not future.cancelled() and future.exception() is None:
+                    IO_STATS.merge(future.result()[1])
+
+    def iter_file_matches(self, search_text, file_path):
+        """逐行搜索单个Excel文件的第1列(ID)和第3列(中文)，逐条产生匹配的行（SearchRecord）"""
+        for file_name, sheet_name, row_idx, id_value, chinese_value in self.iter_file_rows(file_path):
+            result = self._match_row(search_text, file_name, sheet_name, row_idx, id_value, chinese_value)
+            if result:
+                yield result
+
+    def iter_file_rows(self, file_path):
+        """逐行产生单个Excel文件的 (文件名, 工作表名, 行序号(0基), ID, 中文)，空单元格为None"""
+        file_extension = Path(file_path).suffix.lower()
 
-    def search_in_xlsx_file(self, search_text, file_path):
-        """在.xlsx文件中搜索"""
         try:
-            workbook = openpyxl.load_workbook(file_path)
-            file_name = Path(file_path).name
+            with workbook_lock(file_path, shared=True):
+                if file_extension == '.xls':
+                    yield from self.iter_xls_rows(file_path)
+                elif file_extension == '.xlsx':
+                    yield from self.iter_xlsx_rows(file_path)
+        except WorkbookLockTimeout as e:
+            print(f"搜索文件 {file_path} 时出错: {str(e)}")
 
-            for sheet_name in workbook.sheetnames:
-                sheet = workbook[sheet_name]
+    def search_in_single_file(self, search_text, file_path):
+        """在单个Excel文件中搜索，结果计入 search_records"""
+        for result in self.iter_file_matches(search_text, file_path):
+            self.search_records.write(result)
 
-                for row_idx, row in enumerate(sheet.iter_rows()):
-                    # 获取当前行的ID值（第1列）和中文内容（第3列）
-                    id_value = ""
-                    chinese_value = ""
-                    found_match = False
-
-                    if len(row) > 0 and row[0].value is not None:
-                        id_value = str(row[0].value)
-                    if len(row) > 2 and row[2].value is not None:
-                        chinese_value = str(row[2].value)
-
-                    # 在第1列(ID)和第3列(中文名称)中搜索
-                    for col_idx in [0, 2]:
-                        if col_idx < len(row) and row[col_idx].value is not None:
-                            cell_value = str(row[col_idx].value)
-                            if self.is_text_match(cell_value, search_text):
-                                found_match = True
-                                break
+    def _match_row(self, search_text, file_name, sheet_name, row_idx, id_value, chinese_value):
+        """检查一行的ID和中文是否匹配，匹配时返回包含完整行信息的 SearchRecord，否则返回None
 
-                    # 如果找到匹配，添加一个包含完整行信息的结果
-                    if found_match:
-                        # 确定哪一列包含搜索文本
-                        matched_col = 0
-                        if id_value and self.is_text_match(id_value, search_text):
-                            matched_col = 1
-                        elif chinese_value and self.is_text_match(chinese_value, search_text):
-                            matched_col = 3
-
-                        # 添加搜索结果，包含完整的行信息
-                        self.search_results.append({
-                            'file': file_name,
-                            'sheet': sheet_name,
-                            'row': row_idx + 1,
-                            'col': matched_col,
-                            'id': id_value,
-                            'content': chinese_value if matched_col == 3 else id_value,
-                            'chinese_content': chinese_value,  # 总是保存中文内容用于显示
-                            'search_text': search_text
-                        })
+        id_value / chinese_value 为None表示单元格为空
+        """
+        id_match = id_value is not None and self.is_text_match(id_value, search_text)
+        chinese_match = chinese_value is not None and self.is_text_match(chinese_value, search_text)
+        if not (id_match or chinese_match):
+            return None
 
-            workbook.close()
+        # 确定哪一列包含搜索文本
+        matched_col = 0
+        if id_value and id_match:
+            matched_col = 1
+        elif chinese_value and chinese_match:
+            matched_col = 3
+
+        # 总是保存中文内容用于显示
+        id_value = id_value or ""
+        chinese_value = chinese_value or ""
+        return SearchRecord(file_name, sheet_name, row_idx + 1, matched_col, id_value,
+                            chinese_value if matched_col == 3 else id_value, chinese_value, search_text)
+
+    def iter_xlsx_rows(self, file_path):
+        """逐行读取.xlsx文件的第1列和第3列（只读模式）"""
+        rows_scanned = 0
+        try:
+            file_name = Path(file_path).name
+            with WorkbookReader(file_path) as reader:
+                for sheet_name in reader.sheet_names:
+                    for row_idx, row in enumerate(reader.rows(sheet_name)):
+                        rows_scanned += 1
+                        # 获取当前行的ID值（第1列）和中文内容（第3列）
+                        id_value = str(row[0]) if len(row) > 0 and row[0] is not None else None
+                        chinese_value = str(row[2]) if len(row) > 2 and row[2] is not None else None
+                        yield file_name, sheet_name, row_idx, id_value, chinese_value
         except Exception as e:
             print(f"搜索文件 {file_path} 时出错: {str(e)}")
+        finally:
+            # 每行读取第1列和第3列
+            IO_STATS.record_cells(file_path, read=rows_scanned * 2)
 
-    def search_in_xls_file(self, search_text, file_path):
-        """在.xls文件中搜索"""
+    def iter_xls_rows(self, file_path):
+        """逐行读取.xls文件的第1列和第3列"""
+        rows_scanned = 0
         try:
-            workbook = xlrd.open_workbook(file_path)
             file_name = Path(file_path).name
-
-            for sheet_index in range(workbook.nsheets):
-                sheet = workbook.sheet_by_index(sheet_index)
-                sheet_name = sheet.name
-
-                for row_idx in range(sheet.nrows):
-                    # 获取当前行的ID值（第1列）和中文内容（第3列）
-                    id_value = ""
-                    chinese_value = ""
-                    found_match = False
-
-                    if sheet.ncols > 0:
-                        id_cell_value = sheet.cell_value(row_idx, 0)
-                        if id_cell_value:
-                            id_value = str(id_cell_value)
-
-                    if sheet.ncols > 2:
-                        chinese_cell_value = sheet.cell_value(row_idx, 2)
-                        if chinese_cell_value:
-                            chinese_value = str(chinese_cell_value)
-
-                    # 在第1列(ID)和第3列(中文名称)中搜索
-                    for col_idx in [0, 2]:
-                        if col_idx < sheet.ncols:
-                            cell_value = sheet.cell_value(row_idx, col_idx)
-                            if cell_value:
-                                cell_value_str = str(cell_value)
-                                if self.is_text_match(cell_value_str, search_text):
-                                    found_match = True
-                                    break
-
-                    # 如果找到匹配，添加一个包含完整行信息的结果
-                    if found_match:
-                        # 确定哪一列包含搜索文本
-                        matched_col = 0
-                        if id_value and self.is_text_match(id_value, search_text):
-                            matched_col = 1
-                        elif chinese_value and self.is_text_match(chinese_value, search_text):
-                            matched_col = 3
-
-                        # 添加搜索结果，包含完整的行信息
-                        self.search_results.append({
-                            'file': file_name,
-                            'sheet': sheet_name,
-                            'row': row_idx + 1,
-                            'col': matched_col,
-                            'id': id_value,
-                            'content': chinese_value if matched_col == 3 else id_value,
-                            'chinese_content': chinese_value,  # 总是保存中文内容用于显示
-                            'search_text': search_text
-                        })
+            with WorkbookReader(file_path) as reader:
+                for sheet_name in reader.sheet_names:
+                    for row_idx, row in enumerate(reader.rows(sheet_name)):
+                        rows_scanned += 1
+                        # 获取当前行的ID值（第1列）和中文内容（第3列），空单元格不参与匹配
+                        id_value = str(row[0]) if len(row) > 0 and row[0] else None
+                        chinese_value = str(row[2]) if len(row) > 2 and row[2] else None
+                        yield file_name, sheet_name, row_idx, id_value, chinese_value
         except Exception as e:
             print(f"搜索文件 {file_path} 时出错: {str(e)}")
+        finally:
+            # 每行读取第1列和第3列
+            IO_STATS.record_cells(file_path, read=rows_scanned * 2)
+
+    def batch_search(self, terms, directory, jobs=1, index=None):
+        """一次搜索多个词（精确、前缀 t_hero* 或包含 *知己*），所有文件只扫描一遍
+
+        Args:
+            terms: 搜索词列表（重复的只搜一次）
+            jobs: 并行搜索的进程数
+            index: 语言索引，指定时每个词直接查索引，不扫描文件
+
+        Returns:
+            dict: {搜索词: [SearchRecord]}，按输入顺序，每个词的结果按文件、工作表、行排序
+        """
+        results = {term: [] for term in terms}
+        if index is not None:
+            for term in results:
+                results[term] = [self._match_row(term, file_name, sheet_name, row - 1, id_value, chinese_value)
+                                 for file_name, sheet_name, row, id_value, chinese_value in index.search(term)]
+            return results
+
+        excel_files = self.find_excel_files(directory)
+        jobs = search_jobs(jobs, excel_files)
+        if jobs <= 1:
+            for file_path in excel_files:
+                for term, records in self._batch_search_file(list(results), file_path).items():
+                    results[term].extend(records)
+            return results
+
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=min(jobs, len(excel_files))) as executor:
+            futures = [executor.submit(_batch_search_worker, list(results), str(file_path)) for file_path in excel_files]
+            # 按文件顺序合并各进程的结果
+            for file_path, future in zip(excel_files, futures):
+                try:
+                    file_results, worker_output, io_snapshot = future.result()
+                except Exception as e:
+                    print(f"搜索文件 {file_path} 时出错: {str(e)}")
+                    continue
+                if worker_output:
+                    print(worker_output, end='')
+                if io_snapshot:
+                    IO_STATS.merge(io_snapshot)
+                for term, records in file_results.items():
+                    results[term].extend(records)
+        return results
+
+    def _batch_search_file(self, terms, file_path):
+        """扫描单个文件一遍，返回 {搜索词: [SearchRecord]}（只含有结果的词）
+
+        精确词查字典，前缀词按各前缀长度截取后查字典，包含词逐个检查，每行的开销与词数基本无关
+        """
+        exact = set()
+        prefixes = {}
+        contains = []
+        for term in terms:
+            if len(term) > 1 and term.startswith('*') and term.endswith('*'):
+                contains.append((term, term[1:-1]))
+            elif term.endswith('*'):
+                prefixes[term[:-1]] = term
+            else:
+                exact.add(term)
+        prefix_lengths = sorted({len(prefix) for prefix in prefixes})
+
+        def matching_terms(value):
+            found = [value] if value in exact else []
+            for length in prefix_lengths:
+                if length > len(value):
+                    break
+                term = prefixes.get(value[:length])
+                if term is not None:
+                    found.append(term)
+            found.extend(term for term, needle in contains if needle in value)
+            return found
+
+        results = {}
+        for file_name, sheet_name, row_idx, id_value, chinese_value in self.iter_file_rows(file_path):
+            matched = matching_terms(id_value) if id_value is not None else []
+            if chinese_value is not None:
+                matched.extend(term for term in matching_terms(chinese_value) if term not in matched)
+            for term in matched:
+                results.setdefault(term, []).append(
+                    self._match_row(term, file_name, sheet_name, row_idx, id_value, chinese_value))
+        return results
+
+    def print_batch_results(self, results, output=None):
+        """按搜索词分组输出批量搜索结果，并按 get_chinese_text_by_id 的规则分类：
+        唯一（恰好1处）、未找到、不唯一（多于1处）
+
+        精确词只计ID等于该词且中文不为空的行（与按ID查找相同），只有中文列匹配或中文为空的行照常列出和保存，
+        但不计入分类；前缀词、包含词计所有匹配的行。
+        output 指定时每个词一行JSON写入其中：{"term", "status": unique/not_found/ambiguous, "matches": [...]}
+        """
+        counts = {'unique': 0, 'not_found': 0, 'ambiguous': 0}
+        for term, records in results.items():
+            if term.endswith('*'):
+                hits = records
+            else:
+                hits = [record for record in records if record.id == term and record.chinese_content]
+            status = 'not_found' if not hits else 'unique' if len(hits) == 1 else 'ambiguous'
+            counts[status] += 1
+            for record in records:
+                self.search_records.write(record)
+
+            if output is not None:
+                output.write(json.dumps({'term': term, 'status': status,
+                                         'matches': [record._asdict() for record in records]},
+                                        ensure_ascii=False) + '\n')
+                continue
+            if status == 'not_found':
+                print(f"[未找到] {term}")
+            elif status == 'unique':
+                record = hits[0]
+                print(f"[唯一] {term} -> {record.chinese_content}  ({record.file}[{record.sheet}], 行{record.row})")
+            else:
+                print(f"[不唯一: {len(hits)} 处] {term}")
+                for record in hits[:PRINT_RECORD_LIMIT]:
+                    print(f"    {record.file}[{record.sheet}], 行{record.row}: {record.id}, {record.chinese_content}")
+                if len(hits) > PRINT_RECORD_LIMIT:
+                    print(f"    ... 另有 {len(hits) - PRINT_RECORD_LIMIT} 处未显示")
+            others = [] if hits is records else [record for record in records if record not in set(hits)]
+            if others:
+                print(f"    另有 {len(others)} 处中文列匹配或中文为空，不计入分类:")
+                for record in others[:PRINT_RECORD_LIMIT]:
+                    print(f"    {record.file}[{record.sheet}], 行{record.row}: {record.id}, {record.chinese_content}")
+                if len(others) > PRINT_RECORD_LIMIT:
+                    print(f"    ... 另有 {len(others) - PRINT_RECORD_LIMIT} 处未显示")
+
+        print(f"\n共 {len(results)} 个搜索词: 唯一 {counts['unique']}, 未找到 {counts['not_found']}, "
+              f"不唯一 {counts['ambiguous']}")
+        if self.search_records.path:
+            print(f"完整记录（{self.search_records.count} 条）已保存到: {self.search_records.path}")
+        return counts
 
     def get_chinese_text_by_id(self, search_id, directory=None):
         """根据ID直接获取对应的中文文本（第3列内容）
@@ -522,23 +2404,7 @@ class ExcelTextReplacer:
         if not directory:
             return None
 
-        excel_files = self.find_excel_files(directory)
-        if not excel_files:
-            return None
-
-        matching_results = []
-
-        for file_path in excel_files:
-            file_extension = Path(file_path).suffix.lower()
-
-            if file_extension == '.xlsx':
-                results = self._search_chinese_in_xlsx(search_id, file_path)
-            elif file_extension == '.xls':
-                results = self._search_chinese_in_xls(search_id, file_path)
-            else:
-                continue
-
-            matching_results.extend(results)
+        matching_results = get_language_index(directory).lookup(search_id)
 
         # 检查结果是否唯一
         if len(matching_results) == 1:
@@ -563,123 +2429,131 @@ class ExcelTextReplacer:
         results = {}
 
         try:
-            file_extension = Path(excel_file_path).suffix.lower()
-
-            if file_extension == '.xlsx':
-                results = self._lookup_in_xlsx(excel_file_path, sheet_name, match_column, return_column, search_values)
-            elif file_extension == '.xls':
-                results = self._lookup_in_xls(excel_file_path, sheet_name, match_column, return_column, search_values)
+            table = self.get_lookup_table(excel_file_path, sheet_name, match_column, return_column)
+            for value in search_values:
+                if value in table:
+                    results[value] = table[value]
 
         except Exception as e:
             print(f"查找字段值时出错: {str(e)}")
 
         return results
 
-    def _lookup_in_xlsx(self, excel_file_path, sheet_name, match_column, return_column, search_values):
-        """在.xlsx文件中查找字段值"""
-        results = {}
-
-        try:
-            workbook = openpyxl.load_workbook(excel_file_path, read_only=True)
+    def get_lookup_table(self, excel_file_path, sheet_name, match_column, return_column):
+        """获取完整的关联查找表 {匹配值: 返回值}
 
-            if sheet_name not in workbook.sheetnames:
-                print(f"工作表 '{sheet_name}' 不存在于文件 {Path(excel_file_path).name}")
-                workbook.close()
-                return results
-
-            sheet = workbook[sheet_name]
-
-            # 获取表头行，找到列索引
-            header_row = next(sheet.iter_rows(min_row=1, max_row=1, values_only=True))
-
-            match_col_idx = None
-            return_col_idx = None
+        查找表按文件签名缓存在进程内，同一个工作表只读取一次，并保存到影子缓存供其他进程使用；
+        文件被修改后自动重新读取。
+        """
+        file_key = str(Path(excel_file_path).resolve())
+        table_key = (file_key, sheet_name, match_column, return_column)
+        signature = file_signature(file_key)
+
+        # 并发查找时只让一个线程读取文件，其余线程等待后直接使用缓存
+        with _lookup_tables_build_lock:
+            with _lookup_tables_lock:
+                cached = _lookup_tables.get(table_key)
+            if cached and cached[0] == signature:
+                IO_STATS.record_cache('lookup_table', True)
+                return cached[1]
+
+            IO_STATS.record_cache('lookup_table', False)
+            file_extension = Path(excel_file_path).suffix.lower()
 
-            for idx, header in enumerate(header_row):
-                if header == match_column and match_col_idx is None:
-                    match_col_idx = idx
-                elif header == return_column and return_col_idx is None:
-                    return_col_idx = idx
+            def read_table():
+                if file_extension == '.xlsx':
+                    table = self._read_lookup_table_xlsx(excel_file_path, sheet_name, match_column, return_column)
+                elif file_extension == '.xls':
+                    table = self._read_lookup_table_xls(excel_file_path, sheet_name, match_column, return_column)
+                else:
+                    table = {}
+                # 读不到数据（工作表或列不存在）时不缓存，下次仍给出提示
+                return table or None
+
+            with workbook_lock(excel_file_path, shared=True):
+                # 工作簿没有变化时直接读影子缓存
+                table = ShadowCache(excel_file_path).get(
+                    'lookup', f"{sheet_name}.{match_column}.{return_column}", read_table) or {}
+
+            with _lookup_tables_lock:
+                _lookup_tables[table_key] = (signature, table)
+            return table
+
+    def _catalog_columns(self, excel_file_path, sheet_name, match_column, return_column):
+        """从工作簿目录查找匹配列和返回列的序号，工作表或列不存在时打印原因并返回None"""
+        sheet = get_workbook_catalog(Path(excel_file_path).parent).sheet(excel_file_path, sheet_name)
+        if sheet is None:
+            print(f"工作表 '{sheet_name}' 不存在于文件 {Path(excel_file_path).name}")
+            return None
+        match_col_idx = sheet['columns'].get(match_column)
+        if match_col_idx is None:
+            print(f"未找到匹配列 '{match_column}' 在工作表 '{sheet_name}'")
+            return None
+        return_col_idx = sheet['columns'].get(return_column)
+        if return_col_idx is None:
+            print(f"未找到返回列 '{return_column}' 在工作表 '{sheet_name}'")
+            return None
+        return match_col_idx, return_col_idx
 
-            if match_col_idx is None:
-                print(f"未找到匹配列 '{match_column}' 在工作表 '{sheet_name}'")
-                workbook.close()
-                return results
+    def _read_lookup_table_xlsx(self, excel_file_path, sheet_name, match_column, return_column):
+        """读取.xlsx文件中的关联查找表"""
+        results = {}
 
-            if return_col_idx is None:
-                print(f"未找到返回列 '{return_column}' 在工作表 '{sheet_name}'")
-                workbook.close()
+        try:
+            # 工作表和列索引查工作簿目录，不必先读表头
+            columns = self._catalog_columns(excel_file_path, sheet_name, match_column, return_column)
+            if columns is None:
                 return results
-
-            # 遍历数据行查找匹配值
-            for row in sheet.iter_rows(min_row=2, values_only=True):
-                if len(row) > max(match_col_idx, return_col_idx):
-                    match_value = row[match_col_idx]
-                    return_value = row[return_col_idx]
-
-                    if match_value is not None and return_value is not None:
-                        # 统一转换为文本字符串，避免数值类型问题
-                        match_str = self._convert_to_text_string(match_value)
-                        return_str = self._convert_to_text_string(return_value)
-                        if match_str in search_values:
+            match_col_idx, return_col_idx = columns
+
+            # 遍历数据行（跳过表头），后出现的行覆盖先出现的行
+            rows_read = 0
+            with WorkbookReader(excel_file_path) as reader:
+                for row in islice(reader.rows(sheet_name), 1, None):
+                    rows_read += 1
+                    if len(row) > max(match_col_idx, return_col_idx):
+                        match_value = row[match_col_idx]
+                        return_value = row[return_col_idx]
+
+                        if match_value is not None and return_value is not None:
+                            # 统一转换为文本字符串，避免数值类型问题
+                            match_str = self._convert_to_text_string(match_value)
+                            return_str = self._convert_to_text_string(return_value)
                             results[match_str] = return_str
 
-            workbook.close()
+            IO_STATS.record_cells(excel_file_path, read=rows_read * 2)
 
         except Exception as e:
             print(f"读取.xlsx文件时出错: {str(e)}")
 
         return results
 
-    def _lookup_in_xls(self, excel_file_path, sheet_name, match_column, return_column, search_values):
-        """在.xls文件中查找字段值"""
+    def _read_lookup_table_xls(self, excel_file_path, sheet_name, match_column, return_column):
+        """读取.xls文件中的关联查找表"""
         results = {}
 
         try:
-            workbook = xlrd.open_workbook(excel_file_path)
-
-            sheet_names = workbook.sheet_names()
-            if sheet_name not in sheet_names:
-                print(f"工作表 '{sheet_name}' 不存在于文件 {Path(excel_file_path).name}")
+            # 工作表和列索引查工作簿目录（只在第1行查找，同名列取第一列）
+            columns = self._catalog_columns(excel_file_path, sheet_name, match_column, return_column)
+            if columns is None:
                 return results
+            match_col_idx, return_col_idx = columns
 
-            sheet = workbook.sheet_by_name(sheet_name)
-
-            if sheet.nrows == 0:
-                return results
-
-            # 获取表头行，找到列索引（只在第1行查找，优先选择列数小的列）
-            match_col_idx = None
-            return_col_idx = None
-
-            for col_idx in range(sheet.ncols):
-                header_value = sheet.cell_value(0, col_idx)
-                if header_value == match_column and match_col_idx is None:
-                    match_col_idx = col_idx
-                elif header_value == return_column and return_col_idx is None:
-                    return_col_idx = col_idx
-
-            if match_col_idx is None:
-                print(f"未找到匹配列 '{match_column}' 在工作表 '{sheet_name}'")
-                return results
-
-            if return_col_idx is None:
-                print(f"未找到返回列 '{return_column}' 在工作表 '{sheet_name}'")
-                return results
-
-            # 遍历数据行查找匹配值
-            for row_idx in range(1, sheet.nrows):
-                if match_col_idx < sheet.ncols and return_col_idx < sheet.ncols:
-                    match_value = sheet.cell_value(row_idx, match_col_idx)
-                    return_value = sheet.cell_value(row_idx, return_col_idx)
+            # 遍历数据行（跳过表头），后出现的行覆盖先出现的行
+            rows_read = 0
+            with WorkbookReader(excel_file_path, pooled=True) as reader:
+                for row in islice(reader.rows(sheet_name), 1, None):
+                    rows_read += 1
+                    match_value = row[match_col_idx]
+                    return_value = row[return_col_idx]
 
                     if match_value and return_value:
                         # 统一转换为文本字符串，避免数值类型问题
                         match_str = self._convert_to_text_string(match_value)
                         return_str = self._convert_to_text_string(return_value)
+                        results[match_str] = return_str
 
-                        if match_str in search_values:
-                            results[match_str] = return_str
+            IO_STATS.record_cells(excel_file_path, read=rows_read * 2)
 
         except Exception as e:
             print(f"读取.xls文件时出错: {str(e)}")
@@ -706,67 +2580,6 @@ class ExcelTextReplacer:
             # 其他类型（字符串等）直接转换并去除首尾空格
             return str(value).strip()
 
-    def _search_chinese_in_xlsx(self, search_id, file_path):
-        """在.xlsx文件中搜索ID对应的中文文本"""
-        results = []
-        try:
-            workbook = openpyxl.load_workbook(file_path)
-
-            for sheet_name in workbook.sheetnames:
-                sheet = workbook[sheet_name]
-
-                for row_idx, row in enumerate(sheet.iter_rows()):
-                    # 检查第1列是否匹配搜索ID
-                    if len(row) > 0 and row[0].value is not None:
-                        id_value = str(row[0].value)
-                        if id_value == search_id:
-                            # 获取第3列的中文内容
-                            if len(row) > 2 and row[2].value is not None:
-                                chinese_text = str(row[2].value)
-                                results.append({
-                                    'file': Path(file_path).name,
-                                    'sheet': sheet_name,
-                                    'row': row_idx + 1,
-                                    'chinese_text': chinese_text
-                                })
-
-            workbook.close()
-        except Exception as e:
-            pass
-
-        return results
-
-    def _search_chinese_in_xls(self, search_id, file_path):
-        """在.xls文件中搜索ID对应的中文文本"""
-        results = []
-        try:
-            workbook = xlrd.open_workbook(file_path)
-
-            for sheet_index in range(workbook.nsheets):
-                sheet = workbook.sheet_by_index(sheet_index)
-                sheet_name = sheet.name
-
-                for row_idx in range(sheet.nrows):
-                    # 检查第1列是否匹配搜索ID
-                    if sheet.ncols > 0:
-                        id_cell_value = sheet.cell_value(row_idx, 0)
-                        if id_cell_value and str(id_cell_value) == search_id:
-                            # 获取第3列的中文内容
-                            if sheet.ncols > 2:
-                                chinese_cell_value = sheet.cell_value(row_idx, 2)
-                                if chinese_cell_value:
-                                    chinese_text = str(chinese_cell_value)
-                                    results.append({
-                                        'file': Path(file_path).name,
-                                        'sheet': sheet_name,
-                                        'row': row_idx + 1,
-                                        'chinese_text': chinese_text
-                                    })
-        except Exception as e:
-            pass
-
-        return results
-
     def update_language_text_by_id(self, t_id, new_chinese_text, directory=None):
         """更新指定ID的中文文本
 
@@ -789,18 +2602,7 @@ class ExcelTextReplacer:
             return False
 
         # 查找所有匹配的条目
-        matching_results = []
-        for file_path in excel_files:
-            file_extension = Path(file_path).suffix.lower()
-
-            if file_extension == '.xlsx':
-                results = self._search_chinese_in_xlsx(t_id, file_path)
-            elif file_extension == '.xls':
-                results = self._search_chinese_in_xls(t_id, file_path)
-            else:
-                continue
-
-            matching_results.extend(results)
+        matching_results = get_language_index(directory).lookup(t_id)
 
         if len(matching_results) == 1:
             # 找到唯一匹配项，更新它
@@ -883,12 +2685,13 @@ class ExcelTextReplacer:
         try:
             file_extension = file_path.suffix.lower()
 
-            if file_extension == '.xlsx':
-                return self._update_text_in_xlsx(file_path, sheet_name, row_idx, new_text)
-            elif file_extension == '.xls':
-                return self._update_text_in_xls(file_path, sheet_name, row_idx, new_text)
-            else:
-                return False
+            with workbook_lock(file_path):
+                if file_extension == '.xlsx':
+                    return self._update_text_in_xlsx(file_path, sheet_name, row_idx, new_text)
+                elif file_extension == '.xls':
+                    return self._update_text_in_xls(file_path, sheet_name, row_idx, new_text)
+                else:
+                    return False
 
         except Exception as e:
             print(f"更新语言文本时出错: {str(e)}")
@@ -897,7 +2700,7 @@ class ExcelTextReplacer:
     def _update_text_in_xlsx(self, file_path, sheet_name, row_idx, new_text):
         """在.xlsx文件中更新文本"""
         try:
-            workbook = openpyxl.load_workbook(file_path)
+            workbook = load_xlsx(file_path)
 
             if sheet_name not in workbook.sheetnames:
                 workbook.close()
@@ -908,7 +2711,8 @@ class ExcelTextReplacer:
             # 更新第3列（索引为2）的文本
             if sheet.max_row > row_idx and sheet.max_column >= 3:
                 sheet.cell(row=row_idx + 1, column=3, value=new_text)
-                workbook.save(file_path)
+                save_workbook(workbook, file_path)
+                IO_STATS.record_cells(file_path, written=1)
                 workbook.close()
                 print(f"  已更新 {file_path.name}[{sheet_name}] 行{row_idx + 1}")
                 return True
@@ -924,7 +2728,7 @@ class ExcelTextReplacer:
         """在.xls文件中更新文本（需要重写整个文件）"""
         try:
             # 读取原文件的所有数据
-            old_workbook = xlrd.open_workbook(file_path)
+            old_workbook = open_xls(file_path)
 
             # 创建新的工作簿
             new_workbook = xlwt.Workbook()
@@ -948,7 +2752,9 @@ class ExcelTextReplacer:
                             new_sheet.write(r, c, cell_value)
 
             # 保存新文件
-            new_workbook.save(file_path)
+            save_workbook(new_workbook, file_path)
+            cell_count = xls_cell_count(old_workbook)
+            IO_STATS.record_cells(file_path, read=cell_count, written=cell_count)
             print(f"  已更新 {file_path.name}[{sheet_name}] 行{row_idx + 1}")
             return True
 
@@ -972,12 +2778,13 @@ class ExcelTextReplacer:
             file_path = Path(target_file_path)
             file_extension = file_path.suffix.lower()
 
-            if file_extension == '.xlsx':
-                return self._add_entry_to_xlsx(file_path, target_sheet_name, t_id, chinese_text)
-            elif file_extension == '.xls':
-                return self._add_entry_to_xls(file_path, target_sheet_name, t_id, chinese_text)
-            else:
-                return False
+            with workbook_lock(file_path):
+                if file_extension == '.xlsx':
+                    return self._add_entry_to_xlsx(file_path, target_sheet_name, t_id, chinese_text)
+                elif file_extension == '.xls':
+                    return self._add_entry_to_xls(file_path, target_sheet_name, t_id, chinese_text)
+                else:
+                    return False
 
         except Exception as e:
             print(f"新增语言条目时出错: {str(e)}")
@@ -987,7 +2794,7 @@ class ExcelTextReplacer:
         """在.xlsx文件中新增条目"""
         try:
             if file_path.exists():
-                workbook = openpyxl.load_workbook(file_path)
+                workbook = load_xlsx(file_path)
             else:
                 workbook = openpyxl.Workbook()
                 # 删除默认工作表
@@ -1012,7 +2819,8 @@ class ExcelTextReplacer:
             sheet.cell(row=next_row, column=2, value="")  # 英文列暂时为空
             sheet.cell(row=next_row, column=3, value=chinese_text)
 
-            workbook.save(file_path)
+            save_workbook(workbook, file_path)
+            IO_STATS.record_cells(file_path, written=3)
             workbook.close()
             print(f"  已新增条目到 {file_path.name}[{sheet_name}] 行{next_row}")
             return True
@@ -1029,7 +2837,7 @@ class ExcelTextReplacer:
 
             # 如果文件存在，读取现有数据
             if file_path.exists():
-                old_workbook = xlrd.open_workbook(file_path)
+                old_workbook = open_xls(file_path)
 
                 for sheet_idx in range(old_workbook.nsheets):
                     old_sheet = old_workbook.sheet_by_index(sheet_idx)
@@ -1081,7 +2889,9 @@ class ExcelTextReplacer:
                         for col_idx, cell_value in enumerate(row_data):
                             new_sheet.write(row_idx, col_idx, cell_value)
 
-            new_workbook.save(file_path)
+            save_workbook(new_workbook, file_path)
+            cells_copied = sum(len(row_data) for _, sheet_data in existing_sheets for row_data in sheet_data)
+            IO_STATS.record_cells(file_path, read=cells_copied, written=cells_copied + 3)
             return True
 
         except Exception as e:
@@ -1108,14 +2918,16 @@ class ExcelTextReplacer:
             file_path = Path(excel_file_path)
             file_extension = file_path.suffix.lower()
 
-            if file_extension == '.xlsx':
-                return self._update_cell_in_xlsx(file_path, sheet_name, row_num, col_name, new_value, arr_pos, arr_type, change_type)
-            elif file_extension == '.xls':
-                return self._update_cell_in_xls(file_path, sheet_name, row_num, col_name, new_value, arr_pos, arr_type, change_type)
-            else:
+            if file_extension not in SUPPORTED_EXTENSIONS:
                 print(f"不支持的文件格式: {file_extension}")
                 return False
 
+            with workbook_lock(file_path):
+                if file_extension == '.xlsx':
+                    return self._update_cell_in_xlsx(file_path, sheet_name, row_num, col_name, new_value, arr_pos, arr_type, change_type)
+                else:
+                    return self._update_cell_in_xls(file_path, sheet_name, row_num, col_name, new_value, arr_pos, arr_type, change_type)
+
         except Exception as e:
             print(f"精确更新单元格时出错: {str(e)}")
             return False
@@ -1123,7 +2935,7 @@ class ExcelTextReplacer:
     def _update_cell_in_xlsx(self, file_path, sheet_name, row_num, col_name, new_value, arr_pos, arr_type, change_type):
         """在.xlsx文件中精确更新单元格"""
         try:
-            workbook = openpyxl.load_workbook(file_path)
+            workbook = load_xlsx(file_path)
 
             if sheet_name not in workbook.sheetnames:
                 print(f"工作表 '{sheet_name}' 不存在")
@@ -1155,7 +2967,8 @@ class ExcelTextReplacer:
             # 更新单元格
             current_cell.value = updated_value
 
-            workbook.save(file_path)
+            save_workbook(workbook, file_path)
+            IO_STATS.record_cells(file_path, read=1, written=1)
             workbook.close()
 
             print(f"  已更新 {file_path.name}[{sheet_name}] 行{row_num} 列{col_name}")
@@ -1255,7 +3068,7 @@ class ExcelTextReplacer:
         """在.xls文件中精确更新单元格（需要重写整个文件）"""
         try:
             # 读取原文件的所有数据
-            old_workbook = xlrd.open_workbook(file_path)
+            old_workbook = open_xls(file_path)
 
             # 找到目标工作表
             target_sheet = None
@@ -1312,7 +3125,9 @@ class ExcelTextReplacer:
                             new_sheet.write(r, c, cell_value)
 
             # 保存新文件
-            new_workbook.save(file_path)
+            save_workbook(new_workbook, file_path)
+            cell_count = xls_cell_count(old_workbook)
+            IO_STATS.record_cells(file_path, read=cell_count, written=cell_count)
             print(f"  已更新 {file_path.name}[{sheet_name}] 行{row_num} 列{col_name}")
             return True
 
@@ -1337,14 +3152,16 @@ class ExcelTextReplacer:
             file_path = Path(excel_file_path)
             file_extension = file_path.suffix.lower()
 
-            if file_extension == '.xlsx':
-                return self._update_cell_with_changes_xlsx(file_path, sheet_name, row_num, col_name, cell_changes)
-            elif file_extension == '.xls':
-                return self._update_cell_with_changes_xls(file_path, sheet_name, row_num, col_name, cell_changes)
-            else:
+            if file_extension not in SUPPORTED_EXTENSIONS:
                 print(f"不支持的文件格式: {file_extension}")
                 return False
 
+            with workbook_lock(file_path):
+                if file_extension == '.xlsx':
+                    return self._update_cell_with_changes_xlsx(file_path, sheet_name, row_num, col_name, cell_changes)
+                else:
+                    return self._update_cell_with_changes_xls(file_path, sheet_name, row_num, col_name, cell_changes)
+
         except Exception as e:
             print(f"处理单元格多个变更时出错: {str(e)}")
             return False
@@ -1352,7 +3169,7 @@ class ExcelTextReplacer:
     def _update_cell_with_changes_xlsx(self, file_path, sheet_name, row_num, col_name, cell_changes):
         """在.xlsx文件中处理单元格的多个变更"""
         try:
-            workbook = openpyxl.load_workbook(file_path)
+            workbook = load_xlsx(file_path)
 
             if sheet_name not in workbook.sheetnames:
                 print(f"工作表 '{sheet_name}' 不存在")
@@ -1387,7 +3204,8 @@ class ExcelTextReplacer:
             # 更新单元格
             current_cell.value = final_value
 
-            workbook.save(file_path)
+            save_workbook(workbook, file_path)
+            IO_STATS.record_cells(file_path, read=1, written=1)
             workbook.close()
 
             print(f"  已更新 {file_path.name}[{sheet_name}] 行{row_num} 列{col_name}")
@@ -1482,7 +3300,7 @@ class ExcelTextReplacer:
         """在.xls文件中处理单元格的多个变更（需要重写整个文件）"""
         try:
             # 读取原文件的所有数据
-            old_workbook = xlrd.open_workbook(file_path)
+            old_workbook = open_xls(file_path)
 
             # 找到目标工作表
             target_sheet = None
@@ -1543,7 +3361,9 @@ class ExcelTextReplacer:
                             new_sheet.write(r, c, cell_value)
 
             # 保存新文件
-            new_workbook.save(file_path)
+            save_workbook(new_workbook, file_path)
+            cell_count = xls_cell_count(old_workbook)
+            IO_STATS.record_cells(file_path, read=cell_count, written=cell_count)
             print(f"  已更新 {file_path.name}[{sheet_name}] 行{row_num} 列{col_name}")
             return True
 
@@ -1554,30 +3374,24 @@ class ExcelTextReplacer:
     def get_id_for_row(self, file_name, sheet_name, row_idx):
         """获取指定行的ID值（第1列）"""
         # 从搜索结果中查找对应行的ID
-        for result in self.search_results:
-            if (result['file'] == file_name and
-                result['sheet'] == sheet_name and
-                result['row'] == row_idx + 1 and
-                result['col'] == 1):
-                return result['content']
+        for result in self.search_records.kept:
+            if (result.file == file_name and
+                result.sheet == sheet_name and
+                result.row == row_idx + 1 and
+                result.col == 1):
+                return result.content
 
         # 如果没找到，尝试重新读取文件获取ID
         try:
             file_path = Path(file_name)
-            if file_path.suffix.lower() == '.xlsx':
-                workbook = openpyxl.load_workbook(file_path)
-                sheet = workbook[sheet_name]
-                rows = list(sheet.iter_rows())
-                if row_idx < len(rows) and len(rows[row_idx]) > 0:
-                    id_value = rows[row_idx][0].value
-                    workbook.close()
+            with workbook_lock(file_path, shared=True), WorkbookReader(file_path) as reader:
+                row = next(islice(reader.rows(sheet_name), row_idx, None), None)
+                if row:
+                    id_value = row[0]
+                    IO_STATS.record_cells(file_path, read=1)
+                    if reader.is_xls:
+                        return str(id_value) if id_value else ""
                     return str(id_value) if id_value is not None else ""
-            elif file_path.suffix.lower() == '.xls':
-                workbook = xlrd.open_workbook(file_path)
-                sheet = workbook.sheet_by_name(sheet_name)
-                if row_idx < sheet.nrows and sheet.ncols > 0:
-                    id_value = sheet.cell_value(row_idx, 0)
-                    return str(id_value) if id_value else ""
         except:
             pass
 
@@ -1603,27 +3417,816 @@ class ExcelTextReplacer:
             print(f"  替换次数: {file_info['replacements']}")
 
         # 输出详细的替换信息
-        if self.detailed_replacements:
+        if self.replacement_records.count:
             print("\n" + "="*80)
             print("详细替换记录")
             print("="*80)
 
             # 按文件分组显示
             current_file = ""
-            for replacement in self.detailed_replacements:
-                if replacement['file'] != current_file:
-                    current_file = replacement['file']
+            for replacement in self.replacement_records.kept:
+                if replacement.file != current_file:
+                    current_file = replacement.file
                     print(f"\n📁 {current_file}:")
 
                 # 格式化输出替换信息
-                col_name = "ID" if replacement['col'] == 1 else "中文名称"
-                print(f"  [{replacement['sheet']}], 行{replacement['row']}({col_name}): {replacement['id']},{replacement['col']},{replacement['before']} -> {replacement['id']},{replacement['col']},{replacement['after']}")
+                col_name = "ID" if replacement.col == 1 else "中文名称"
+                print(f"  [{replacement.sheet}], 行{replacement.row}({col_name}): {replacement.id},{replacement.col},{replacement.before} -> {replacement.id},{replacement.col},{replacement.after}")
+            self.replacement_records.print_footer()
 
         print("\n" + "="*80)
 
+def _replace_file_worker(replacement_config, file_path, dry_run, state=None):
+    """并行替换的工作进程：规划并写入单个文件（state 为该文件的增量替换记录）
+
+    Returns:
+        tuple: (实际写入的替换计划或None, 本文件的输出文本, 本进程的文件读写统计)
+    """
+    import io
+
+    replacer = ExcelTextReplacer(replacement_config)
+    replacer.state = state
+    before = IO_STATS.snapshot()
+    output = io.StringIO()
+    with redirect_stdout(output):
+        plan = replacer.plan_file(file_path)
+        if plan is not None and not dry_run:
+            plan = replacer.write_plan(plan)
+    return plan, output.getvalue(), io_delta(before, IO_STATS.snapshot())
+
+
+def search_jobs(jobs, excel_files):
+    """实际使用的搜索进程数：只有1个文件，或文件总大小小于 SEARCH_PARALLEL_MIN_SIZE 时为1"""
+    if jobs <= 1 or len(excel_files) <= 1:
+        return 1
+    try:
+        total_size = sum(os.path.getsize(file_path) for file_path in excel_files)
+    except OSError:
+        return jobs
+    return jobs if total_size >= SEARCH_PARALLEL_MIN_SIZE else 1
+
+
+def _search_file_worker(search_text, file_path, limit, file_idx, batches, stop):
+    """并行搜索的工作进程：搜索单个文件（最多 limit 条）
+
+    每找到 SEARCH_STREAM_BATCH 条结果就把 (file_idx, [SearchRecord]) 放入 batches 队列，搜完后放入
+    (file_idx, None) 作为结束标记；stop 被设置时（调用方已停止）不再继续搜索。
+
+    Returns:
+        tuple: (本文件的输出文本, 本进程的文件读写统计)
+    """
+    import io
+
+    replacer = ExcelTextReplacer({})
+    before = IO_STATS.snapshot()
+    output = io.StringIO()
+    with redirect_stdout(output):
+        if not stop.is_set():
+            results = []
+            for result in islice(replacer.iter_file_matches(search_text, file_path), limit):
+                results.append(result)
+                if len(results) >= SEARCH_STREAM_BATCH:
+                    if stop.is_set():
+                        break
+                    batches.put((file_idx, results))
+                    results = []
+            if results and not stop.is_set():
+                batches.put((file_idx, results))
+    batches.put((file_idx, None))
+    return output.getvalue(), io_delta(before, IO_STATS.snapshot())
+
+
+def _batch_search_worker(terms, file_path):
+    """并行批量搜索的工作进程：扫描单个文件
+
+    Returns:
+        tuple: ({搜索词: [SearchRecord]}, 本文件的输出文本, 本进程的文件读写统计)
+    """
+    import io
+
+    replacer = ExcelTextReplacer({})
+    before = IO_STATS.snapshot()
+    output = io.StringIO()
+    with redirect_stdout(output):
+        results = replacer._batch_search_file(terms, file_path)
+    return results, output.getvalue(), io_delta(before, IO_STATS.snapshot())
+
+
+class WorkbookCatalog:
+    """工作簿目录
+
+    记录文件夹中每个工作簿的工作表列表、表头（第1行）、列序号和行列数。
+    按文件签名校验，工作簿变化后第一次用到时才重新读取，且只读取各工作表的第1行；行列数要逐行统计，
+    第一次调用 sheet_size 时才统计。
+    保存到文件夹对应的缓存文件夹（见 cache_folder）下的 WORKBOOK_CATALOG_FILE，下次运行不必再打开没有变化的工作簿。
+    """
+
+    VERSION = 2
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        # 文件名 -> (文件签名, {'mtime', 'sheets': [{'name', 'headers', 'columns', 'rows', 'cols'}]})
+        # columns 为 {表头: 列序号}（从0开始，同名表头取第一列）；rows / cols 还没统计时为None
+        self._files = {}
+        self._lock = threading.RLock()
+        self._saved_loaded = False
+        self.index_path = cache_folder(self.directory) / WORKBOOK_CATALOG_FILE if WORKBOOK_CATALOG_FILE else None
+
+    def workbook(self, file_path):
+        """工作簿的目录信息，文件变化后重新读取；文件不存在或读取失败时返回None"""
+        with self._lock:
+            info, changed = self._get(Path(file_path))
+            if changed:
+                self._save()
+            return info
+
+    def _get(self, file_path):
+        """返回 (目录信息, 是否重新读取过)"""
+        self._ensure_loaded()
+        signature = file_signature(file_path)
+        if signature is None:
+            return None, False
+        cached = self._files.get(file_path.name)
+        IO_STATS.record_cache('workbook_catalog', cached is not None and cached[0] == signature)
+        if cached is not None and cached[0] == signature:
+            return cached[1], False
+        info = self._read_workbook(file_path)
+        if info is None:
+            return None, False
+        self._files[file_path.name] = (signature, info)
+        return info, True
+
+    def refresh(self):
+        """检查整个文件夹：去掉已删除的工作簿，重新读取新增或修改过的
+
+        Returns:
+            dict: {文件名: 目录信息}
+        """
+        with self._lock:
+            current = {file_path.name: file_path
+                       for file_path in ExcelTextReplacer({}).find_excel_files(self.directory)
+                       if not file_path.name.startswith('~$')}
+            self._ensure_loaded()
+            removed = [name for name in self._files if name not in current]
+            for file_name in removed:
+                del self._files[file_name]
+            workbooks = {}
+            changed = bool(removed)
+            for file_name, file_path in current.items():
+                info, reread = self._get(file_path)
+                changed = changed or reread
+                if info is not None:
+                    workbooks[file_name] = info
+            if changed:
+                self._save()
+            return workbooks
+
+    def sheet_names(self, file_path):
+        """工作表名称列表；读取失败时为空列表"""
+        info = self.workbook(file_path)
+        return [sheet['name'] for sheet in info['sheets']] if info else []
+
+    def sheet(self, file_path, sheet_name):
+        """工作表的目录信息 {'name', 'headers', 'columns', 'rows', 'cols'}；工作表不存在时返回None"""
+        info = self.workbook(file_path)
+        for sheet in info['sheets'] if info else ():
+            if sheet['name'] == sheet_name:
+                return sheet
+        return None
+
+    def column_index(self, file_path, sheet_name, column):
+        """列名（第1行表头）对应的列序号，从0开始；工作表或列不存在时返回None"""
+        sheet = self.sheet(file_path, sheet_name)
+        return sheet['columns'].get(column) if sheet else None
+
+    def sheet_size(self, file_path, sheet_name):
+        """工作表的 (行数, 列数)，第一次调用时逐行统计并保存；工作表不存在或读取失败时返回None"""
+        file_path = Path(file_path)
+        with self._lock:
+            sheet = self.sheet(file_path, sheet_name)
+            if sheet is None:
+                return None
+            if sheet['rows'] is None:
+                # 部分导出工具写入的尺寸信息不准确或缺失，行列数按实际内容统计
+                rows, cols = 0, 0
+                try:
+                    with workbook_lock(file_path, shared=True), WorkbookReader(file_path, pooled=True) as reader:
+                        signature = file_signature(file_path)
+                        for row in reader.rows(sheet_name):
+                            rows += 1
+                            cols = max(cols, len(row))
+                except Exception as e:
+                    print(f"读取工作簿 {file_path.name} 时出错: {str(e)}")
+                    return None
+                # 目录读取后工作簿又被修改时，统计结果不记入旧的目录信息
+                if self._files.get(file_path.name, (None,))[0] != signature:
+                    return rows, cols
+                sheet['rows'], sheet['cols'] = rows, cols
+                self._save()
+            return sheet['rows'], sheet['cols']
+
+    def _read_workbook(self, file_path):
+        """读取工作簿的工作表和表头（每个工作表只读第1行）；读取失败时返回None"""
+        sheets = []
+        try:
+            with workbook_lock(file_path, shared=True), WorkbookReader(file_path, pooled=True) as reader:
+                for sheet_name in reader.sheet_names:
+                    rows = reader.rows(sheet_name)
+                    headers = list(next(rows, []))
+                    rows.close()
+                    sheets.append(self._sheet_info(sheet_name, headers, None, None))
+        except Exception as e:
+            print(f"读取工作簿 {file_path.name} 时出错: {str(e)}")
+            return None
+        IO_STATS.record_cells(file_path, read=sum(len(sheet['headers']) for sheet in sheets))
+        return {'mtime': os.path.getmtime(file_path), 'sheets': sheets}
+
+    @staticmethod
+    def _sheet_info(name, headers, rows, cols):
+        headers = ['' if value is None else value for value in headers]
+        columns = {}
+        for col_idx, header in enumerate(headers):
+            if header != '':
+                columns.setdefault(header, col_idx)
+        return {'name': name, 'headers': headers, 'columns': columns, 'rows': rows, 'cols': cols}
+
+    def _ensure_loaded(self):
+        if not self._saved_loaded:
+            self._saved_loaded = True
+            self._load_saved()
+
+    def _load_saved(self):
+        """读取保存的目录（文件签名不符的工作簿在用到时重新读取）"""
+        saved = load_cache_file(self.index_path, self.VERSION, "工作簿目录")
+        if saved is not None:
+            self._files = saved['files']
+
+    def _save(self):
+        save_cache_file(self.index_path, self.VERSION, "工作簿目录", files=self._files)
+
+    def stats(self):
+        """返回目录规模 {'workbooks': 工作簿数, 'sheets': 工作表数}"""
+        with self._lock:
+            return {'workbooks': len(self._files),
+                    'sheets': sum(len(info['sheets']) for _, info in self._files.values())}
+
+
+class LanguageIndex:
+    """语言表索引
+
+    一次读取语言文件夹中所有工作簿的第1列(ID)和第3列(中文)，之后按ID查找直接查内存。
+    按文件签名增量刷新，只重新读取发生变化的文件；查找结果与逐个扫描文件一致。
+    ID和中文另按字符串排序保存，精确搜索和前缀搜索（t_hero_getway*）为二分查找后的区间扫描；
+    中文另有二字倒排索引（每两个相邻字符 -> 包含它的行），包含搜索（*知己*）只检查倒排表交集中的行。
+    条目和倒排索引保存到语言文件夹对应的缓存文件夹（见 cache_folder）下的 LANG_INDEX_FILE，下次运行只重新读取变化过的文件。
+    """
+
+    VERSION = 1
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        # 文件路径 -> (文件签名, [(ID, 工作表序号, 工作表名, 行号, 中文)], {二字: array(条目序号)})，空单元格为None
+        self._files = {}
+        self._by_id = {}    # ID -> [(文件名, 工作表序号, 工作表名, 行号, 中文)]（ID和中文都不为空的行）
+        self._order = {}    # 文件名 -> 扫描顺序（与find_excel_files一致）
+        self._sorted = None  # 搜索用的有序键，见 _sorted_keys()
+        self._lock = threading.RLock()
+        self._checked_at = None
+        self._stale = True
+        self._saved_loaded = False
+        self.index_path = cache_folder(self.directory) / LANG_INDEX_FILE if LANG_INDEX_FILE else None
+
+    def invalidate(self, file_path=None):
+        """标记索引需要重新检查文件（不加锁，可在释放工作簿锁时调用）"""
+        self._stale = True
+
+    def has_saved(self):
+        """语言文件夹下是否有保存的索引"""
+        return self.index_path is not None and self.index_path.exists()
+
+    def refresh(self, force=False):
+        """检查语言文件夹，重新读取新增或修改过的文件"""
+        with self._lock:
+            now = time.monotonic()
+            if (not force and not self._stale and self._checked_at is not None
+                    and now - self._checked_at < LANG_INDEX_CHECK_INTERVAL):
+                return
+            self._stale = False
+            self._checked_at = now
+            if not self._saved_loaded:
+                self._saved_loaded = True
+                self._load_saved()
+
+            current = {}
+            self._order = {}
+            for order, file_path in enumerate(ExcelTextReplacer({}).find_excel_files(self.directory)):
+                current[str(file_path)] = file_path
+                self._order[file_path.name] = order
+
+            changed = False
+            for key in [k for k in self._files if k not in current]:
+                self._remove_entries(key)
+                del self._files[key]
+                changed = True
+
+            for key, file_path in current.items():
+                signature = file_signature(key)
+                cached = self._files.get(key)
+                if cached and cached[0] == signature:
+                    IO_STATS.record_cache('language_index', True)
+                    continue
+                IO_STATS.record_cache('language_index', False)
+                if cached:
+                    self._remove_entries(key)
+
+                entries = self._load_file(file_path)
+                if entries is None:
+                    # 读取失败时不记录签名，下次重新读取
+                    entries, signature = [], None
+                self._files[key] = (signature, entries, self._bigram_postings(entries))
+                self._add_entries(key)
+                changed = True
+
+            if changed:
+                self._sorted = None
+                self._save()
+
+    def _add_entries(self, key):
+        file_name = Path(key).name
+        for t_id, sheet_idx, sheet_name, row, text in self._files[key][1]:
+            if t_id is not None and text is not None:
+                self._by_id.setdefault(t_id, []).append((file_name, sheet_idx, sheet_name, row, text))
+
+    def _remove_entries(self, key):
+        file_name = Path(key).name
+        for t_id, *_ in self._files[key][1]:
+            if t_id is None:
+                continue
+            remaining = [entry for entry in self._by_id.get(t_id, []) if entry[0] != file_name]
+            if remaining:
+                self._by_id[t_id] = remaining
+            else:
+                self._by_id.pop(t_id, None)
+
+    def _load_saved(self):
+        """读取保存的索引（文件签名不符的条目在 refresh 中重新读取）"""
+        saved = load_cache_file(self.index_path, self.VERSION, "语言索引")
+        if saved is None:
+            return
+        for file_name, cached in saved['files'].items():
+            key = str(self.directory / file_name)
+            self._files[key] = cached
+            self._add_entries(key)
+
+    def _save(self):
+        save_cache_file(self.index_path, self.VERSION, "语言索引",
+                        files={Path(key).name: cached for key, cached in self._files.items()})
+
+    @staticmethod
+    def _bigram_postings(entries):
+        """中文的二字倒排索引 {相邻两个字符: array(包含它的条目序号)}"""
+        from array import array
+
+        postings = {}
+        for position, entry in enumerate(entries):
+            text = entry[4]
+            if text is None or len(text) < 2:
+                continue
+            for bigram in {text[i:i + 2] for i in range(len(text) - 1)}:
+                posting = postings.get(bigram)
+                if posting is None:
+                    posting = postings[bigram] = array('I')
+                posting.append(position)
+        return postings
+
+    def _load_file(self, file_path):
+        """读取单个语言文件的所有条目（第1列或第3列不为空的行，与搜索时判断空单元格的方式相同），读取失败时返回None"""
+        entries = []
+        try:
+            with workbook_lock(file_path, shared=True), WorkbookReader(file_path, pooled=True) as reader:
+                # .xls 的空单元格为''，.xlsx 的为None
+                is_empty = (lambda value: not value) if reader.is_xls else (lambda value: value is None)
+                rows_read = 0
+                for sheet_idx, sheet_name in enumerate(reader.sheet_names):
+                    for row_idx, row in enumerate(reader.rows(sheet_name)):
+                        rows_read += 1
+                        # 第1列为ID，第3列为中文
+                        id_value = row[0] if len(row) > 0 else None
+                        chinese_value = row[2] if len(row) > 2 else None
+                        id_empty = is_empty(id_value)
+                        chinese_empty = is_empty(chinese_value)
+                        if not (id_empty and chinese_empty):
+                            entries.append((None if id_empty else str(id_value), sheet_idx, sheet_name,
+                                            row_idx + 1, None if chinese_empty else str(chinese_value)))
+                IO_STATS.record_cells(file_path, read=rows_read * 2)
+        except Exception as e:
+            print(f"读取语言文件 {file_path.name} 时出错: {str(e)}")
+            return None
+        return entries
+
+    def lookup(self, search_id):
+        """按ID查找所有条目
+
+        Returns:
+            list: [{'file', 'sheet', 'row', 'chinese_text'}]，按文件、工作表、行排序
+        """
+        with self._lock:
+            self.refresh()
+            entries = list(self._by_id.get(search_id, []))
+
+        entries.sort(key=lambda e: (self._order.get(e[0], 0), e[1], e[3]))
+        return [{'file': file_name, 'sheet': sheet_name, 'row': row, 'chinese_text': text}
+                for file_name, _, sheet_name, row, text in entries]
+
+    def _sorted_keys(self):
+        """按ID、中文排序的键（文件变化后第一次搜索时重建）
+
+        rows 为按扫描顺序（文件、工作表、行）排列的所有行 (文件名, 工作表名, 行号, ID, 中文)，
+        offsets 为各文件第一行在 rows 中的序号，id / text 为 ([排好序的键], [键所在行在 rows 中的序号])
+        """
+        if self._sorted is None:
+            rows = []
+            offsets = {}
+            for key, (_, entries, _) in sorted(self._files.items(),
+                                               key=lambda item: self._order.get(Path(item[0]).name, 0)):
+                file_name = Path(key).name
+                offsets[key] = len(rows)
+                rows.extend((file_name, sheet_name, row, t_id, text) for t_id, _, sheet_name, row, text in entries)
+            self._sorted = {'rows': rows, 'offsets': offsets}
+            for column, field in (('id', 3), ('text', 4)):
+                ranks = [rank for rank, row in enumerate(rows) if row[field] is not None]
+                keys = [rows[rank][field] for rank in ranks]
+                order = sorted(range(len(keys)), key=keys.__getitem__)
+                self._sorted[column] = ([keys[i] for i in order], [ranks[i] for i in order])
+        return self._sorted
+
+    def search(self, search_text, limit=None):
+        """按与 is_text_match 相同的规则搜索ID和中文（精确匹配，末尾带*为前缀匹配，*知己* 为包含匹配），不打开工作簿
+
+        Returns:
+            list: [(文件名, 工作表名, 行号, ID, 中文)]，按文件、工作表、行排序（与逐个扫描文件的顺序相同），
+                  空单元格为None；limit 指定时只返回前 limit 条
+        """
+        with self._lock:
+            self.refresh()
+            index = self._sorted_keys()
+            if len(search_text) > 1 and search_text.startswith('*') and search_text.endswith('*'):
+                matched = self._contains_ranks(index, search_text[1:-1])
+            else:
+                matched = self._range_ranks(index, search_text)
+
+        # 同一行的ID和中文都匹配时只算一次
+        ranks = set(matched[0]).union(matched[1]) if matched[0] and matched[1] else matched[0] or matched[1]
+        if limit is not None:
+            import heapq
+            ranks = heapq.nsmallest(limit, ranks)
+        else:
+            ranks = sorted(ranks)
+        rows = index['rows']
+        return [rows[rank] for rank in ranks]
+
+    @staticmethod
+    def _range_ranks(index, search_text):
+        """精确匹配和前缀匹配：在有序键上二分查找 [ID匹配的行, 中文匹配的行]"""
+        from bisect import bisect_left, bisect_right
+
+        prefix = search_text.endswith('*')
+        target = search_text[:-1] if prefix else search_text
+        matched = []
+        for column in ('id', 'text'):
+            keys, ranks = index[column]
+            start = bisect_left(keys, target)
+            if not prefix:
+                end = bisect_right(keys, target, start)
+            elif not target:
+                end = len(keys)
+            elif ord(target[-1]) < sys.maxunicode:
+                # 以 target 开头的字符串都小于 target 末字符加1后的字符串
+                end = bisect_left(keys, target[:-1] + chr(ord(target[-1]) + 1), start)
+            else:
+                end = start
+                while end < len(keys) and keys[end].startswith(target):
+                    end += 1
+            matched.append(ranks[start:end])
+        return matched
+
+    def _contains_ranks(self, index, target):
+        """包含匹配 [ID匹配的行, 中文匹配的行]：中文只检查二字倒排表交集中的行，ID（英文）在内存中逐个检查"""
+        keys, ranks = index['id']
+        if not target:
+            id_ranks = list(ranks)
+        else:
+            from bisect import bisect_right
+
+            # 所有ID用换行拼接后整体查找，命中位置再换算回所在的ID
+            if 'id_blob' not in index:
+                starts = []
+                position = 0
+                for key in keys:
+                    starts.append(position)
+                    position += len(key) + 1
+                index['id_blob'], index['id_starts'] = '\n'.join(keys), starts
+            blob, starts = index['id_blob'], index['id_starts']
+            id_ranks = []
+            position = blob.find(target)
+            while position >= 0:
+                i = bisect_right(starts, position) - 1
+                if position + len(target) <= starts[i] + len(keys[i]):
+                    id_ranks.append(ranks[i])
+                    position = starts[i] + len(keys[i]) + 1
+                else:
+                    position += 1
+                position = blob.find(target, position)
+
+        text_ranks = []
+        for key, (_, entries, postings) in self._files.items():
+            offset = index['offsets'][key]
+            for position in self._text_candidates(entries, postings, target):
+                if target in entries[position][4]:
+                    text_ranks.append(offset + position)
+        return [id_ranks, text_ranks]
+
+    @staticmethod
+    def _text_candidates(entries, postings, target):
+        """可能包含 target 的条目序号：两个字以上取各二字倒排表的交集，否则为所有中文不为空的条目"""
+        if len(target) < 2:
+            return [position for position, entry in enumerate(entries) if entry[4] is not None]
+        lists = []
+        for bigram in {target[i:i + 2] for i in range(len(target) - 1)}:
+            posting = postings.get(bigram)
+            if posting is None:
+                return []
+            lists.append(posting)
+        lists.sort(key=len)
+        candidates = set(lists[0])
+        for posting in lists[1:]:
+            candidates.intersection_update(posting)
+            if not candidates:
+                break
+        return candidates
+
+    def files_containing(self, texts):
+        """第1列或第3列中含有任一文本的文件名集合（替换前的候选扫描，不打开工作簿）
+
+        中文通过二字倒排表只检查候选行；ID（英文）和单字文本把本文件的单元格拼接后整体查找，
+        拼接处可能多报但不会漏报。索引读取失败的文件（没有条目，不知道内容）总是算作候选。
+        """
+        texts = list(texts)
+        found = set()
+        with self._lock:
+            self.refresh()
+            for key, (signature, entries, postings) in self._files.items():
+                if signature is None:
+                    found.add(Path(key).name)
+                    continue
+                ids = '\n'.join(entry[0] for entry in entries if entry[0] is not None)
+                all_text = None
+                for text in texts:
+                    if text in ids:
+                        break
+                    if len(text) < 2:
+                        if all_text is None:
+                            all_text = '\n'.join(entry[4] for entry in entries if entry[4] is not None)
+                        if text in all_text:
+                            break
+                    elif any(text in entries[position][4] for position in self._text_candidates(entries, postings, text)):
+                        break
+                else:
+                    continue
+                found.add(Path(key).name)
+        return found
+
+    def id_counts(self):
+        """每个ID在语言表中出现的次数 {ID: 行数}（ID和中文都不为空的行）"""
+        with self._lock:
+            self.refresh()
+            return {t_id: len(entries) for t_id, entries in self._by_id.items()}
+
+    def stats(self):
+        """返回索引规模 {'files': 文件数, 'ids': ID数}"""
+        with self._lock:
+            return {'files': len(self._files), 'ids': len(self._by_id)}
+
+
+def print_timing_report(started_at, loaded_at):
+    """打印启动耗时统计（--timing）
+
+    Args:
+        started_at: 入口模块开始加载的时间（time.perf_counter）
+        loaded_at: 入口模块加载完成、开始执行命令的时间
+    """
+    finished_at = time.perf_counter()
+    print()
+    print("="*40)
+    print("启动耗时统计")
+    print("="*40)
+    print(f"  模块加载: {(loaded_at - started_at) * 1000:8.1f} ms")
+    for name, elapsed in IMPORT_TIMINGS.items():
+        print(f"  导入 {name}: {elapsed:8.1f} ms")
+    imports_total = sum(IMPORT_TIMINGS.values())
+    print(f"  命令执行: {(finished_at - loaded_at) * 1000:8.1f} ms（其中依赖导入 {imports_total:.1f} ms）")
+    print(f"  总耗时:   {(finished_at - started_at) * 1000:8.1f} ms")
+
+
+def run_search(replacer, search_text, work_path, use_daemon=True, report=None, jobs=None, limit=None,
+               output=None):
+    """执行搜索；常驻进程（python config.py serve）运行时交给它处理
+
+    output 指定时搜索结果以JSON Lines写入其中（--jsonl）
+    """
+    print("Excel文本搜索工具")
+    print("="*40)
+    print("支持模糊搜索：在搜索文本末尾添加 * 号进行前缀匹配")
+    print("例如：'t_hero_getway*' 可搜索所有以 t_hero_getway 开头的文本")
+    print("="*40)
+    print(f"搜索路径: {work_path}")
+
+    jobs = jobs or SEARCH_JOBS
+    response = None
+    if use_daemon:
+        params = {'text': search_text, 'directory': str(Path(work_path).resolve()), 'jobs': jobs}
+        if report:
+            params['report'] = str(Path(report).resolve())
+        if limit:
+            params['limit'] = limit
+        if output is not None:
+            params['format'] = 'jsonl'
+        try:
+            response = daemon_request('search', params)
+        except DaemonRequestError as e:
+            print_daemon_error(e)
+            return
+    if response is not None:
+        handled, result = daemon_response_result(response)
+        if handled:
+            if output is not None and result is not None:
+                # jsonl 格式时常驻进程返回JSON Lines文本
+                output.write(result)
+            return
+    if report:
+        replacer.search_records.open(report)
+    # 语言文件夹下有保存的索引时直接查索引（只重新读取变化过的文件），否则逐个扫描文件
+    index = get_language_index(work_path) if Path(work_path).is_dir() else None
+    if index is not None and not index.has_saved():
+        index = None
+    replacer.search_in_excel_files(search_text, work_path, jobs, limit, output, index)
+
+
+def run_batch_search(replacer, terms, work_path, use_daemon=True, report=None, jobs=None, output=None):
+    """批量搜索（--batch）；常驻进程运行时交给它处理"""
+    print("Excel文本批量搜索工具")
+    print("="*40)
+    print(f"搜索路径: {work_path}")
+    print(f"搜索词: {len(terms)} 个")
+    print("="*40)
+
+    jobs = jobs or SEARCH_JOBS
+    response = None
+    if use_daemon:
+        params = {'terms': terms, 'directory': str(Path(work_path).resolve()), 'jobs': jobs}
+        if report:
+            params['report'] = str(Path(report).resolve())
+        if output is not None:
+            params['format'] = 'jsonl'
+        try:
+            response = daemon_request('search', params)
+        except DaemonRequestError as e:
+            print_daemon_error(e)
+            return
+    if response is not None:
+        handled, result = daemon_response_result(response)
+        if handled:
+            if output is not None and result is not None:
+                output.write(result)
+            return
+    if report:
+        replacer.search_records.open(report)
+    index = get_language_index(work_path) if Path(work_path).is_dir() else None
+    if index is not None and not index.has_saved():
+        index = None
+    replacer.print_batch_results(replacer.batch_search(terms, work_path, jobs, index), output)
+
+
+def read_terms(path):
+    """读取批量搜索词：每行一个，忽略空行；path 为 - 时从标准输入读取"""
+    if path == '-':
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(path, 'r', encoding='utf-8-sig') as f:
+            lines = f.read().splitlines()
+    return [line.strip().strip('"') for line in lines if line.strip()]
+
+
 def main():
+    # --local: 不使用常驻进程，直接在本进程中执行
+    use_daemon = '--local' not in sys.argv
+    if not use_daemon:
+        sys.argv.remove('--local')
+
+    # --io: 结束时打印文件读写统计（交给常驻进程执行时没有本地读写，不打印）
+    show_io = '--io' in sys.argv
+    if show_io:
+        sys.argv.remove('--io')
+
+    # --timing: 结束时打印启动耗时统计
+    show_timing = '--timing' in sys.argv
+    if show_timing:
+        sys.argv.remove('--timing')
+
+    # --dry-run: 只规划替换并输出结果，不写入文件
+    dry_run = '--dry-run' in sys.argv
+    if dry_run:
+        sys.argv.remove('--dry-run')
+
+    # --report 文件: 详细替换记录或搜索结果逐条写入文件（.jsonl 或 .csv）
+    report = None
+    if '--report' in sys.argv:
+        position = sys.argv.index('--report')
+        if position + 1 >= len(sys.argv):
+            print("--report 需要指定文件路径")
+            return
+        report = sys.argv[position + 1]
+        del sys.argv[position:position + 2]
+
+    # --batch 文件: 批量搜索文件中的所有搜索词（每行一个，- 表示从标准输入读取）
+    terms = None
+    if '--batch' in sys.argv:
+        position = sys.argv.index('--batch')
+        if position + 1 >= len(sys.argv):
+            print("--batch 需要指定搜索词文件（- 表示标准输入）")
+            return
+        try:
+            terms = read_terms(sys.argv[position + 1])
+        except OSError as e:
+            print(f"读取搜索词文件失败: {e}")
+            return
+        del sys.argv[position:position + 2]
+
+    # --full: 忽略增量替换记录，本次全部重新替换
+    full = '--full' in sys.argv
+    if full:
+        sys.argv.remove('--full')
+
+    # --limit N: 搜索时最多输出N条结果，达到后停止搜索
+    limit = None
+    if '--limit' in sys.argv:
+        position = sys.argv.index('--limit')
+        try:
+            limit = int(sys.argv[position + 1])
+        except (IndexError, ValueError):
+            print("--limit 需要指定结果条数")
+            return
+        del sys.argv[position:position + 2]
+
+    # --jsonl: 搜索结果每条一行JSON输出到标准输出，其他信息输出到标准错误（供脚本使用）
+    jsonl = '--jsonl' in sys.argv
+    if jsonl:
+        sys.argv.remove('--jsonl')
+
+    # --jobs N: 替换或搜索时并行处理的进程数（默认分别为 REPLACE_JOBS、SEARCH_JOBS）
+    jobs = None
+    if '--jobs' in sys.argv:
+        position = sys.argv.index('--jobs')
+        try:
+            jobs = int(sys.argv[position + 1])
+        except (IndexError, ValueError):
+            print("--jobs 需要指定进程数")
+            return
+        del sys.argv[position:position + 2]
+
+    loaded_at = time.perf_counter()
+    # --jsonl 时JSON Lines以外的输出（包括统计）都写到标准错误
+    output = sys.stdout if jsonl else None
+    with redirect_stdout(sys.stderr) if jsonl else nullcontext():
+        try:
+            run_main(use_daemon, dry_run, jobs, report, full, limit, output, terms)
+        finally:
+            if show_io:
+                snapshot = IO_STATS.snapshot()
+                if snapshot['files'] or snapshot['caches']:
+                    print_io_report(snapshot)
+            if show_timing:
+                print_timing_report(_STARTED_AT, loaded_at)
+
+
+def run_main(use_daemon, dry_run=False, jobs=None, report=None, full=False, limit=None, output=None, terms=None):
     # 创建替换器实例
     replacer = ExcelTextReplacer(REPLACEMENT_CONFIG)
+    try:
+        run_replacer(replacer, use_daemon, dry_run, jobs, report, full, limit, output, terms)
+    finally:
+        replacer.close_report()
+
+
+def run_replacer(replacer, use_daemon, dry_run, jobs, report, full, limit, output, terms):
+    if terms is not None:
+        # 批量搜索模式：可选的第一个参数为搜索路径
+        if TARGET_FOLDER and TARGET_FOLDER.strip():
+            work_path = TARGET_FOLDER
+        else:
+            work_path = sys.argv[1] if len(sys.argv) >= 2 else '.'
+        run_batch_search(replacer, terms, work_path, use_daemon, report, jobs, output)
+        return
 
     # 确定工作路径：优先使用配置的目标文件夹
     if TARGET_FOLDER and TARGET_FOLDER.strip():
@@ -1640,13 +4243,7 @@ def main():
                 # 搜索模式
                 search_text = first_arg.strip('"')
                 work_path = sys.argv[2] if len(sys.argv) >= 3 else '.'
-                print("Excel文本搜索工具")
-                print("="*40)
-                print("支持模糊搜索：在搜索文本末尾添加 * 号进行前缀匹配")
-                print("例如：'t_hero_getway*' 可搜索所有以 t_hero_getway 开头的文本")
-                print("="*40)
-                print(f"搜索路径: {work_path}")
-                replacer.search_in_excel_files(search_text, work_path)
+                run_search(replacer, search_text, work_path, use_daemon, report, jobs, limit, output)
                 return
             else:
                 # 替换模式，第一个参数是路径
@@ -1663,13 +4260,7 @@ def main():
            (not first_arg.endswith('.xls') and not first_arg.endswith('.xlsx') and not first_arg == '.'):
             # 搜索模式
             search_text = first_arg.strip('"')
-            print("Excel文本搜索工具")
-            print("="*40)
-            print("支持模糊搜索：在搜索文本末尾添加 * 号进行前缀匹配")
-            print("例如：'t_hero_getway*' 可搜索所有以 t_hero_getway 开头的文本")
-            print("="*40)
-            print(f"搜索路径: {work_path}")
-            replacer.search_in_excel_files(search_text, work_path)
+            run_search(replacer, search_text, work_path, use_daemon, report, jobs, limit, output)
             return
 
     print("Excel文本替换工具")
@@ -1692,13 +4283,57 @@ def main():
         print(f"  {file_path}")
     print()
 
-    # 处理文件
-    for file_path in excel_files:
-        replacer.process_excel_file(file_path)
+    if LANG_INDEX_FILE and Path(work_path).is_dir():
+        # 用语言索引找出含有替换文本的文件，其余文件不用打开
+        candidates = get_language_index(work_path).files_containing(replacer.replacement_config)
+        skipped = [file_path for file_path in excel_files if file_path.name not in candidates]
+        if skipped:
+            print(f"语言索引显示以下 {len(skipped)} 个文件不含任何替换文本，跳过:")
+            for file_path in skipped:
+                print(f"  {file_path}")
+            print()
+            excel_files = [file_path for file_path in excel_files if file_path.name in candidates]
+
+    if report:
+        replacer.replacement_records.open(report)
+
+    if REPLACE_STATE_FILE:
+        # 增量替换记录放在工作文件夹对应的缓存文件夹下；--full 时从空记录开始，本次结束后重新保存
+        state_folder = Path(work_path) if Path(work_path).is_dir() else Path(work_path).parent
+        state_path = cache_folder(state_folder) / REPLACE_STATE_FILE
+        replacer.state = ReplacementState(state_path) if full else ReplacementState.load(state_path)
+
+    jobs = jobs or REPLACE_JOBS
+    if jobs > 1 and len(excel_files) > 1:
+        # 每个文件在工作进程中规划并写入，结果按文件顺序合并
+        replacer.process_files_parallel(excel_files, jobs, dry_run)
         print()
+    else:
+        replace_serial(replacer, excel_files, dry_run)
+
+    if replacer.state and not dry_run:
+        try:
+            replacer.state.save()
+        except OSError as e:
+            print(f"保存增量替换记录失败: {e}")
 
     # 打印总结
     replacer.print_summary()
+    if dry_run:
+        print("试运行：以上替换均未写入文件")
+
+
+def replace_serial(replacer, excel_files, dry_run):
+    """逐个文件替换：每个文件先只读规划，有替换时再写入
+
+    规划完一个文件就写入并提交统计，详细记录随即写入报告，内存中只保留当前文件的替换计划
+    """
+    if dry_run:
+        print("试运行（--dry-run），不写入文件:")
+    for file_path in excel_files:
+        replacer.process_excel_file(file_path, dry_run)
+    print()
+
 
 if __name__ == "__main__":
     main()